@@ -1,256 +1,534 @@
-PRAGMA foreign_keys = ON;
-
--- =========================
--- speakers
--- =========================
-CREATE TABLE IF NOT EXISTS speakers (
-  speaker_id         INTEGER PRIMARY KEY,
-  speaker_name       TEXT NOT NULL,
-  speaker_role       TEXT NOT NULL,   -- 例: "リラ", "GPT-5.2"
-  canonical_role     TEXT NOT NULL CHECK (canonical_role IN ('human','ai','system','unknown')),
-  created_at         TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
-  updated_at         TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP)
-);
-
-CREATE INDEX IF NOT EXISTS idx_speakers_canonical_role ON speakers(canonical_role);
-
--- =========================
--- card role major items
--- =========================
-CREATE TABLE IF NOT EXISTS card_role_major_items (
-  card_role_major_item_id    INTEGER PRIMARY KEY,
-  major_name                 TEXT NOT NULL UNIQUE
-  -- 例: Goal/Claim/Hypothesis/Reason/Example/Decision/Rejection/Question/Other/Meaningless
-);
-
--- =========================
--- card roles (minor items)
--- =========================
-CREATE TABLE IF NOT EXISTS card_roles (
-  card_role_id               INTEGER PRIMARY KEY,
-  card_role_major_item_id    INTEGER NOT NULL,
-  minor_name                 TEXT NOT NULL,
-  created_at                 TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
-  updated_at                 TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
-  FOREIGN KEY (card_role_major_item_id) REFERENCES card_role_major_items(card_role_major_item_id)
-);
-
-CREATE UNIQUE INDEX IF NOT EXISTS uq_card_roles_major_minor
-  ON card_roles(card_role_major_item_id, minor_name);
-
--- =========================
--- meaningless phrases (optional dictionary)
--- =========================
-CREATE TABLE IF NOT EXISTS meaningless_phrases (
-  meaningless_id     INTEGER PRIMARY KEY,
-  card_role_id       INTEGER NOT NULL,
-  phrase             TEXT NOT NULL,
-  created_at         TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
-  updated_at         TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
-  FOREIGN KEY (card_role_id) REFERENCES card_roles(card_role_id)
-);
-
-CREATE UNIQUE INDEX IF NOT EXISTS uq_meaningless_phrases_role_phrase
-  ON meaningless_phrases(card_role_id, phrase);
-
--- =========================
--- cards
--- =========================
-CREATE TABLE IF NOT EXISTS cards (
-  card_id                INTEGER PRIMARY KEY,
-
-  thread_id              TEXT NOT NULL,      -- UUID文字列
-  message_id             INTEGER NOT NULL,   -- 1,2,3... (ログ確定の想定)
-  text_id                INTEGER NOT NULL,   -- 1,2,3... (疎でもOK)
-  split_key              INTEGER NOT NULL,   -- 1,2,3...（ソート用）
-
-  split_version          INTEGER NOT NULL DEFAULT 1,
-
-  speaker_id             INTEGER NOT NULL,
-  conversation_at        TEXT NOT NULL,      -- 発言時刻(ISO8601推奨)
-
-  contents               TEXT NOT NULL,
-  is_edited              INTEGER NOT NULL DEFAULT 0 CHECK (is_edited IN (0,1)),
-
-  card_role_id           INTEGER,            -- LLM付与結果（未確定ならNULL）
-  card_role_confidence   REAL,               -- 0.0-1.0想定
-  visibility             TEXT NOT NULL DEFAULT 'normal'
-                         CHECK (visibility IN ('normal','hidden','archived')),
-
-  created_at             TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
-  updated_at             TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
-
-  FOREIGN KEY (speaker_id) REFERENCES speakers(speaker_id),
-  FOREIGN KEY (card_role_id) REFERENCES card_roles(card_role_id),
-
-  -- 論理キー：これで「参照で本文を再現」が安定する
-  UNIQUE (thread_id, message_id, text_id, split_version)
-);
-
-CREATE INDEX IF NOT EXISTS idx_cards_thread_msg
-  ON cards(thread_id, message_id);
-
-CREATE INDEX IF NOT EXISTS idx_cards_role_visibility
-  ON cards(card_role_id, visibility);
-
-CREATE INDEX IF NOT EXISTS idx_cards_conversation_at
-  ON cards(conversation_at);
-
--- =========================
--- link kinds
--- =========================
-CREATE TABLE IF NOT EXISTS link_kinds (
-  link_kind_id      INTEGER PRIMARY KEY,
-  link_kind_name    TEXT NOT NULL UNIQUE
-  -- supports/contradicts/refines/derived_from/example_of/depends_on
-);
-
--- =========================
--- card links (directed edges)
--- =========================
-CREATE TABLE IF NOT EXISTS card_links (
-  link_id           INTEGER PRIMARY KEY,
-  link_kind_id      INTEGER NOT NULL,
-
-  from_card_id      INTEGER NOT NULL,
-  to_card_id        INTEGER NOT NULL,
-
-  confidence        REAL, -- 0.0-1.0想定
-
-  created_at        TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
-  updated_at        TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
-
-  FOREIGN KEY (link_kind_id) REFERENCES link_kinds(link_kind_id),
-  FOREIGN KEY (from_card_id) REFERENCES cards(card_id) ON DELETE CASCADE,
-  FOREIGN KEY (to_card_id) REFERENCES cards(card_id) ON DELETE CASCADE,
-
-  CHECK (from_card_id <> to_card_id)
-);
-
-CREATE INDEX IF NOT EXISTS idx_card_links_from
-  ON card_links(from_card_id);
-
-CREATE INDEX IF NOT EXISTS idx_card_links_to
-  ON card_links(to_card_id);
-
-CREATE INDEX IF NOT EXISTS idx_card_links_kind
-  ON card_links(link_kind_id);
-
--- ある種の重複リンクを防ぎたいなら（任意）
-CREATE UNIQUE INDEX IF NOT EXISTS uq_card_links_kind_from_to
-  ON card_links(link_kind_id, from_card_id, to_card_id);
-
--- =========================
--- link_suggestions (pool)
--- =========================
-CREATE TABLE IF NOT EXISTS link_suggestions (
-  suggestion_id      INTEGER PRIMARY KEY,
-
-  -- 片方向運用：ペアは1組だけ保持する前提
-  -- 生成時に from_card_id < to_card_id に正規化して入れるのがおすすめ
-  from_card_id       INTEGER NOT NULL,
-  to_card_id         INTEGER NOT NULL,
-
-  -- LLM提案結果（未処理ならNULL）
-  suggested_link_kind_id   INTEGER,   -- link_kinds.link_kind_id
-  suggested_confidence     REAL,      -- 0.0-1.0想定
-
-  -- 状態管理
-  status            TEXT NOT NULL DEFAULT 'queued'
-                    CHECK (status IN (
-                      'queued',       -- 未処理
-                      'processing',   -- 処理中
-                      'success',      -- 提案取得済
-                      'failed',       -- 取得失敗
-                      'approved',     -- 承認してcard_linksへ反映済
-                      'rejected'      -- 却下
-                    )),
-
-  -- 監査用
-  created_at        TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
-  updated_at        TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
-
-  -- 1週間後に掃除したいならこれを使う（NULLなら対象外）
-  expires_at        TEXT,
-
-  FOREIGN KEY (from_card_id) REFERENCES cards(card_id) ON DELETE CASCADE,
-  FOREIGN KEY (to_card_id)   REFERENCES cards(card_id) ON DELETE CASCADE,
-  FOREIGN KEY (suggested_link_kind_id) REFERENCES link_kinds(link_kind_id),
-
-  CHECK (from_card_id <> to_card_id)
-);
-
--- 重複ペアはスキップ（検討済扱い）
-CREATE UNIQUE INDEX IF NOT EXISTS uq_link_suggestions_pair
-  ON link_suggestions(from_card_id, to_card_id);
-
--- ステータス別に拾いやすく
-CREATE INDEX IF NOT EXISTS idx_link_suggestions_status
-  ON link_suggestions(status);
-
--- キュー処理で使う
-CREATE INDEX IF NOT EXISTS idx_link_suggestions_queue
-  ON link_suggestions(status, updated_at);
-
--- 提案内容でフィルタしたい時用
-CREATE INDEX IF NOT EXISTS idx_link_suggestions_kind_conf
-  ON link_suggestions(suggested_link_kind_id, suggested_confidence);
-
--- 期限切れ掃除用
-CREATE INDEX IF NOT EXISTS idx_link_suggestions_expires_at
-  ON link_suggestions(expires_at);
-
--- =========================
--- llm_jobs
--- =========================
-
-CREATE TABLE IF NOT EXISTS llm_jobs (
-    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
-
-    -- ジョブ種別（処理内容）
-    job_type TEXT NOT NULL
-        CHECK (job_type IN ('card_role', 'link_suggestion')),
-
-    -- 対象データ
-    target_table TEXT NOT NULL
-        CHECK (target_table IN ('cards', 'link_suggestions')),
-    target_id INTEGER NOT NULL,
-
-    -- 状態管理
-    status TEXT NOT NULL
-        CHECK (status IN ('queued', 'processing', 'success', 'failed'))
-        DEFAULT 'queued',
-
-    -- ロック・進捗
-    locked_at TEXT,          -- processing にした時刻
-    lock_owner TEXT,         -- worker識別子（任意）
-    started_at TEXT,         -- 実処理開始
-    finished_at TEXT,        -- 成功 or 失敗確定
-
-    -- エラー情報（failed時のみ）
-    error TEXT,
-
-    -- メタ情報（将来用・任意）
-    result_json TEXT,        -- モデル名、推論時間など入れたくなったら
-    created_at TEXT NOT NULL DEFAULT (datetime('now')),
-    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
-
-    -- 1週間後に掃除したいならこれを使う（NULLなら対象外）
-    expires_at        TEXT
-);
-
--- 同一対象への二重投入を防ぐ（必要なら）
-CREATE UNIQUE INDEX IF NOT EXISTS idx_llm_jobs_unique_target
-ON llm_jobs (job_type, target_table, target_id);
-
--- キュー取得高速化
-CREATE INDEX IF NOT EXISTS idx_llm_jobs_queue
-ON llm_jobs (status, created_at);
-
--- processing 回収用
-CREATE INDEX IF NOT EXISTS idx_llm_jobs_processing
-ON llm_jobs (status, locked_at);
-
--- 期限切れ掃除用
-CREATE INDEX IF NOT EXISTS idx_llm_jobs_expires_at
-  ON llm_jobs(expires_at);
\ No newline at end of file
+PRAGMA foreign_keys = ON;
+
+-- =========================
+-- speakers
+-- =========================
+CREATE TABLE IF NOT EXISTS speakers (
+  speaker_id         INTEGER PRIMARY KEY,
+  speaker_name       TEXT NOT NULL,
+  speaker_role       TEXT NOT NULL,   -- 例: "リラ", "GPT-5.2"
+  canonical_role     TEXT NOT NULL CHECK (canonical_role IN ('human','ai','system','unknown')),
+  created_at         TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  updated_at         TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP)
+);
+
+CREATE INDEX IF NOT EXISTS idx_speakers_canonical_role ON speakers(canonical_role);
+
+-- =========================
+-- card role major items
+-- =========================
+CREATE TABLE IF NOT EXISTS card_role_major_items (
+  card_role_major_item_id    INTEGER PRIMARY KEY,
+  major_name                 TEXT NOT NULL UNIQUE
+  -- 例: Goal/Claim/Hypothesis/Reason/Example/Decision/Rejection/Question/Other/Meaningless
+);
+
+-- =========================
+-- card roles (minor items)
+-- =========================
+CREATE TABLE IF NOT EXISTS card_roles (
+  card_role_id               INTEGER PRIMARY KEY,
+  card_role_major_item_id    INTEGER NOT NULL,
+  minor_name                 TEXT NOT NULL,
+  created_at                 TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  updated_at                 TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  FOREIGN KEY (card_role_major_item_id) REFERENCES card_role_major_items(card_role_major_item_id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_card_roles_major_minor
+  ON card_roles(card_role_major_item_id, minor_name);
+
+-- =========================
+-- meaningless phrases (optional dictionary)
+-- =========================
+CREATE TABLE IF NOT EXISTS meaningless_phrases (
+  meaningless_id     INTEGER PRIMARY KEY,
+  card_role_id       INTEGER NOT NULL,
+  phrase             TEXT NOT NULL,
+  created_at         TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  updated_at         TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  FOREIGN KEY (card_role_id) REFERENCES card_roles(card_role_id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_meaningless_phrases_role_phrase
+  ON meaningless_phrases(card_role_id, phrase);
+
+-- =========================
+-- cards
+-- =========================
+CREATE TABLE IF NOT EXISTS cards (
+  card_id                INTEGER PRIMARY KEY,
+
+  thread_id              TEXT NOT NULL,      -- UUID文字列
+  message_id             INTEGER NOT NULL,   -- 1,2,3... (ログ確定の想定)
+  text_id                INTEGER NOT NULL,   -- 1,2,3... (疎でもOK)
+  split_key              INTEGER NOT NULL,   -- 1,2,3...（ソート用）
+
+  split_version          INTEGER NOT NULL DEFAULT 1,
+
+  speaker_id             INTEGER NOT NULL,
+  conversation_at        TEXT NOT NULL,      -- 発言時刻(ISO8601推奨)
+
+  contents               TEXT NOT NULL,
+  is_edited              INTEGER NOT NULL DEFAULT 0 CHECK (is_edited IN (0,1)),
+
+  card_role_id           INTEGER,            -- LLM付与結果（未確定ならNULL）
+  card_role_confidence   REAL,               -- 0.0-1.0想定
+  visibility             TEXT NOT NULL DEFAULT 'normal'
+                         CHECK (visibility IN ('normal','hidden','archived')),
+
+  created_at             TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  updated_at             TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+
+  FOREIGN KEY (speaker_id) REFERENCES speakers(speaker_id),
+  FOREIGN KEY (card_role_id) REFERENCES card_roles(card_role_id),
+
+  -- 論理キー：これで「参照で本文を再現」が安定する
+  UNIQUE (thread_id, message_id, text_id, split_version)
+);
+
+CREATE INDEX IF NOT EXISTS idx_cards_thread_msg
+  ON cards(thread_id, message_id);
+
+-- 旧インデックス：(card_role_id, visibility) は idx_cards_role_visibility_conversation_at の先頭部分、
+-- conversation_at 単独は一覧が必ず visibility で絞るため idx_cards_visibility_conversation_at で足りる
+DROP INDEX IF EXISTS idx_cards_role_visibility;
+DROP INDEX IF EXISTS idx_cards_conversation_at;
+
+-- 一覧のキーセットページング用（card_id は rowid として末尾に含まれる）
+CREATE INDEX IF NOT EXISTS idx_cards_visibility_conversation_at
+  ON cards(visibility, conversation_at);
+
+CREATE INDEX IF NOT EXISTS idx_cards_visibility_created_at
+  ON cards(visibility, created_at);
+
+CREATE INDEX IF NOT EXISTS idx_cards_visibility_updated_at
+  ON cards(visibility, updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_cards_visibility_confidence
+  ON cards(visibility, COALESCE(card_role_confidence, -1.0));
+
+-- 一覧の絞り込みでよく使う組み合わせ用
+CREATE INDEX IF NOT EXISTS idx_cards_visibility_thread
+  ON cards(visibility, thread_id, conversation_at);
+
+CREATE INDEX IF NOT EXISTS idx_cards_visibility_speaker_conversation_at
+  ON cards(visibility, speaker_id, conversation_at);
+
+CREATE INDEX IF NOT EXISTS idx_cards_role_visibility_conversation_at
+  ON cards(card_role_id, visibility, conversation_at);
+
+-- =========================
+-- cards full-text index (trigram: 日本語の部分一致に対応)
+-- =========================
+CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts USING fts5(
+  contents,
+  content='cards',
+  content_rowid='card_id',
+  tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_cards_fts_insert
+AFTER INSERT ON cards
+BEGIN
+  INSERT INTO cards_fts(rowid, contents) VALUES (new.card_id, new.contents);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cards_fts_delete
+AFTER DELETE ON cards
+BEGIN
+  INSERT INTO cards_fts(cards_fts, rowid, contents) VALUES ('delete', old.card_id, old.contents);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cards_fts_update
+AFTER UPDATE OF contents ON cards
+BEGIN
+  INSERT INTO cards_fts(cards_fts, rowid, contents) VALUES ('delete', old.card_id, old.contents);
+  INSERT INTO cards_fts(rowid, contents) VALUES (new.card_id, new.contents);
+END;
+
+-- =========================
+-- link kinds
+-- =========================
+CREATE TABLE IF NOT EXISTS link_kinds (
+  link_kind_id      INTEGER PRIMARY KEY,
+  link_kind_name    TEXT NOT NULL UNIQUE
+  -- supports/contradicts/refines/derived_from/example_of/depends_on
+);
+
+-- =========================
+-- card links (directed edges)
+-- =========================
+CREATE TABLE IF NOT EXISTS card_links (
+  link_id           INTEGER PRIMARY KEY,
+  link_kind_id      INTEGER NOT NULL,
+
+  from_card_id      INTEGER NOT NULL,
+  to_card_id        INTEGER NOT NULL,
+
+  confidence        REAL, -- 0.0-1.0想定
+
+  created_at        TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  updated_at        TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+
+  FOREIGN KEY (link_kind_id) REFERENCES link_kinds(link_kind_id),
+  FOREIGN KEY (from_card_id) REFERENCES cards(card_id) ON DELETE CASCADE,
+  FOREIGN KEY (to_card_id) REFERENCES cards(card_id) ON DELETE CASCADE,
+
+  CHECK (from_card_id <> to_card_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_card_links_from
+  ON card_links(from_card_id);
+
+-- 詳細画面の関連一覧（confidence順キーセットページング）用
+CREATE INDEX IF NOT EXISTS idx_card_links_from_confidence
+  ON card_links(from_card_id, COALESCE(confidence, -1.0));
+
+CREATE INDEX IF NOT EXISTS idx_card_links_to
+  ON card_links(to_card_id);
+
+-- 詳細画面の関連一覧（incoming、confidence順キーセットページング）用
+CREATE INDEX IF NOT EXISTS idx_card_links_to_confidence
+  ON card_links(to_card_id, COALESCE(confidence, -1.0));
+
+-- 候補一覧でペアごとの最新リンク（種類・確信度）を引く用（索引だけで完結する）
+CREATE INDEX IF NOT EXISTS idx_card_links_from_to_updated
+  ON card_links(from_card_id, to_card_id, updated_at, link_kind_id, confidence);
+
+CREATE INDEX IF NOT EXISTS idx_card_links_kind
+  ON card_links(link_kind_id);
+
+-- ある種の重複リンクを防ぎたいなら（任意）
+CREATE UNIQUE INDEX IF NOT EXISTS uq_card_links_kind_from_to
+  ON card_links(link_kind_id, from_card_id, to_card_id);
+
+-- =========================
+-- card_link_counts（カード・向き・種類ごとのリンク数。card_links のトリガーで同じトランザクション内に維持し、関連一覧の counts_by_kind に使う）
+-- =========================
+CREATE TABLE IF NOT EXISTS card_link_counts (
+  card_id           INTEGER NOT NULL,
+  direction         TEXT NOT NULL
+      CHECK (direction IN ('outgoing', 'incoming')),   -- outgoing: card_id が from 側 / incoming: to 側
+  link_kind_id      INTEGER NOT NULL,
+  link_count        INTEGER NOT NULL,
+  PRIMARY KEY (card_id, direction, link_kind_id)
+) WITHOUT ROWID;
+
+-- カード削除の連鎖削除でも発火する。0 件になった行は消す
+CREATE TRIGGER IF NOT EXISTS trg_card_links_counts_insert
+AFTER INSERT ON card_links
+BEGIN
+  INSERT INTO card_link_counts (card_id, direction, link_kind_id, link_count)
+  VALUES (NEW.from_card_id, 'outgoing', NEW.link_kind_id, 1)
+  ON CONFLICT (card_id, direction, link_kind_id) DO UPDATE SET link_count = link_count + 1;
+  INSERT INTO card_link_counts (card_id, direction, link_kind_id, link_count)
+  VALUES (NEW.to_card_id, 'incoming', NEW.link_kind_id, 1)
+  ON CONFLICT (card_id, direction, link_kind_id) DO UPDATE SET link_count = link_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_card_links_counts_delete
+AFTER DELETE ON card_links
+BEGIN
+  UPDATE card_link_counts SET link_count = link_count - 1
+  WHERE card_id = OLD.from_card_id AND direction = 'outgoing' AND link_kind_id = OLD.link_kind_id;
+  UPDATE card_link_counts SET link_count = link_count - 1
+  WHERE card_id = OLD.to_card_id AND direction = 'incoming' AND link_kind_id = OLD.link_kind_id;
+  DELETE FROM card_link_counts
+  WHERE card_id IN (OLD.from_card_id, OLD.to_card_id) AND link_kind_id = OLD.link_kind_id AND link_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_card_links_counts_update
+AFTER UPDATE OF link_kind_id, from_card_id, to_card_id ON card_links
+BEGIN
+  UPDATE card_link_counts SET link_count = link_count - 1
+  WHERE card_id = OLD.from_card_id AND direction = 'outgoing' AND link_kind_id = OLD.link_kind_id;
+  UPDATE card_link_counts SET link_count = link_count - 1
+  WHERE card_id = OLD.to_card_id AND direction = 'incoming' AND link_kind_id = OLD.link_kind_id;
+  DELETE FROM card_link_counts
+  WHERE card_id IN (OLD.from_card_id, OLD.to_card_id) AND link_kind_id = OLD.link_kind_id AND link_count <= 0;
+  INSERT INTO card_link_counts (card_id, direction, link_kind_id, link_count)
+  VALUES (NEW.from_card_id, 'outgoing', NEW.link_kind_id, 1)
+  ON CONFLICT (card_id, direction, link_kind_id) DO UPDATE SET link_count = link_count + 1;
+  INSERT INTO card_link_counts (card_id, direction, link_kind_id, link_count)
+  VALUES (NEW.to_card_id, 'incoming', NEW.link_kind_id, 1)
+  ON CONFLICT (card_id, direction, link_kind_id) DO UPDATE SET link_count = link_count + 1;
+END;
+
+-- =========================
+-- link_suggestions (pool)
+-- =========================
+CREATE TABLE IF NOT EXISTS link_suggestions (
+  suggestion_id      INTEGER PRIMARY KEY,
+
+  -- 片方向運用：ペアは1組だけ保持する前提
+  -- 生成時に from_card_id < to_card_id に正規化して入れるのがおすすめ
+  from_card_id       INTEGER NOT NULL,
+  to_card_id         INTEGER NOT NULL,
+
+  -- LLM提案結果（未処理ならNULL）
+  suggested_link_kind_id   INTEGER,   -- link_kinds.link_kind_id
+  suggested_confidence     REAL,      -- 0.0-1.0想定
+
+  -- 生成時のローカル類似度（文字 n-gram TF-IDF のコサイン類似度、0.0-1.0）
+  similarity        REAL,
+
+  -- 状態管理
+  status            TEXT NOT NULL DEFAULT 'queued'
+                    CHECK (status IN (
+                      'queued',       -- 未処理
+                      'processing',   -- 処理中
+                      'success',      -- 提案取得済
+                      'failed',       -- 取得失敗
+                      'approved',     -- 承認してcard_linksへ反映済
+                      'rejected'      -- 却下
+                    )),
+
+  -- 監査用
+  created_at        TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  updated_at        TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+
+  -- 1週間後に掃除したいならこれを使う（NULLなら対象外）
+  expires_at        TEXT,
+
+  FOREIGN KEY (from_card_id) REFERENCES cards(card_id) ON DELETE CASCADE,
+  FOREIGN KEY (to_card_id)   REFERENCES cards(card_id) ON DELETE CASCADE,
+  FOREIGN KEY (suggested_link_kind_id) REFERENCES link_kinds(link_kind_id),
+
+  CHECK (from_card_id <> to_card_id)
+);
+
+-- 重複ペアはスキップ（検討済扱い）
+CREATE UNIQUE INDEX IF NOT EXISTS uq_link_suggestions_pair
+  ON link_suggestions(from_card_id, to_card_id);
+
+-- ステータス別に拾いやすく
+CREATE INDEX IF NOT EXISTS idx_link_suggestions_status
+  ON link_suggestions(status);
+
+-- キュー処理で使う
+CREATE INDEX IF NOT EXISTS idx_link_suggestions_queue
+  ON link_suggestions(status, updated_at);
+
+-- 提案内容でフィルタしたい時用
+CREATE INDEX IF NOT EXISTS idx_link_suggestions_kind_conf
+  ON link_suggestions(suggested_link_kind_id, suggested_confidence);
+
+-- 一覧のキーセットページング用
+CREATE INDEX IF NOT EXISTS idx_link_suggestions_updated_at
+  ON link_suggestions(updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_link_suggestions_created_at
+  ON link_suggestions(created_at);
+
+CREATE INDEX IF NOT EXISTS idx_link_suggestions_confidence
+  ON link_suggestions(COALESCE(suggested_confidence, -1.0));
+
+-- 期限切れ掃除用
+CREATE INDEX IF NOT EXISTS idx_link_suggestions_expires_at
+  ON link_suggestions(expires_at);
+
+-- =========================
+-- llm_jobs
+-- =========================
+
+CREATE TABLE IF NOT EXISTS llm_jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+
+    -- ジョブ種別（処理内容）
+    job_type TEXT NOT NULL
+        CHECK (job_type IN ('card_role', 'link_suggestion')),
+
+    -- 対象データ
+    target_table TEXT NOT NULL
+        CHECK (target_table IN ('cards', 'link_suggestions')),
+    target_id INTEGER NOT NULL,
+
+    -- 状態管理
+    status TEXT NOT NULL
+        CHECK (status IN ('queued', 'processing', 'success', 'failed'))
+        DEFAULT 'queued',
+
+    -- ロック・進捗
+    locked_at TEXT,          -- processing にした時刻
+    lock_owner TEXT,         -- worker識別子（任意）
+    started_at TEXT,         -- 実処理開始
+    finished_at TEXT,        -- 成功 or 失敗確定
+
+    -- エラー情報（failed時のみ）
+    error TEXT,
+
+    -- リース切れで queued に戻した回数（CONVERSATION_LLM_MAX_ATTEMPTS に達したら failed）
+    attempts INTEGER NOT NULL DEFAULT 0,
+
+    -- メタ情報（将来用・任意）
+    result_json TEXT,        -- モデル名、推論時間など入れたくなったら
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+
+    -- 1週間後に掃除したいならこれを使う（NULLなら対象外）
+    expires_at        TEXT
+);
+
+-- 同一対象への二重投入を防ぐ（必要なら）
+CREATE UNIQUE INDEX IF NOT EXISTS idx_llm_jobs_unique_target
+ON llm_jobs (job_type, target_table, target_id);
+
+-- キュー取得高速化
+CREATE INDEX IF NOT EXISTS idx_llm_jobs_queue
+ON llm_jobs (status, created_at);
+
+-- processing 回収用
+CREATE INDEX IF NOT EXISTS idx_llm_jobs_processing
+ON llm_jobs (status, locked_at);
+
+-- 期限切れ掃除用
+CREATE INDEX IF NOT EXISTS idx_llm_jobs_expires_at
+  ON llm_jobs(expires_at);
+
+-- =========================
+-- table_versions（一覧件数キャッシュの無効化用。書き込みのたびに version を進める）
+-- =========================
+CREATE TABLE IF NOT EXISTS table_versions (
+  table_name        TEXT PRIMARY KEY,
+  version           INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO table_versions (table_name, version) VALUES ('cards', 0);
+INSERT OR IGNORE INTO table_versions (table_name, version) VALUES ('link_suggestions', 0);
+INSERT OR IGNORE INTO table_versions (table_name, version) VALUES ('card_roles', 0);
+INSERT OR IGNORE INTO table_versions (table_name, version) VALUES ('link_kinds', 0);
+INSERT OR IGNORE INTO table_versions (table_name, version) VALUES ('meaningless_phrases', 0);
+
+CREATE TRIGGER IF NOT EXISTS trg_cards_version_insert
+AFTER INSERT ON cards
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'cards';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cards_version_update
+AFTER UPDATE ON cards
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'cards';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cards_version_delete
+AFTER DELETE ON cards
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'cards';
+END;
+
+-- role_major_id での絞り込み結果は card_roles の大分類付け替えでも変わる
+CREATE TRIGGER IF NOT EXISTS trg_card_roles_version_update
+AFTER UPDATE OF card_role_major_item_id ON card_roles
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'cards';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_link_suggestions_version_insert
+AFTER INSERT ON link_suggestions
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'link_suggestions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_link_suggestions_version_update
+AFTER UPDATE ON link_suggestions
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'link_suggestions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_link_suggestions_version_delete
+AFTER DELETE ON link_suggestions
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'link_suggestions';
+END;
+
+-- =========================
+-- llm_result_cache（正規化した本文ごとの LLM 回答。件数上限の 1 割を超えて増えたら last_used_at, rowid の古い順に上限までまとめて削除）
+-- =========================
+CREATE TABLE IF NOT EXISTS llm_result_cache (
+  cache_key         TEXT PRIMARY KEY,   -- sha256(job_type, モデル名, 許可単語の version, 正規化した本文)
+  job_type          TEXT NOT NULL
+      CHECK (job_type IN ('card_role', 'link_suggestion')),
+  result_id         INTEGER,            -- card_role_id / link_kind_id（none は NULL）
+  confidence        REAL NOT NULL,
+  hits              INTEGER NOT NULL DEFAULT 0,
+  created_at        TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  last_used_at      TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP)
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_result_cache_last_used_at
+  ON llm_result_cache(last_used_at);
+
+-- =========================
+-- import_files（app.bulk_import で登録済みのファイル。カードと同じトランザクションで記録し、再実行時はスキップする）
+-- =========================
+CREATE TABLE IF NOT EXISTS import_files (
+  thread_id         TEXT PRIMARY KEY,   -- 取り込み元ディレクトリからの相対パスの uuid5
+  source_path       TEXT NOT NULL,
+  size_bytes        INTEGER NOT NULL,
+  card_count        INTEGER NOT NULL,
+  imported_at       TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP)
+);
+
+-- 許可単語一覧（card_roles / link_kinds）が変わったら version を進め、該当するキャッシュを捨てる
+CREATE TRIGGER IF NOT EXISTS trg_card_roles_terms_insert
+AFTER INSERT ON card_roles
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'card_roles';
+  DELETE FROM llm_result_cache WHERE job_type = 'card_role';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_card_roles_terms_update
+AFTER UPDATE OF minor_name ON card_roles
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'card_roles';
+  DELETE FROM llm_result_cache WHERE job_type = 'card_role';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_card_roles_terms_delete
+AFTER DELETE ON card_roles
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'card_roles';
+  DELETE FROM llm_result_cache WHERE job_type = 'card_role';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_link_kinds_terms_insert
+AFTER INSERT ON link_kinds
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'link_kinds';
+  DELETE FROM llm_result_cache WHERE job_type = 'link_suggestion';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_link_kinds_terms_update
+AFTER UPDATE OF link_kind_name ON link_kinds
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'link_kinds';
+  DELETE FROM llm_result_cache WHERE job_type = 'link_suggestion';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_link_kinds_terms_delete
+AFTER DELETE ON link_kinds
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'link_kinds';
+  DELETE FROM llm_result_cache WHERE job_type = 'link_suggestion';
+END;
+
+-- meaningless_phrases が変わったら version を進め、インポート時の定型句インデックスを作り直させる
+CREATE TRIGGER IF NOT EXISTS trg_meaningless_phrases_version_insert
+AFTER INSERT ON meaningless_phrases
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'meaningless_phrases';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_meaningless_phrases_version_update
+AFTER UPDATE ON meaningless_phrases
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'meaningless_phrases';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_meaningless_phrases_version_delete
+AFTER DELETE ON meaningless_phrases
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'meaningless_phrases';
+END;
\ No newline at end of file
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TaskProgress:
+    """Status and counters of one background task, safe to read while it runs."""
+
+    def __init__(self, kind: str, **fields: Any) -> None:
+        self.task_id = uuid.uuid4().hex
+        self.kind = kind
+        self._lock = threading.Lock()
+        self._state: dict[str, Any] = {
+            "status": "running",
+            "started_at": time.time(),
+            "finished_at": None,
+            "error": None,
+            **fields,
+        }
+
+    def update(self, **fields: Any) -> None:
+        with self._lock:
+            self._state.update(fields)
+
+    def increment(self, **fields: int) -> None:
+        with self._lock:
+            for key, value in fields.items():
+                self._state[key] = self._state.get(key, 0) + value
+
+    @property
+    def finished(self) -> bool:
+        with self._lock:
+            return self._state["status"] != "running"
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {"task_id": self.task_id, "kind": self.kind, **self._state}
+
+
+class BackgroundTasks:
+    """Runs long API requests on a small thread pool and keeps their progress.
+
+    Finished tasks are kept for polling until `keep` newer ones have finished.
+    Progress lives in this process only and is lost on restart.
+    """
+
+    def __init__(self, max_workers: int, keep: int) -> None:
+        self.max_workers = max(1, max_workers)
+        self.keep = max(1, keep)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: OrderedDict[str, TaskProgress] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[[TaskProgress], dict[str, Any]], **fields: Any) -> TaskProgress:
+        """Run `fn(progress)` in the background; its return value is merged into the final state."""
+        progress = TaskProgress(kind, **fields)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="api-task")
+            self._tasks[progress.task_id] = progress
+            self._prune()
+            executor = self._executor
+        executor.submit(self._run, fn, progress)
+        return progress
+
+    def _run(self, fn: Callable[[TaskProgress], dict[str, Any]], progress: TaskProgress) -> None:
+        try:
+            result = fn(progress)
+        except Exception as exc:
+            logger.exception("Background task %s (%s) failed", progress.task_id, progress.kind)
+            progress.update(status="failed", error=str(exc), finished_at=time.time())
+            return
+        progress.update(**(result or {}), status="success", finished_at=time.time())
+
+    def _prune(self) -> None:
+        finished = [task_id for task_id, task in self._tasks.items() if task.finished]
+        for task_id in finished[: max(0, len(finished) - self.keep)]:
+            del self._tasks[task_id]
+
+    def get(self, task_id: str, kind: Optional[str] = None) -> Optional[dict[str, Any]]:
+        with self._lock:
+            task = self._tasks.get(task_id)
+        if task is None or (kind is not None and task.kind != kind):
+            return None
+        return task.snapshot()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
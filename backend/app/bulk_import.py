@@ -0,0 +1,252 @@
+"""Import a directory of transcripts into the database without going through the API.
+
+Every file becomes one thread. Speaker blocks from all files are split on a
+process pool, and the parent assigns message/text ids and inserts the cards in
+file order, so a run produces the same cards as importing the files one by
+one through import/stream.
+
+Meant for loading history while the API is stopped: the secondary indexes on
+cards are dropped for the load and rebuilt at the end, and each file is
+inserted and recorded in import_files in one transaction. Re-running over the
+same directory skips the files already recorded, so an interrupted load
+resumes at the file it stopped in.
+
+Usage: python -m app.bulk_import DIR [--pattern "*.txt"] [--jobs 4] [--keep-indexes] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from app.db import DB_PATH, get_db, init_db
+from app.importer import (
+    IMPORT_INSERT_BATCH,
+    ImportFormatError,
+    block_parts,
+    insert_import_parts,
+    iter_import_blocks,
+    iter_split_blocks_parallel,
+    iter_upload_lines,
+    load_speaker_map,
+    split_block_text,
+)
+
+# Fixed namespace so re-running over the same tree yields the same thread ids.
+THREAD_NAMESPACE = uuid.UUID("5f0c2a57-6a8e-4c1e-9a8b-2f7f1b6e4d31")
+
+
+def thread_id_for(root: Path, path: Path) -> str:
+    return str(uuid.uuid5(THREAD_NAMESPACE, path.relative_to(root).as_posix()))
+
+
+def iter_file_blocks(
+    paths: Iterable[Path], speaker_map: dict[str, dict], failures: dict[Path, str]
+) -> Iterator[tuple[Path, dict, str]]:
+    """(path, speaker, text) for every block of every file; unreadable files land in `failures`.
+
+    Blocks a file yielded before its error still come through; the caller
+    rolls that file back once the stream has moved past it.
+    """
+    for path in paths:
+        try:
+            with open(path, "rb") as upload:
+                for speaker, text in iter_import_blocks(iter_upload_lines(upload), speaker_map):
+                    yield path, speaker, text
+        except (ImportFormatError, UnicodeDecodeError) as exc:
+            failures[path] = str(exc)
+
+
+def cards_secondary_indexes(conn: sqlite3.Connection) -> list[tuple[str, str]]:
+    """(name, CREATE statement) of the non-unique indexes on cards; unique ones enforce constraints and stay."""
+    rows = conn.execute(
+        """
+        SELECT name, sql
+        FROM sqlite_master
+        WHERE type = 'index'
+          AND tbl_name = 'cards'
+          AND sql IS NOT NULL
+          AND sql NOT LIKE 'CREATE UNIQUE%'
+        ORDER BY name;
+        """
+    ).fetchall()
+    return [(row["name"], row["sql"]) for row in rows]
+
+
+def drop_indexes(conn: sqlite3.Connection, indexes: list[tuple[str, str]]) -> None:
+    for name, _ in indexes:
+        conn.execute(f"DROP INDEX IF EXISTS {name};")
+    conn.commit()
+
+
+def rebuild_indexes(conn: sqlite3.Connection, indexes: list[tuple[str, str]]) -> None:
+    # init_db runs the schema with CREATE INDEX IF NOT EXISTS, so an API start
+    # also restores them if this process is killed before getting here.
+    for _, sql in indexes:
+        conn.execute(sql.replace("CREATE INDEX", "CREATE INDEX IF NOT EXISTS", 1))
+    conn.execute("ANALYZE cards;")
+    conn.commit()
+
+
+class FileImport:
+    """Cards of one file, inserted in IMPORT_INSERT_BATCH sized statements inside one transaction."""
+
+    def __init__(self, conn: Optional[sqlite3.Connection], root: Path, path: Path) -> None:
+        self.conn = conn
+        self.path = path
+        self.source_path = path.relative_to(root).as_posix()
+        self.thread_id = thread_id_for(root, path)
+        self.message_id = 0
+        self.cards = 0
+        self.batch: list[dict] = []
+        self.started = time.perf_counter()
+        if conn is not None:
+            conn.execute("BEGIN IMMEDIATE;")
+
+    def add(self, speaker: dict, segments: list[str]) -> None:
+        self.message_id += 1
+        self.batch.extend(block_parts(self.message_id, speaker, segments))
+        if len(self.batch) >= IMPORT_INSERT_BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.conn is not None and self.batch:
+            insert_import_parts(self.conn, self.thread_id, self.batch)
+        self.cards += len(self.batch)
+        self.batch = []
+
+    def finish(self, error: Optional[str]) -> None:
+        if error is None:
+            self.flush()
+        if self.conn is None:
+            return
+        if error is not None:
+            self.conn.rollback()
+            return
+        self.conn.execute(
+            """
+            INSERT INTO import_files (thread_id, source_path, size_bytes, card_count)
+            VALUES (:thread_id, :source_path, :size_bytes, :card_count);
+            """,
+            {
+                "thread_id": self.thread_id,
+                "source_path": self.source_path,
+                "size_bytes": self.path.stat().st_size,
+                "card_count": self.cards,
+            },
+        )
+        self.conn.commit()
+
+
+def rate(count: float, seconds: float) -> float:
+    return count / seconds if seconds else 0.0
+
+
+def run_import(root: Path, pattern: str, jobs: int, keep_indexes: bool, dry_run: bool) -> None:
+    paths = sorted(path for path in root.rglob(pattern) if path.is_file())
+    init_db()
+    conn = get_db()
+    speaker_map = load_speaker_map(conn)
+    done = {row[0] for row in conn.execute("SELECT thread_id FROM import_files;").fetchall()}
+    pending = [path for path in paths if thread_id_for(root, path) not in done]
+    indexes = [] if keep_indexes or dry_run or not pending else cards_secondary_indexes(conn)
+    if dry_run:
+        conn.close()
+        conn = None
+
+    print(
+        f"{len(pending)} of {len(paths)} files under {root} to import "
+        f"({len(paths) - len(pending)} already imported) -> {'(dry run)' if dry_run else DB_PATH}, jobs={jobs}"
+    )
+    failures: dict[Path, str] = {}
+    blocks = iter_file_blocks(pending, speaker_map, failures)
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 and pending else None
+    if executor is not None:
+        split = iter_split_blocks_parallel(blocks, executor, max_pending=jobs * 2)
+    else:
+        split = ((path, speaker, split_block_text(text)) for path, speaker, text in blocks)
+
+    started = time.perf_counter()
+    imported = 0
+    rows = 0
+    file_import: Optional[FileImport] = None
+
+    def finish_file() -> None:
+        nonlocal imported, rows
+        error = failures.get(file_import.path)
+        file_import.finish(error)
+        if error is None:
+            imported += 1
+            rows += file_import.cards
+            elapsed = time.perf_counter() - file_import.started
+            print(
+                f"  {file_import.source_path}: {file_import.cards} rows in {elapsed:.2f}s "
+                f"({rate(file_import.cards, elapsed):.0f} rows/s)"
+            )
+
+    rebuild_seconds = 0.0
+    try:
+        if indexes:
+            drop_indexes(conn, indexes)
+            print(f"dropped {len(indexes)} secondary indexes on cards")
+        for path, speaker, segments in split:
+            if file_import is None or path != file_import.path:
+                if file_import is not None:
+                    finish_file()
+                file_import = FileImport(conn, root, path)
+            file_import.add(speaker, segments)
+        if file_import is not None:
+            finish_file()
+        load_seconds = time.perf_counter() - started
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if conn is not None:
+            if conn.in_transaction:
+                conn.rollback()
+            if indexes:
+                rebuild_started = time.perf_counter()
+                rebuild_indexes(conn, indexes)
+                rebuild_seconds = time.perf_counter() - rebuild_started
+                print(f"rebuilt {len(indexes)} indexes in {rebuild_seconds:.2f}s")
+            conn.close()
+
+    total_seconds = load_seconds + rebuild_seconds
+    megabytes = sum(path.stat().st_size for path in pending) / 1e6
+    for path, error in failures.items():
+        print(f"  failed {path.relative_to(root)}: {error}")
+    print(
+        f"imported {imported}/{len(pending)} files, {rows} rows, {megabytes:.1f} MB: "
+        f"load {load_seconds:.2f}s ({rate(rows, load_seconds):.0f} rows/s, {rate(megabytes, load_seconds):.2f} MB/s), "
+        f"total {total_seconds:.2f}s ({rate(rows, total_seconds):.0f} rows/s)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import a directory of transcripts, one thread per file.")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--pattern", default="*.txt", help="glob matched recursively under DIRECTORY")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="splitting processes (1 = in process)")
+    parser.add_argument(
+        "--keep-indexes",
+        action="store_true",
+        help="leave the cards indexes in place (when the API is serving while loading)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="split only; measure without writing")
+    args = parser.parse_args()
+    run_import(args.directory.resolve(), args.pattern, args.jobs, args.keep_indexes, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,60 +1,652 @@
-from __future__ import annotations
-
-import logging
-import os
-import sqlite3
-from contextlib import contextmanager
-from pathlib import Path
-from typing import Iterator
-
-BASE_DIR = Path(__file__).resolve().parent.parent
-REPO_ROOT = BASE_DIR.parent
-DB_PATH = BASE_DIR / "app.db"
-SCHEMA_PATH = REPO_ROOT / "SQL_DDL_v1.0.sql"
-SQL_LOGGER = logging.getLogger("app.sql")
-
-
-def resolve_schema_path() -> Path:
-    env_path = os.environ.get("CONVERSATION_SCHEMA_PATH")
-    candidates = [
-        Path(env_path) if env_path else None,
-        SCHEMA_PATH,
-        BASE_DIR / "SQL_DDL_v1.0.sql",
-        Path.cwd() / "SQL_DDL_v1.0.sql",
-    ]
-    for candidate in candidates:
-        if candidate and candidate.exists():
-            return candidate
-    checked = ", ".join(str(path) for path in candidates if path)
-    raise FileNotFoundError(f"Schema file not found. Checked: {checked}")
-
-
-def get_db() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
-    if SQL_LOGGER.hasHandlers():
-        conn.set_trace_callback(lambda stmt: SQL_LOGGER.info("SQL start: %s", stmt))
-    return conn
-
-
-def init_db() -> None:
-    if not SCHEMA_PATH.exists():
-        raise FileNotFoundError(f"Schema file not found: {SCHEMA_PATH}")
-    conn = get_db()
-    try:
-        schema_sql = SCHEMA_PATH.read_text(encoding="utf-8")
-        conn.executescript(schema_sql)
-        conn.commit()
-    finally:
-        conn.close()
-
-
-@contextmanager
-def db_session() -> Iterator[sqlite3.Connection]:
-    conn = get_db()
-    try:
-        yield conn
-        conn.commit()
-    finally:
-        conn.close()
\ No newline at end of file
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = BASE_DIR.parent
+DB_PATH = Path(os.environ.get("CONVERSATION_DB_PATH") or BASE_DIR / "app.db")
+SCHEMA_PATH = REPO_ROOT / "SQL_DDL_v1.0.sql"
+SQL_LOGGER = logging.getLogger("app.sql")
+
+DB_POOL_SIZE = int(os.environ.get("CONVERSATION_DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.environ.get("CONVERSATION_DB_POOL_TIMEOUT", "30"))
+DB_STORAGE_PROFILE = os.environ.get("CONVERSATION_DB_PROFILE", "wal")
+DB_CHECKPOINT_INTERVAL = float(os.environ.get("CONVERSATION_DB_CHECKPOINT_INTERVAL", "300"))
+COUNT_CACHE_SIZE = int(os.environ.get("CONVERSATION_COUNT_CACHE_SIZE", "256"))
+# Reader threads for API handlers; the remaining pool connections are left for
+# background tasks and the WAL checkpointer. The writer has its own connection.
+DB_READ_WORKERS = int(os.environ.get("CONVERSATION_DB_READ_WORKERS", str(max(1, DB_POOL_SIZE - 2))))
+DB_LANES_ENABLED = os.environ.get("CONVERSATION_DB_LANES", "1") != "0"
+DB_WRITE_WINDOW = float(os.environ.get("CONVERSATION_DB_WRITE_WINDOW_MS", "2")) / 1000
+DB_WRITE_BATCH = int(os.environ.get("CONVERSATION_DB_WRITE_BATCH", "64"))
+
+T = TypeVar("T")
+
+# journal_mode is persistent in the database file and is applied once by init_db();
+# the remaining PRAGMAs are per-connection and are applied by get_db().
+STORAGE_PROFILES: dict[str, dict[str, str]] = {
+    "default": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": "5000",
+    },
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": "-65536",
+        "mmap_size": "268435456",
+        "temp_store": "MEMORY",
+        "busy_timeout": "5000",
+    },
+}
+
+
+def resolve_schema_path() -> Path:
+    env_path = os.environ.get("CONVERSATION_SCHEMA_PATH")
+    candidates = [
+        Path(env_path) if env_path else None,
+        SCHEMA_PATH,
+        BASE_DIR / "SQL_DDL_v1.0.sql",
+        Path.cwd() / "SQL_DDL_v1.0.sql",
+    ]
+    for candidate in candidates:
+        if candidate and candidate.exists():
+            return candidate
+    checked = ", ".join(str(path) for path in candidates if path)
+    raise FileNotFoundError(f"Schema file not found. Checked: {checked}")
+
+
+def resolve_storage_profile() -> dict[str, str]:
+    if DB_STORAGE_PROFILE not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile: {DB_STORAGE_PROFILE}")
+    profile = dict(STORAGE_PROFILES[DB_STORAGE_PROFILE])
+    for pragma in ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout"):
+        override = os.environ.get(f"CONVERSATION_DB_{pragma.upper()}")
+        if override:
+            profile[pragma] = override
+    return profile
+
+
+def get_db() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON;")
+    for pragma, value in resolve_storage_profile().items():
+        if pragma != "journal_mode":
+            conn.execute(f"PRAGMA {pragma} = {value};")
+    if SQL_LOGGER.hasHandlers():
+        conn.set_trace_callback(lambda stmt: SQL_LOGGER.info("SQL start: %s", stmt))
+    return conn
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived connections configured once by get_db()."""
+
+    def __init__(self, size: int, timeout: float) -> None:
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._acquired = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._replaced = 0
+
+    def _reserve_slot(self) -> bool:
+        with self._lock:
+            if self._created >= self.size:
+                return False
+            self._created += 1
+            return True
+
+    def _open(self) -> sqlite3.Connection:
+        try:
+            return get_db()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1;").fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def acquire(self) -> sqlite3.Connection:
+        started = time.perf_counter()
+        waited = False
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve_slot():
+                    conn = self._open()
+                else:
+                    waited = True
+                    remaining = self.timeout - (time.perf_counter() - started)
+                    try:
+                        conn = self._idle.get(timeout=max(remaining, 0))
+                    except queue.Empty:
+                        raise PoolTimeout(
+                            f"No database connection available within {self.timeout}s"
+                        ) from None
+            if self._is_healthy(conn):
+                break
+            self._discard(conn)
+            with self._lock:
+                self._replaced += 1
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._acquired += 1
+            if waited:
+                self._waits += 1
+                self._wait_total += elapsed
+                self._wait_max = max(self._wait_max, elapsed)
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                "size": self.size,
+                "open": self._created,
+                "idle": idle,
+                "in_use": self._created - idle,
+                "acquired": self._acquired,
+                "waits": self._waits,
+                "wait_ms_total": round(self._wait_total * 1000, 3),
+                "wait_ms_avg": round(self._wait_total * 1000 / self._waits, 3) if self._waits else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 3),
+                "replaced": self._replaced,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_POOL_SIZE, DB_POOL_TIMEOUT)
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def db_pool_stats() -> dict[str, Any]:
+    return get_pool().stats()
+
+
+# Columns added after the first release: (table, column, declaration).
+ADDED_COLUMNS = [
+    ("link_suggestions", "similarity", "REAL"),
+    ("llm_jobs", "attempts", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+
+def _add_missing_columns(conn: sqlite3.Connection) -> None:
+    for table_name, column, declaration in ADDED_COLUMNS:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table_name});")}
+        if columns and column not in columns:
+            conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {column} {declaration};")
+
+
+def init_db() -> None:
+    if not SCHEMA_PATH.exists():
+        raise FileNotFoundError(f"Schema file not found: {SCHEMA_PATH}")
+    conn = get_db()
+    try:
+        journal_mode = resolve_storage_profile().get("journal_mode")
+        if journal_mode:
+            conn.execute(f"PRAGMA journal_mode = {journal_mode};")
+        has_fts = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cards_fts';"
+        ).fetchone()
+        has_link_counts = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'card_link_counts';"
+        ).fetchone()
+        _add_missing_columns(conn)
+        schema_sql = SCHEMA_PATH.read_text(encoding="utf-8")
+        conn.executescript(schema_sql)
+        if not has_fts:
+            # Existing databases get the full-text index populated once.
+            conn.execute("INSERT INTO cards_fts(cards_fts) VALUES ('rebuild');")
+        if not has_link_counts:
+            # Triggers keep the summary current from here on; count existing links once.
+            conn.execute(
+                """
+                INSERT INTO card_link_counts (card_id, direction, link_kind_id, link_count)
+                SELECT from_card_id, 'outgoing', link_kind_id, COUNT(1)
+                FROM card_links
+                GROUP BY from_card_id, link_kind_id
+                UNION ALL
+                SELECT to_card_id, 'incoming', link_kind_id, COUNT(1)
+                FROM card_links
+                GROUP BY to_card_id, link_kind_id;
+                """
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def checkpoint_wal(mode: str = "PASSIVE") -> Optional[dict[str, int]]:
+    with db_session() as conn:
+        if conn.execute("PRAGMA journal_mode;").fetchone()[0].lower() != "wal":
+            return None
+        busy, log_frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
+    return {"busy": busy, "log_frames": log_frames, "checkpointed": checkpointed}
+
+
+class WalCheckpointer:
+    """Background thread that checkpoints the WAL every `interval` seconds."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="wal-checkpointer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                result = checkpoint_wal()
+            except sqlite3.Error:
+                SQL_LOGGER.exception("WAL checkpoint failed")
+                continue
+            if result is not None:
+                SQL_LOGGER.info("WAL checkpoint %s", result)
+
+
+_writer_local = threading.local()
+
+
+@contextmanager
+def db_session() -> Iterator[sqlite3.Connection]:
+    writer_conn = getattr(_writer_local, "conn", None)
+    if writer_conn is not None:
+        # Work queued on the writer shares its connection; the writer commits the group.
+        yield writer_conn
+        return
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        pool.release(conn)
+
+
+class DbLane:
+    """Bounded thread pool that runs blocking database work for the event loop."""
+
+    def __init__(self, name: str, workers: int) -> None:
+        self.name = name
+        self.workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"db-{self.name}")
+            self._queued += 1
+            return self._executor
+
+    def _call(self, submitted: float, fn: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._wait_total += started - submitted
+            self._wait_max = max(self._wait_max, started - submitted)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+                self._run_total += time.perf_counter() - started
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self._call, time.perf_counter(), fn, args, kwargs)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": self._queued,
+                "active": self._active,
+                "completed": self._completed,
+                "wait_ms_avg": round(self._wait_total * 1000 / self._completed, 3) if self._completed else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 3),
+                "run_ms_avg": round(self._run_total * 1000 / self._completed, 3) if self._completed else 0.0,
+            }
+
+
+class WriteQueue:
+    """Single writer thread that group-commits queued mutations on one connection.
+
+    Work that arrives within `window` seconds of the first queued item (up to
+    `max_batch` items) runs in one BEGIN IMMEDIATE transaction, each item inside
+    its own savepoint so a failing item is rolled back alone. Callers are
+    answered only after the shared COMMIT. db_session() on the writer thread
+    yields the writer connection, so handlers run unchanged.
+
+    Every write of the API, its background tasks and the LLM worker comes
+    through here; long reads (e.g. ranking link candidates) run elsewhere and
+    queue only their inserts. The offline app.bulk_import is the one writer
+    with its own connection.
+    """
+
+    def __init__(self, window: float, max_batch: int) -> None:
+        self.window = max(0.0, window)
+        self.max_batch = max(1, max_batch)
+        self._queue: queue.Queue[Optional[tuple[Future, float, Callable[..., Any], tuple, dict]]] = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._failed = 0
+        self._batches = 0
+        self._batch_max = 0
+        self._wait_total = 0.0
+        self._commits = 0
+        self._commit_total = 0.0
+        self._commit_max = 0.0
+        self._recent_commits: deque[float] = deque(maxlen=1000)
+
+    def _submit(self, fn: Callable[..., T], args: tuple, kwargs: dict) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((future, time.perf_counter(), fn, args, kwargs))
+        return future
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run `fn` on the writer and block until its group has committed."""
+        if getattr(_writer_local, "conn", None) is not None:
+            return fn(*args, **kwargs)
+        return self._submit(fn, args, kwargs).result()
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.wrap_future(self._submit(fn, args, kwargs))
+
+    def _collect(self, first: tuple) -> tuple[list[tuple], bool]:
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        conn = get_db()
+        _writer_local.conn = conn
+        stopping = False
+        try:
+            while not stopping:
+                first = self._queue.get()
+                if first is None:
+                    break
+                batch, stopping = self._collect(first)
+                self._write_batch(conn, batch)
+        finally:
+            _writer_local.conn = None
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: list[tuple]) -> None:
+        started = time.perf_counter()
+        done: list[tuple[Future, Any]] = []
+        failed = 0
+        try:
+            conn.execute("BEGIN IMMEDIATE;")
+        except sqlite3.Error as exc:
+            for future, *_ in batch:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(exc)
+            self._record(batch, started, 0.0, len(batch))
+            return
+        try:
+            for future, submitted, fn, args, kwargs in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT write_item;")
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as exc:
+                    conn.execute("ROLLBACK TO write_item;")
+                    conn.execute("RELEASE write_item;")
+                    future.set_exception(exc)
+                    failed += 1
+                    continue
+                conn.execute("RELEASE write_item;")
+                done.append((future, result))
+            commit_started = time.perf_counter()
+            conn.commit()
+            commit_time = time.perf_counter() - commit_started
+        except BaseException as exc:
+            # The group is lost as a whole, so nobody in it may see success.
+            if conn.in_transaction:
+                conn.rollback()
+            for future, *_ in batch:
+                if not future.done() and (future.running() or future.set_running_or_notify_cancel()):
+                    future.set_exception(exc)
+            self._record(batch, started, 0.0, len(batch))
+            return
+        for future, result in done:
+            future.set_result(result)
+        self._record(batch, started, commit_time, failed)
+
+    def _record(self, batch: list[tuple], started: float, commit_time: float, failed: int) -> None:
+        with self._lock:
+            self._batches += 1
+            self._writes += len(batch)
+            self._failed += failed
+            self._batch_max = max(self._batch_max, len(batch))
+            self._wait_total += sum(started - item[1] for item in batch)
+            if commit_time:
+                self._commits += 1
+                self._commit_total += commit_time
+                self._commit_max = max(self._commit_max, commit_time)
+                self._recent_commits.append(commit_time)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            recent = sorted(self._recent_commits)
+            return {
+                "workers": 1,
+                "queued": self._queue.qsize(),
+                "writes": self._writes,
+                "failed": self._failed,
+                "batches": self._batches,
+                "batch_size_avg": round(self._writes / self._batches, 2) if self._batches else 0.0,
+                "batch_size_max": self._batch_max,
+                "wait_ms_avg": round(self._wait_total * 1000 / self._writes, 3) if self._writes else 0.0,
+                "commit_ms_avg": round(self._commit_total * 1000 / self._commits, 3) if self._commits else 0.0,
+                "commit_ms_p99": round(recent[int(len(recent) * 0.99)] * 1000, 3) if recent else 0.0,
+                "commit_ms_max": round(self._commit_max * 1000, 3),
+            }
+
+
+db_writer = WriteQueue(DB_WRITE_WINDOW, DB_WRITE_BATCH)
+
+
+class DbLanes:
+    """Reader and writer lanes for API handlers.
+
+    Readers run concurrently on WAL snapshots. Writes go to the WriteQueue so
+    API mutations never wait on each other's write lock in SQLite.
+    With `enabled` off, handlers run inline on the event loop.
+    """
+
+    def __init__(self, read_workers: int, writer: WriteQueue, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.lanes: dict[str, Any] = {"read": DbLane("read", read_workers), "write": writer}
+
+    async def run(self, lane: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if not self.enabled:
+            return fn(*args, **kwargs)
+        return await self.lanes[lane].run(fn, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        for lane in self.lanes.values():
+            lane.shutdown()
+
+    def stats(self) -> dict[str, Any]:
+        return {"enabled": self.enabled, **{name: lane.stats() for name, lane in self.lanes.items()}}
+
+
+db_lanes = DbLanes(DB_READ_WORKERS, db_writer, DB_LANES_ENABLED)
+
+
+def db_lane(lane: str) -> Callable[[Callable[..., T]], Callable[..., Any]]:
+    """Turn a blocking handler into a coroutine that runs on the given lane."""
+    if lane not in db_lanes.lanes:
+        raise ValueError(f"Unknown database lane: {lane}")
+
+    def decorator(fn: Callable[..., T]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            return await db_lanes.run(lane, fn, *args, **kwargs)
+
+        # Resolve string annotations against the handler's module, not this one.
+        wrapper.__signature__ = inspect.signature(fn, eval_str=True)
+        return wrapper
+
+    return decorator
+
+
+def fetch_table_version(conn: sqlite3.Connection, table_name: str) -> int:
+    row = conn.execute(
+        "SELECT version FROM table_versions WHERE table_name = :table_name;",
+        {"table_name": table_name},
+    ).fetchone()
+    return row[0] if row else 0
+
+
+class CountCache:
+    """LRU of list totals keyed by filter signature, valid for one table version."""
+
+    def __init__(self, size: int) -> None:
+        self.size = max(1, size)
+        self._entries: OrderedDict[tuple, tuple[int, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple, version: int) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: tuple, version: int, total: int) -> None:
+        with self._lock:
+            self._entries[key] = (version, total)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+count_cache = CountCache(COUNT_CACHE_SIZE)
\ No newline at end of file
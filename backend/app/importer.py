@@ -0,0 +1,343 @@
+"""Splitting transcripts into card parts and inserting them.
+
+Shared by the import endpoints in app.main and the app.bulk_import CLI; kept
+free of FastAPI so pool processes can import it cheaply.
+"""
+from __future__ import annotations
+
+import bisect
+import os
+import re
+import sqlite3
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import BinaryIO, Iterable, Iterator, Optional, TypeVar
+
+from app.taxonomy import meaningless_phrase_cache
+
+K = TypeVar("K")
+
+IMPORT_DELIM_PATTERN = re.compile(r"(。|！　|？　|♪　|[a-z]\. |\)\. |\.\" |! |\? )")
+
+
+def normalize_import_text(raw_text: str) -> str:
+    return raw_text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+class DelimiterIndex:
+    """Next sentence delimiter / double newline at or after a position in one text.
+
+    Lookups start as plain searches. The first one that has to scan more than
+    DIRECT_SEARCH_CHARS (or finds nothing) indexes every match with a single
+    scan of the text, and later lookups bisect into the sorted offsets. Long
+    blocks without boundaries, which used to be rescanned to the end for each
+    segment, stay linear, and ordinary chat text never pays for the index.
+    """
+
+    DIRECT_SEARCH_CHARS = 2048
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._delim_starts: Optional[list[int]] = None
+        self._delim_ends: list[int] = []
+        self._double_newlines: Optional[list[int]] = None
+
+    def first_delim_end(self, start: int) -> Optional[int]:
+        """End of the first delimiter match at or after `start`, as IMPORT_DELIM_PATTERN.search would find."""
+        if self._delim_starts is None:
+            match = IMPORT_DELIM_PATTERN.search(self.text, pos=start)
+            if match is not None and match.start() - start <= self.DIRECT_SEARCH_CHARS:
+                return match.end()
+            self._delim_starts = []
+            for found in IMPORT_DELIM_PATTERN.finditer(self.text):
+                self._delim_starts.append(found.start())
+                self._delim_ends.append(found.end())
+        index = bisect.bisect_left(self._delim_starts, start)
+        if index and self._delim_ends[index - 1] > start:
+            # `start` falls inside a match finditer consumed; a match could begin
+            # in the rest of it, so search directly from there.
+            match = IMPORT_DELIM_PATTERN.search(self.text, pos=start)
+            return match.end() if match else None
+        return self._delim_ends[index] if index < len(self._delim_ends) else None
+
+    def first_double_newline(self, start: int) -> Optional[int]:
+        if self._double_newlines is None:
+            found = self.text.find("\n\n", start)
+            if found != -1 and found - start <= self.DIRECT_SEARCH_CHARS:
+                return found
+            # Overlapping, like repeated str.find: "\n\n\n" has double newlines at i and i + 1.
+            self._double_newlines = []
+            found = self.text.find("\n\n")
+            while found != -1:
+                self._double_newlines.append(found)
+                found = self.text.find("\n\n", found + 1)
+        index = bisect.bisect_left(self._double_newlines, start)
+        return self._double_newlines[index] if index < len(self._double_newlines) else None
+
+
+def split_speaker_text(text: str, *, allow_overlap: bool) -> list[str]:
+    parts: list[str] = []
+    text_len = len(text)
+    index = DelimiterIndex(text)
+    start = 0
+    prev_end = 0
+    while start < text_len:
+        while start < text_len and text[start].isspace():
+            start += 1
+        if start >= text_len:
+            break
+        search_from = max(start, prev_end) if allow_overlap else start
+        min_double_start = start + 300
+        double_search_from = max(search_from, min_double_start)
+        next_double = index.first_double_newline(double_search_from)
+
+        next_delim = None
+        min_delim_start = start + 450
+        if text_len > min_delim_start:
+            delim_search_from = max(search_from, min_delim_start)
+            next_delim = index.first_delim_end(delim_search_from)
+
+        end: Optional[int] = None
+        if next_double is not None:
+            end = next_double
+        elif next_delim is not None:
+            end = next_delim
+
+        if end is None:
+            end = start + 600 if (start + 600) < text_len else text_len
+
+        if end <= start:
+            end = min(start + 1, text_len)
+
+        segment = text[start:end].strip()
+        if segment:
+            parts.append(segment)
+
+        prev_end = end
+        if prev_end >= text_len:
+            break
+
+        if allow_overlap:
+            overlap_start = max(0, prev_end - 80)
+            overlap_delim = index.first_delim_end(overlap_start)
+            if overlap_delim is not None and overlap_delim < prev_end:
+                start = overlap_delim
+                continue
+        start = prev_end
+
+    return parts
+
+
+def merge_short_segments(segments: list[str], *, min_len: int) -> list[str]:
+    if not segments:
+        return []
+    merged: list[str] = []
+    buffer = ""
+    for segment in segments:
+        if buffer:
+            buffer = f"{buffer}\n{segment}"
+        else:
+            buffer = segment
+        if len(buffer) >= min_len:
+            merged.append(buffer)
+            buffer = ""
+    if buffer:
+        merged.append(buffer)
+    return merged
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def iter_import_blocks(lines: Iterable[str], speaker_map: dict[str, dict]) -> Iterator[tuple[dict, str]]:
+    """Yield (speaker, text) per speaker block; only the current block is held in memory."""
+    current_speaker: Optional[dict] = None
+    current_lines: list[str] = []
+
+    for line in lines:
+        normalized_line = line.strip().replace("：", ":")
+        if normalized_line:
+            speaker_label, remainder = normalized_line.split(":", 1) if ":" in normalized_line else (None, None)
+            if speaker_label and speaker_label in speaker_map:
+                if current_speaker is not None:
+                    text = "\n".join(current_lines).strip()
+                    if text:
+                        yield current_speaker, text
+                    current_lines = []
+                current_speaker = speaker_map[speaker_label]
+                remainder = remainder.strip() if remainder else ""
+                if remainder:
+                    current_lines.append(remainder)
+                continue
+        if current_speaker is None:
+            if not normalized_line:
+                continue
+            raise ImportFormatError("Speaker definition line is required before content.")
+        current_lines.append(line.rstrip())
+
+    if current_speaker is not None:
+        text = "\n".join(current_lines).strip()
+        if text:
+            yield current_speaker, text
+
+
+def split_block_text(text: str) -> list[str]:
+    """The segments one speaker block becomes, in text_id order."""
+    return merge_short_segments(split_speaker_text(text, allow_overlap=True), min_len=300)
+
+
+def split_block_texts(texts: list[str]) -> list[list[str]]:
+    """split_block_text over a chunk of blocks; the unit of work sent to pool processes."""
+    return [split_block_text(text) for text in texts]
+
+
+def block_parts(message_id: int, speaker: dict, segments: list[str]) -> Iterator[dict]:
+    """The import parts of one split block; text_id counts from 1 within the message."""
+    for text_id, segment in enumerate(segments, start=1):
+        yield {
+            "message_id": message_id,
+            "text_id": text_id,
+            "speaker_id": speaker["speaker_id"],
+            "speaker_name": speaker["speaker_name"],
+            "contents": segment,
+        }
+
+
+def iter_import_parts(blocks: Iterable[tuple[dict, str]]) -> Iterator[dict]:
+    message_id = 0
+    for speaker, text in blocks:
+        message_id += 1
+        yield from block_parts(message_id, speaker, split_block_text(text))
+
+
+# Characters of block text per chunk handed to a pool process.
+PARALLEL_CHUNK_CHARS = int(os.environ.get("CONVERSATION_IMPORT_CHUNK_CHARS", "262144"))
+
+
+def iter_split_blocks_parallel(
+    blocks: Iterable[tuple[K, dict, str]],
+    executor: Executor,
+    *,
+    max_pending: int,
+    chunk_chars: int = PARALLEL_CHUNK_CHARS,
+) -> Iterator[tuple[K, dict, list[str]]]:
+    """Yield (key, speaker, segments) per block, splitting chunks of blocks on `executor`.
+
+    Splitting a block depends on nothing but its own text, so blocks are
+    batched into chunks of about `chunk_chars` characters and mapped over the
+    pool. Results are consumed in submission order, so the output order (and
+    every id derived from it) matches the serial splitter exactly. At most
+    `max_pending` chunks are in flight, which bounds memory for any input size.
+    """
+    pending: deque[tuple[list[tuple[K, dict]], Future]] = deque()
+    heads: list[tuple[K, dict]] = []
+    texts: list[str] = []
+    size = 0
+
+    def drain(keep: int) -> Iterator[tuple[K, dict, list[str]]]:
+        while len(pending) > keep:
+            chunk_heads, future = pending.popleft()
+            for (key, speaker), segments in zip(chunk_heads, future.result()):
+                yield key, speaker, segments
+
+    for key, speaker, text in blocks:
+        heads.append((key, speaker))
+        texts.append(text)
+        size += len(text)
+        if size >= chunk_chars:
+            pending.append((heads, executor.submit(split_block_texts, texts)))
+            heads, texts, size = [], [], 0
+            yield from drain(max_pending)
+    if texts:
+        pending.append((heads, executor.submit(split_block_texts, texts)))
+    yield from drain(0)
+
+
+def iter_import_parts_parallel(
+    blocks: Iterable[tuple[dict, str]],
+    executor: Executor,
+    *,
+    max_pending: int,
+    chunk_chars: int = PARALLEL_CHUNK_CHARS,
+) -> Iterator[dict]:
+    """iter_import_parts with the splitting fanned out to `executor`; yields identical parts."""
+    message_id = 0
+    keyed = ((None, speaker, text) for speaker, text in blocks)
+    for _, speaker, segments in iter_split_blocks_parallel(
+        keyed, executor, max_pending=max_pending, chunk_chars=chunk_chars
+    ):
+        message_id += 1
+        yield from block_parts(message_id, speaker, segments)
+
+
+def iter_upload_lines(upload: BinaryIO) -> Iterator[str]:
+    """Yield the lines of a UTF-8 upload with the same newline handling as normalize_import_text."""
+    for raw_line in upload:
+        text = normalize_import_text(raw_line.decode("utf-8"))
+        if text.endswith("\n"):
+            text = text[:-1]
+        yield from text.split("\n")
+
+
+def load_speaker_map(conn: sqlite3.Connection) -> dict[str, dict]:
+    """speakers keyed by the speaker_role label used in transcripts."""
+    rows = conn.execute("SELECT speaker_id, speaker_name, speaker_role FROM speakers ORDER BY speaker_id;").fetchall()
+    return {row["speaker_role"]: dict(row) for row in rows}
+
+
+# Cards inserted per writer transaction by import/commit and import/stream.
+IMPORT_INSERT_BATCH = int(os.environ.get("CONVERSATION_IMPORT_BATCH", "500"))
+IMPORT_PART_FIELDS = ("message_id", "text_id", "speaker_id", "contents")
+
+
+def insert_import_parts(conn: sqlite3.Connection, thread_id: str, parts: list[dict]) -> list[int]:
+    """Insert one batch of parts with executemany and return their card ids in order.
+
+    Parts whose contents match meaningless_phrases get that role right away and
+    are never queued for the LLM.
+    """
+    phrases = meaningless_phrase_cache.get(conn)
+    # The caller holds the write lock (db_writer, or BEGIN IMMEDIATE in
+    # app.bulk_import), so the batch gets the rowids after this one.
+    last_card_id = conn.execute("SELECT COALESCE(MAX(card_id), 0) FROM cards;").fetchone()[0]
+    conn.executemany(
+        """
+        INSERT INTO cards (
+          thread_id, message_id, text_id, split_key, split_version,
+          speaker_id, conversation_at,
+          contents, is_edited, visibility,
+          card_role_id, card_role_confidence,
+          created_at, updated_at
+        ) VALUES (
+          :thread_id, :message_id, :text_id, :split_key, 1,
+          :speaker_id, CURRENT_TIMESTAMP,
+          :contents, 0, 'normal',
+          :card_role_id, 0.8,
+          CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        );
+        """,
+        (
+            {
+                "thread_id": thread_id,
+                "message_id": part["message_id"],
+                "text_id": part["text_id"],
+                "split_key": part["text_id"],
+                "speaker_id": part["speaker_id"],
+                "contents": part["contents"],
+                "card_role_id": phrases.match(part["contents"]),
+            }
+            for part in parts
+        ),
+    )
+    rows = conn.execute(
+        """
+        SELECT card_id
+        FROM cards
+        WHERE card_id > :last_card_id
+          AND thread_id = :thread_id
+        ORDER BY card_id ASC;
+        """,
+        {"last_card_id": last_card_id, "thread_id": thread_id},
+    ).fetchall()
+    return [row[0] for row in rows]
\ No newline at end of file
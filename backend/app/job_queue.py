@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Any
+
+JOB_TARGET_TABLES = {
+    "card_role": "cards",
+    "link_suggestion": "link_suggestions",
+}
+
+
+def enqueue_jobs(
+    conn: sqlite3.Connection,
+    job_type: str,
+    target_query: str,
+    params: dict[str, Any],
+) -> list[int]:
+    """Queue one llm_jobs row per `target_id` returned by `target_query`.
+
+    Runs as a single INSERT ... SELECT. Targets that already have a job are
+    re-queued through idx_llm_jobs_unique_target unless a worker currently
+    holds the lease. Returns the ids of the queued jobs.
+    """
+    rows = conn.execute(
+        f"""
+        INSERT INTO llm_jobs (
+          job_type, target_table, target_id, status,
+          created_at, updated_at, expires_at
+        )
+        SELECT
+          :job_type, :target_table, t.target_id, 'queued',
+          CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM ({target_query}) t
+        WHERE true
+        ON CONFLICT (job_type, target_table, target_id) DO UPDATE
+        SET status = 'queued',
+            lock_owner = NULL,
+            locked_at = NULL,
+            started_at = NULL,
+            finished_at = NULL,
+            error = NULL,
+            attempts = 0,
+            result_json = NULL,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE llm_jobs.status <> 'processing'
+        RETURNING job_id;
+        """,
+        {**params, "job_type": job_type, "target_table": JOB_TARGET_TABLES[job_type]},
+    ).fetchall()
+    return sorted(row[0] for row in rows)
\ No newline at end of file
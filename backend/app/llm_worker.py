@@ -1,510 +1,926 @@
-from __future__ import annotations
-
-import json
-import logging
-import os
-import re
-import sys
-import time
-import urllib.error
-import urllib.request
-from typing import Any, Optional
-
-CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-BACKEND_DIR = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
-if BACKEND_DIR not in sys.path:
-    sys.path.insert(0, BACKEND_DIR)
-
-from app.db import db_session
-
-OLLAMA_URL = "http://localhost:11434/api/generate"
-MODEL_NAME = "gpt-oss:20b"
-logger = logging.getLogger(__name__)
-LOG_PATH = os.path.join(CURRENT_DIR, "llm_worker.log")
-
-
-def configure_logger() -> None:
-    if logger.handlers:
-        return
-    logger.setLevel(logging.INFO)
-    formatter = logging.Formatter(
-        "%(asctime)s %(levelname)s %(name)s %(message)s"
-    )
-    file_handler = logging.FileHandler(LOG_PATH, encoding="utf-8")
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    logger.propagate = False
-
-
-configure_logger()
-
-
-def fetch_one(conn, query: str, params: dict[str, Any]) -> Optional[dict[str, Any]]:
-    cur = conn.execute(query, params)
-    row = cur.fetchone()
-    return dict(row) if row else None
-
-
-def fetch_all(conn, query: str, params: dict[str, Any]) -> list[dict[str, Any]]:
-    cur = conn.execute(query, params)
-    return [dict(row) for row in cur.fetchall()]
-
-
-def seed_llm_jobs(conn, limit: int = 10) -> int:
-    cards = fetch_all(
-        conn,
-        """
-        SELECT card_id
-        FROM cards
-        WHERE card_role_id IS NULL
-        ORDER BY created_at ASC
-        LIMIT :limit;
-        """,
-        {"limit": limit},
-    )
-    links = fetch_all(
-        conn,
-        """
-        SELECT suggestion_id
-        FROM link_suggestions
-        WHERE status = 'queued'
-        ORDER BY created_at ASC
-        LIMIT :limit;
-        """,
-        {"limit": limit},
-    )
-
-    inserted = 0
-    card_index = 0
-    link_index = 0
-    while inserted < limit and (card_index < len(cards) or link_index < len(links)):
-        if card_index < len(cards):
-            card_id = cards[card_index]["card_id"]
-            card_index += 1
-            row = conn.execute(
-                """
-                INSERT OR IGNORE INTO llm_jobs (
-                  job_type,
-                  target_table,
-                  target_id,
-                  status,
-                  locked_at,
-                  lock_owner,
-                  started_at,
-                  finished_at,
-                  error,
-                  result_json,
-                  created_at,
-                  updated_at,
-                  expires_at
-                ) VALUES (
-                  'card_role',
-                  'cards',
-                  :target_id,
-                  'queued',
-                  NULL,
-                  NULL,
-                  NULL,
-                  NULL,
-                  NULL,
-                  NULL,
-                  CURRENT_TIMESTAMP,
-                  CURRENT_TIMESTAMP,
-                  CURRENT_TIMESTAMP
-                );
-                """,
-                {"target_id": card_id},
-            )
-            if row.rowcount == 1:
-                inserted += 1
-            if inserted >= limit:
-                break
-
-        if link_index < len(links) and inserted < limit:
-            suggestion_id = links[link_index]["suggestion_id"]
-            link_index += 1
-            row = conn.execute(
-                """
-                INSERT OR IGNORE INTO llm_jobs (
-                  job_type,
-                  target_table,
-                  target_id,
-                  status,
-                  locked_at,
-                  lock_owner,
-                  started_at,
-                  finished_at,
-                  error,
-                  result_json,
-                  created_at,
-                  updated_at,
-                  expires_at
-                ) VALUES (
-                  'link_suggestion',
-                  'link_suggestions',
-                  :target_id,
-                  'queued',
-                  NULL,
-                  NULL,
-                  NULL,
-                  NULL,
-                  NULL,
-                  NULL,
-                  CURRENT_TIMESTAMP,
-                  CURRENT_TIMESTAMP,
-                  CURRENT_TIMESTAMP
-                );
-                """,
-                {"target_id": suggestion_id},
-            )
-            if row.rowcount == 1:
-                inserted += 1
-
-    return inserted
-
-
-def build_allowed_terms(conn) -> dict[str, str]:
-    card_roles = fetch_all(
-        conn,
-        "SELECT minor_name FROM card_roles ORDER BY card_role_id ASC;",
-        {},
-    )
-    link_kinds = fetch_all(
-        conn,
-        "SELECT link_kind_name FROM link_kinds ORDER BY link_kind_id ASC;",
-        {},
-    )
-    return {
-        "card_role": "/".join(row["minor_name"] for row in card_roles),
-        "link_suggestion": "/".join(row["link_kind_name"] for row in link_kinds),
-    }
-
-
-def extract_best_match(response_text: str, options: list[str]) -> Optional[str]:
-    earliest_index = None
-    best_match = None
-    for option in options:
-        index = response_text.find(option)
-        if index >= 0 and (earliest_index is None or index < earliest_index):
-            earliest_index = index
-            best_match = option
-    return best_match
-
-
-def extract_min_confidence(response_text: str) -> Optional[float]:
-    matches = re.findall(r"-?\d+(?:\.\d+)?", response_text)
-    if not matches:
-        return None
-    values = [float(value) for value in matches]
-    return min(values) if values else None
-
-
-def call_ollama(prompt: str) -> dict[str, Any]:
-    payload = {
-        "model": MODEL_NAME,
-        "prompt": prompt,
-        "stream": False,
-        "options": {
-            "temperature": 0,
-            "top_p": 0.8,
-            "repeat_penalty": 1.1,
-        },
-    }
-    req = urllib.request.Request(
-        OLLAMA_URL,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    logger.info("Ollama request prompt: %s", prompt)
-    with urllib.request.urlopen(req, timeout=300000) as resp:
-        body = resp.read().decode("utf-8")
-        logger.info("Ollama response status=%s body=%s", resp.status, body)
-        return json.loads(body)
-
-
-def fetch_processing_job(conn) -> Optional[dict[str, Any]]:
-    return fetch_one(
-        conn,
-        """
-        SELECT *
-        FROM llm_jobs
-        WHERE status = 'processing'
-        ORDER BY locked_at ASC
-        LIMIT 1;
-        """,
-        {},
-    )
-
-
-def fetch_expired_processing_job(conn) -> Optional[dict[str, Any]]:
-    return fetch_one(
-        conn,
-        """
-        SELECT *
-        FROM llm_jobs
-        WHERE status = 'processing'
-          AND (locked_at IS NULL OR locked_at <= datetime('now', '-5 minutes'))
-        ORDER BY locked_at ASC
-        LIMIT 1;
-        """,
-        {},
-    )
-
-
-def mark_job_failed(conn, job_id: int, error: str) -> None:
-    conn.execute(
-        """
-        UPDATE llm_jobs
-        SET status = 'failed',
-            error = :error,
-            finished_at = CURRENT_TIMESTAMP,
-            updated_at = CURRENT_TIMESTAMP
-        WHERE job_id = :job_id;
-        """,
-        {"job_id": job_id, "error": error},
-    )
-
-
-def mark_job_success(conn, job_id: int) -> None:
-    conn.execute(
-        """
-        UPDATE llm_jobs
-        SET status = 'success',
-            finished_at = CURRENT_TIMESTAMP,
-            updated_at = CURRENT_TIMESTAMP
-        WHERE job_id = :job_id;
-        """,
-        {"job_id": job_id},
-    )
-
-
-def process_card_role_job(conn, job: dict[str, Any], allowed_terms: str) -> None:
-    card = fetch_one(
-        conn,
-        "SELECT card_id, contents FROM cards WHERE card_id = :card_id;",
-        {"card_id": job["target_id"]},
-    )
-    if not card:
-        mark_job_failed(conn, job["job_id"], "Card not found")
-        return
-
-    prompt = (
-        "あなたは分類器です。出力は2行のみ。\n"
-        "1行目：許可単語一覧から1つを完全一致で出力。\n"
-        "2行目：自信度を0.00〜1.00で出力。\n"
-        "他の文章は禁止。\n\n"
-        "許可単語一覧：\n"
-        f"{allowed_terms}\n\n"
-        "contents：\n"
-        f"{card['contents']}"
-    )
-
-    try:
-        response = call_ollama(prompt)
-    except urllib.error.URLError as exc:
-        mark_job_failed(conn, job["job_id"], f"Ollama request failed: {exc}")
-        return
-
-    if response.get("error"):
-        mark_job_failed(conn, job["job_id"], str(response["error"]))
-        return
-
-    response_text = str(response.get("response", "")).strip()
-    roles = fetch_all(
-        conn,
-        "SELECT card_role_id, minor_name FROM card_roles ORDER BY card_role_id ASC;",
-        {},
-    )
-    role_names = [row["minor_name"] for row in roles]
-    matched_name = extract_best_match(response_text, role_names)
-    confidence = extract_min_confidence(response_text)
-    if matched_name is None or confidence is None:
-        mark_job_failed(conn, job["job_id"], "Failed to parse response: "+response_text)
-        return
-
-    matched_role_id = next(
-        row["card_role_id"] for row in roles if row["minor_name"] == matched_name
-    )
-    conn.execute(
-        """
-        UPDATE cards
-        SET card_role_id = :card_role_id,
-            card_role_confidence = :card_role_confidence,
-            updated_at = CURRENT_TIMESTAMP
-        WHERE card_id = :card_id;
-        """,
-        {
-            "card_role_id": matched_role_id,
-            "card_role_confidence": confidence,
-            "card_id": card["card_id"],
-        },
-    )
-    mark_job_success(conn, job["job_id"])
-
-
-def process_link_suggestion_job(conn, job: dict[str, Any], allowed_terms: str) -> None:
-    suggestion = fetch_one(
-        conn,
-        """
-        SELECT
-          ls.suggestion_id,
-          ls.from_card_id,
-          ls.to_card_id,
-          c_from.contents AS from_contents,
-          c_to.contents AS to_contents
-        FROM link_suggestions ls
-        LEFT JOIN cards c_from ON c_from.card_id = ls.from_card_id
-        LEFT JOIN cards c_to ON c_to.card_id = ls.to_card_id
-        WHERE ls.suggestion_id = :suggestion_id;
-        """,
-        {"suggestion_id": job["target_id"]},
-    )
-    if not suggestion:
-        mark_job_failed(conn, job["job_id"], "Link suggestion not found")
-        return
-
-    prompt = (
-        "あなたは分類器です。出力は2行のみ。\n"
-        "1行目：許可単語一覧から1つを完全一致で出力。関係が無ければ「none」。\n"
-        "2行目：自信度を0.00〜1.00で出力。\n"
-        "他の文章は禁止。\n\n"
-        "許可単語一覧：\n"
-        f"{allowed_terms}\n\n"
-        "from：\n"
-        f"{suggestion['from_contents']}\n\n"
-        "to：\n"
-        f"{suggestion['to_contents']}"
-    )
-
-    try:
-        response = call_ollama(prompt)
-    except urllib.error.URLError as exc:
-        mark_job_failed(conn, job["job_id"], f"Ollama request failed: {exc}")
-        return
-
-    if response.get("error"):
-        mark_job_failed(conn, job["job_id"], str(response["error"]))
-        return
-
-    response_text = str(response.get("response", "")).strip()
-    lines = [line.strip() for line in response_text.splitlines() if line.strip()]
-    first_line = lines[0].lower() if lines else ""
-    confidence = extract_min_confidence(response_text)
-    if confidence is None:
-        mark_job_failed(conn, job["job_id"], "Failed to parse confidence: "+response_text)
-        return
-
-    link_kinds = fetch_all(
-        conn,
-        "SELECT link_kind_id, link_kind_name FROM link_kinds ORDER BY link_kind_id ASC;",
-        {},
-    )
-    link_kind_names = [row["link_kind_name"] for row in link_kinds]
-    matched_name = None if first_line == "none" else extract_best_match(response_text, link_kind_names)
-    matched_kind_id = None
-    if matched_name:
-        matched_kind_id = next(
-            row["link_kind_id"] for row in link_kinds if row["link_kind_name"] == matched_name
-        )
-    elif first_line != "none":
-        mark_job_failed(conn, job["job_id"], "Failed to parse link kind: "+response_text)
-        return
-
-    conn.execute(
-        """
-        UPDATE link_suggestions
-        SET suggested_link_kind_id = :suggested_link_kind_id,
-            suggested_confidence = :suggested_confidence,
-            status = 'success',
-            updated_at = CURRENT_TIMESTAMP
-        WHERE suggestion_id = :suggestion_id;
-        """,
-        {
-            "suggested_link_kind_id": matched_kind_id,
-            "suggested_confidence": confidence,
-            "suggestion_id": suggestion["suggestion_id"],
-        },
-    )
-    mark_job_success(conn, job["job_id"])
-
-
-def process_job(conn, job: dict[str, Any], allowed_terms: dict[str, str]) -> None:
-    if job["job_type"] == "card_role":
-        process_card_role_job(conn, job, allowed_terms["card_role"])
-    elif job["job_type"] == "link_suggestion":
-        process_link_suggestion_job(conn, job, allowed_terms["link_suggestion"])
-    else:
-        mark_job_failed(conn, job["job_id"], f"Unknown job_type: {job['job_type']}")
-
-
-def run_worker() -> None:
-    with db_session() as conn:
-        seed_llm_jobs(conn, limit=10)
-
-    while True:
-        with db_session() as conn:
-            if not fetch_one(
-                conn,
-                """
-                SELECT job_id
-                FROM llm_jobs
-                WHERE status IN ('queued', 'processing')
-                LIMIT 1;
-                """,
-                {},
-            ):
-                break
-
-            processing_job = fetch_processing_job(conn)
-            if processing_job:
-                expired_job = fetch_expired_processing_job(conn)
-                if expired_job:
-                    mark_job_failed(conn, expired_job["job_id"], "Processing timeout")
-                    continue
-                time.sleep(300)
-                continue
-
-            job = fetch_one(
-                conn,
-                """
-                SELECT *
-                FROM llm_jobs
-                WHERE status = 'queued'
-                ORDER BY created_at ASC
-                LIMIT 1;
-                """,
-                {},
-            )
-            if not job:
-                break
-
-            conn.execute(
-                """
-                UPDATE llm_jobs
-                SET status = 'processing',
-                    locked_at = CURRENT_TIMESTAMP,
-                    started_at = CURRENT_TIMESTAMP,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE job_id = :job_id;
-                """,
-                {"job_id": job["job_id"]},
-            )
-
-        with db_session() as conn:
-            allowed_terms = build_allowed_terms(conn)
-            job = fetch_one(
-                conn,
-                "SELECT * FROM llm_jobs WHERE job_id = :job_id;",
-                {"job_id": job["job_id"]},
-            )
-            if job:
-                try:
-                    process_job(conn, job, allowed_terms)
-                except Exception as exc:
-                    mark_job_failed(conn, job["job_id"], f"Unexpected error: {exc}")
-
-
-if __name__ == "__main__":
-    run_worker()
\ No newline at end of file
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import re
+import signal
+import socket
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Optional, TypeVar
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from app.db import DB_POOL_SIZE, db_session, db_writer, get_db
+from app.ollama_client import OllamaClient, OllamaError
+from app.result_cache import result_cache
+from app.taxonomy import AllowedTerms, taxonomy_cache
+
+OLLAMA_URL = os.environ.get("CONVERSATION_OLLAMA_URL", "http://localhost:11434/api/generate")
+OLLAMA_CONNECT_TIMEOUT = float(os.environ.get("CONVERSATION_OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_READ_TIMEOUT = float(os.environ.get("CONVERSATION_OLLAMA_READ_TIMEOUT", "120"))
+MODEL_NAME = "gpt-oss:20b"
+# num_predict from その他の仕様, per expected label + confidence answer.
+NUM_PREDICT = 12
+# Match this to the number of parallel slots on the Ollama host (OLLAMA_NUM_PARALLEL).
+WORKER_CONCURRENCY = int(os.environ.get("CONVERSATION_LLM_CONCURRENCY", "2"))
+LEASE_SECONDS = int(os.environ.get("CONVERSATION_LLM_LEASE_SECONDS", "300"))
+# Expired leases go back to the queue until a job has been leased this many times.
+MAX_ATTEMPTS = int(os.environ.get("CONVERSATION_LLM_MAX_ATTEMPTS", "3"))
+SEED_BATCH = int(os.environ.get("CONVERSATION_LLM_SEED_BATCH", "100"))
+# Cards from the same thread classified by one prompt (1 = one request per card).
+CARD_ROLE_BATCH_SIZE = int(os.environ.get("CONVERSATION_LLM_CARD_BATCH", "1"))
+DAEMON_POLL_INTERVAL = float(os.environ.get("CONVERSATION_LLM_POLL_INTERVAL", "0.5"))
+DAEMON_IDLE_TIMEOUT = float(os.environ.get("CONVERSATION_LLM_IDLE_TIMEOUT", "60"))
+SHUTDOWN_GRACE_SECONDS = float(os.environ.get("CONVERSATION_LLM_SHUTDOWN_GRACE", "30"))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+logger = logging.getLogger(__name__)
+T = TypeVar("T")
+LOG_PATH = os.path.join(CURRENT_DIR, "llm_worker.log")
+
+
+def configure_logger() -> None:
+    if logger.handlers:
+        return
+    logger.setLevel(logging.INFO)
+    formatter = logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s %(message)s"
+    )
+    file_handler = logging.FileHandler(LOG_PATH, encoding="utf-8")
+    file_handler.setLevel(logging.INFO)
+    file_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
+    logger.propagate = False
+
+
+configure_logger()
+
+
+def fetch_one(conn, query: str, params: dict[str, Any]) -> Optional[dict[str, Any]]:
+    cur = conn.execute(query, params)
+    row = cur.fetchone()
+    return dict(row) if row else None
+
+
+def fetch_all(conn, query: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+    cur = conn.execute(query, params)
+    return [dict(row) for row in cur.fetchall()]
+
+
+def parse_seed_ratio(value: str) -> tuple[int, int]:
+    """Parse "cards:links" (e.g. "2:1") into non-negative weights."""
+    try:
+        card_weight, link_weight = (int(part) for part in value.split(":", 1))
+    except ValueError:
+        raise ValueError(f"Invalid seed ratio: {value!r}") from None
+    if card_weight < 0 or link_weight < 0 or card_weight + link_weight == 0:
+        raise ValueError(f"Invalid seed ratio: {value!r}")
+    return card_weight, link_weight
+
+
+SEED_RATIO = parse_seed_ratio(os.environ.get("CONVERSATION_LLM_SEED_RATIO", "1:1"))
+
+
+def seed_llm_jobs(conn, limit: int = 10, ratio: Optional[tuple[int, int]] = None) -> int:
+    """Queue up to `limit` card_role / link_suggestion jobs in one INSERT ... SELECT.
+
+    Targets are interleaved `card_weight` cards to `link_weight` suggestions in
+    job_id (claim) order; when one side runs out the other fills the remainder.
+    """
+    card_weight, link_weight = ratio or SEED_RATIO
+    cur = conn.execute(
+        """
+        INSERT OR IGNORE INTO llm_jobs (
+          job_type, target_table, target_id, status,
+          created_at, updated_at, expires_at
+        )
+        SELECT
+          job_type, target_table, target_id, 'queued',
+          CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM (
+          SELECT
+            'card_role' AS job_type,
+            'cards' AS target_table,
+            card_id AS target_id,
+            0 AS side,
+            (ROW_NUMBER() OVER (ORDER BY created_at ASC, card_id ASC) - 1) / :card_weight AS slot
+          FROM (
+            SELECT c.card_id, c.created_at
+            FROM cards c
+            WHERE c.card_role_id IS NULL
+              AND NOT EXISTS (
+                SELECT 1
+                FROM llm_jobs j
+                WHERE j.job_type = 'card_role'
+                  AND j.target_table = 'cards'
+                  AND j.target_id = c.card_id
+              )
+            ORDER BY c.created_at ASC, c.card_id ASC
+            LIMIT :card_limit
+          )
+          UNION ALL
+          SELECT
+            'link_suggestion',
+            'link_suggestions',
+            suggestion_id,
+            1,
+            (ROW_NUMBER() OVER (ORDER BY created_at ASC, suggestion_id ASC) - 1) / :link_weight
+          FROM (
+            SELECT ls.suggestion_id, ls.created_at
+            FROM link_suggestions ls
+            WHERE ls.status = 'queued'
+              AND NOT EXISTS (
+                SELECT 1
+                FROM llm_jobs j
+                WHERE j.job_type = 'link_suggestion'
+                  AND j.target_table = 'link_suggestions'
+                  AND j.target_id = ls.suggestion_id
+              )
+            ORDER BY ls.created_at ASC, ls.suggestion_id ASC
+            LIMIT :link_limit
+          )
+        )
+        ORDER BY slot ASC, side ASC
+        LIMIT :limit;
+        """,
+        {
+            "card_weight": card_weight or 1,
+            "link_weight": link_weight or 1,
+            "card_limit": limit if card_weight else 0,
+            "link_limit": limit if link_weight else 0,
+            "limit": limit,
+        },
+    )
+    return cur.rowcount
+
+
+def extract_min_confidence(response_text: str) -> Optional[float]:
+    matches = re.findall(r"-?\d+(?:\.\d+)?", response_text)
+    if not matches:
+        return None
+    values = [float(value) for value in matches]
+    return min(values) if values else None
+
+
+ollama_client = OllamaClient(
+    OLLAMA_URL,
+    pool_size=WORKER_CONCURRENCY,
+    connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+    read_timeout=OLLAMA_READ_TIMEOUT,
+)
+
+
+def call_ollama(prompt: str, answers: int = 1) -> dict[str, Any]:
+    """Generate with the options from その他の仕様.
+
+    A single answer is the two-line label/confidence reply; a batch prompt
+    expects one line per answer. Reading stops once those lines have arrived.
+    """
+    payload = {
+        "model": MODEL_NAME,
+        "prompt": prompt,
+        "options": {
+            "temperature": 0,
+            "num_predict": NUM_PREDICT * answers,
+            "top_p": 0.8,
+            "repeat_penalty": 1.1,
+            "stop": ["\n\n"],
+        },
+    }
+    logger.info("Ollama request prompt: %s", prompt)
+    response = ollama_client.generate(payload, expected_lines=2 if answers == 1 else answers)
+    logger.info("Ollama response %s", json.dumps(response, ensure_ascii=False))
+    return response
+
+
+def write(fn: Callable[..., T], *args: Any) -> T:
+    """Run `fn(conn, *args)` on the writer connection and wait for its commit.
+
+    Job threads only read through their own connections, so no transaction is
+    left open while a prompt is waiting on Ollama.
+    """
+
+    def task() -> T:
+        with db_session() as conn:
+            return fn(conn, *args)
+
+    return db_writer.call(task)
+
+
+def claim_jobs(conn, owner: str, limit: int) -> list[dict[str, Any]]:
+    """Lease up to `limit` queued jobs to `owner` in a single UPDATE."""
+    if limit <= 0:
+        return []
+    rows = conn.execute(
+        """
+        UPDATE llm_jobs
+        SET status = 'processing',
+            lock_owner = :owner,
+            locked_at = CURRENT_TIMESTAMP,
+            started_at = CURRENT_TIMESTAMP,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE job_id IN (
+          SELECT job_id
+          FROM llm_jobs
+          WHERE status = 'queued'
+          ORDER BY created_at ASC, job_id ASC
+          LIMIT :limit
+        )
+          AND status = 'queued'
+        RETURNING *;
+        """,
+        {"owner": owner, "limit": limit},
+    ).fetchall()
+    return sorted((dict(row) for row in rows), key=lambda job: job["job_id"])
+
+
+def requeue_expired_jobs(conn, lease_seconds: int = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS) -> int:
+    """Return jobs whose lease ran out to the queue; fail those already leased `max_attempts` times.
+
+    The previous holder may still be running; its completion updates check
+    the lease and become no-ops once the job is requeued or claimed again.
+    """
+    return conn.execute(
+        """
+        UPDATE llm_jobs
+        SET status = CASE WHEN attempts + 1 >= :max_attempts THEN 'failed' ELSE 'queued' END,
+            attempts = attempts + 1,
+            error = 'Processing timeout',
+            lock_owner = NULL,
+            locked_at = NULL,
+            started_at = NULL,
+            finished_at = CASE WHEN attempts + 1 >= :max_attempts THEN CURRENT_TIMESTAMP END,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE status = 'processing'
+          AND (locked_at IS NULL OR locked_at <= datetime('now', :lease));
+        """,
+        {"lease": f"-{lease_seconds} seconds", "max_attempts": max(1, max_attempts)},
+    ).rowcount
+
+
+def release_leases(conn, owner: str) -> int:
+    """Return jobs still leased by `owner` to the queue."""
+    return conn.execute(
+        """
+        UPDATE llm_jobs
+        SET status = 'queued',
+            lock_owner = NULL,
+            locked_at = NULL,
+            started_at = NULL,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE status = 'processing'
+          AND lock_owner = :owner;
+        """,
+        {"owner": owner},
+    ).rowcount
+
+
+# A lease is the (lock_owner, locked_at) a claim stamped on the job; requeueing
+# clears it and a new claim stamps another, so stale holders match no row.
+HELD_LEASE = """
+          AND status = 'processing'
+          AND lock_owner = :lock_owner
+          AND locked_at = :locked_at
+"""
+
+
+def lease_params(job: dict[str, Any]) -> dict[str, Any]:
+    return {"job_id": job["job_id"], "lock_owner": job["lock_owner"], "locked_at": job["locked_at"]}
+
+
+def mark_job_failed(conn, job: dict[str, Any], error: str) -> bool:
+    """Fail `job` if this worker still holds its lease; False when the lease was lost."""
+    return conn.execute(
+        f"""
+        UPDATE llm_jobs
+        SET status = 'failed',
+            error = :error,
+            finished_at = CURRENT_TIMESTAMP,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE job_id = :job_id
+        {HELD_LEASE};
+        """,
+        {**lease_params(job), "error": error},
+    ).rowcount > 0
+
+
+def fail_leased_jobs(conn, jobs: list[dict[str, Any]], error: str) -> None:
+    """Mark the given jobs failed unless they already left this worker's lease."""
+    for job in jobs:
+        mark_job_failed(conn, job, error)
+
+
+def mark_job_success(conn, job: dict[str, Any], result: Optional[dict[str, Any]] = None) -> bool:
+    """Complete `job` if this worker still holds its lease; False when the lease was lost."""
+    done = conn.execute(
+        f"""
+        UPDATE llm_jobs
+        SET status = 'success',
+            result_json = :result_json,
+            finished_at = CURRENT_TIMESTAMP,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE job_id = :job_id
+        {HELD_LEASE};
+        """,
+        {**lease_params(job), "result_json": json.dumps(result) if result is not None else None},
+    ).rowcount > 0
+    if not done:
+        logger.warning("Job %s lost its lease; result discarded", job["job_id"])
+    return done
+
+
+CACHE_HIT_RESULT = {"model": MODEL_NAME, "cache_hit": True}
+
+
+def response_cost(response: dict[str, Any], items: int = 1) -> dict[str, Any]:
+    """Per-item share of the token counts and duration Ollama reports for a call."""
+    items = max(1, items)
+    return {
+        "model": response.get("model", MODEL_NAME),
+        "batch_size": items,
+        "prompt_tokens": round((response.get("prompt_eval_count") or 0) / items, 2),
+        "completion_tokens": round((response.get("eval_count") or 0) / items, 2),
+        "duration_ms": round((response.get("total_duration") or 0) / 1_000_000 / items, 3),
+    }
+
+
+def claim_card_role_batch(conn, owner: str, card_id: int, limit: int) -> list[dict[str, Any]]:
+    """Lease up to `limit` more queued card_role jobs for cards in `card_id`'s thread."""
+    if limit <= 0:
+        return []
+    rows = conn.execute(
+        """
+        UPDATE llm_jobs
+        SET status = 'processing',
+            lock_owner = :owner,
+            locked_at = CURRENT_TIMESTAMP,
+            started_at = CURRENT_TIMESTAMP,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE job_id IN (
+          SELECT j.job_id
+          FROM cards seed
+          JOIN cards c ON c.thread_id = seed.thread_id AND c.card_id <> seed.card_id
+          JOIN llm_jobs j
+            ON j.job_type = 'card_role'
+           AND j.target_table = 'cards'
+           AND j.target_id = c.card_id
+          WHERE seed.card_id = :card_id
+            AND j.status = 'queued'
+          ORDER BY c.conversation_at ASC, c.card_id ASC
+          LIMIT :limit
+        )
+          AND status = 'queued'
+        RETURNING *;
+        """,
+        {"owner": owner, "card_id": card_id, "limit": limit},
+    ).fetchall()
+    return sorted((dict(row) for row in rows), key=lambda job: job["job_id"])
+
+
+def apply_card_role(
+    conn,
+    job: dict[str, Any],
+    card_id: int,
+    card_role_id: int,
+    confidence: float,
+    result: dict[str, Any],
+    cache_key: Optional[str] = None,
+) -> None:
+    if not mark_job_success(conn, job, result):
+        return
+    if cache_key:
+        result_cache.put(conn, "card_role", cache_key, card_role_id, confidence)
+    conn.execute(
+        """
+        UPDATE cards
+        SET card_role_id = :card_role_id,
+            card_role_confidence = :card_role_confidence,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE card_id = :card_id;
+        """,
+        {
+            "card_role_id": card_role_id,
+            "card_role_confidence": confidence,
+            "card_id": card_id,
+        },
+    )
+
+
+def apply_cached_card_role(
+    conn, job: dict[str, Any], card: dict[str, Any], allowed_terms: AllowedTerms
+) -> tuple[bool, Optional[str]]:
+    """Complete `job` from the result cache if possible.
+
+    Returns (hit, key); on a miss the key is where the LLM answer should be stored.
+    """
+    if not result_cache.enabled:
+        return False, None
+    key = result_cache.key("card_role", MODEL_NAME, allowed_terms.version, card["contents"])
+    cached = result_cache.get(conn, "card_role", key)
+    if cached is None:
+        return False, key
+    card_role_id, confidence = cached
+    apply_card_role(conn, job, card["card_id"], card_role_id, confidence, CACHE_HIT_RESULT)
+    return True, key
+
+
+def process_card_role_job(conn, job: dict[str, Any], allowed_terms: AllowedTerms) -> None:
+    card = fetch_one(
+        conn,
+        "SELECT card_id, contents FROM cards WHERE card_id = :card_id;",
+        {"card_id": job["target_id"]},
+    )
+    if not card:
+        write(mark_job_failed, job, "Card not found")
+        return
+    hit, cache_key = write(apply_cached_card_role, job, card, allowed_terms)
+    if not hit:
+        classify_card_role(conn, job, card, allowed_terms, cache_key)
+
+
+def classify_card_role(
+    conn, job: dict[str, Any], card: dict[str, Any], allowed_terms: AllowedTerms, cache_key: Optional[str]
+) -> None:
+    prompt = (
+        "あなたは分類器です。出力は2行のみ。\n"
+        "1行目：許可単語一覧から1つを完全一致で出力。\n"
+        "2行目：自信度を0.00〜1.00で出力。\n"
+        "他の文章は禁止。\n\n"
+        "許可単語一覧：\n"
+        f"{allowed_terms.text}\n\n"
+        "contents：\n"
+        f"{card['contents']}"
+    )
+
+    try:
+        response = call_ollama(prompt)
+    except OllamaError as exc:
+        write(mark_job_failed, job, str(exc))
+        return
+
+    if response.get("error"):
+        write(mark_job_failed, job, str(response["error"]))
+        return
+
+    response_text = str(response.get("response", "")).strip()
+    matched_name = allowed_terms.match(response_text)
+    confidence = extract_min_confidence(response_text)
+    if matched_name is None or confidence is None:
+        write(mark_job_failed, job, "Failed to parse response: "+response_text)
+        return
+
+    matched_role_id = allowed_terms.ids[matched_name]
+    write(
+        apply_card_role,
+        job,
+        card["card_id"],
+        matched_role_id,
+        confidence,
+        response_cost(response),
+        cache_key,
+    )
+
+
+BATCH_LINE_PATTERN = re.compile(r"^\s*[\[(]?(\d+)[\])]?\s*[.:：|、)]?\s*(.*)$")
+CONFIDENCE_PATTERN = re.compile(r"(?<![\d.])(?:0(?:\.\d+)?|1(?:\.0+)?|\.\d+)(?![\d.])")
+
+
+def parse_card_role_batch(
+    response_text: str, size: int, allowed_terms: AllowedTerms
+) -> dict[int, tuple[str, float]]:
+    """Map 1-based item numbers to (role name, confidence) from a numbered reply.
+
+    Lines that do not start with an item number, name no allowed role, carry no
+    confidence, or repeat an earlier number are left out so those cards can be
+    retried on their own.
+    """
+    parsed: dict[int, tuple[str, float]] = {}
+    seen: set[int] = set()
+    for line in response_text.splitlines():
+        match = BATCH_LINE_PATTERN.match(line)
+        if not match:
+            continue
+        number = int(match.group(1))
+        if not 1 <= number <= size:
+            continue
+        if number in seen:
+            parsed.pop(number, None)
+            continue
+        seen.add(number)
+        rest = match.group(2)
+        role_name = allowed_terms.match(rest)
+        if role_name is None:
+            continue
+        confidences = CONFIDENCE_PATTERN.findall(rest.replace(role_name, " "))
+        if not confidences:
+            continue
+        parsed[number] = (role_name, float(confidences[-1]))
+    return parsed
+
+
+def process_card_role_batch(conn, jobs: list[dict[str, Any]], allowed_terms: AllowedTerms) -> None:
+    """Classify several cards of one thread with a single numbered prompt.
+
+    Cards the reply does not cover are retried with process_card_role_job.
+    """
+    cards = {
+        row["card_id"]: row
+        for row in fetch_all(
+            conn,
+            f"""
+            SELECT card_id, contents, conversation_at
+            FROM cards
+            WHERE card_id IN ({", ".join(str(int(job["target_id"])) for job in jobs)});
+            """,
+            {},
+        )
+    }
+
+    def apply_cached(write_conn) -> list[tuple[dict[str, Any], dict[str, Any], Optional[str]]]:
+        misses = []
+        for job in jobs:
+            card = cards.get(job["target_id"])
+            if card is None:
+                mark_job_failed(write_conn, job, "Card not found")
+                continue
+            hit, cache_key = apply_cached_card_role(write_conn, job, card, allowed_terms)
+            if not hit:
+                misses.append((job, card, cache_key))
+        return misses
+
+    items = write(apply_cached)
+    items.sort(key=lambda item: (item[1]["conversation_at"], item[1]["card_id"]))
+    if len(items) <= 1:
+        for job, card, cache_key in items:
+            classify_card_role(conn, job, card, allowed_terms, cache_key)
+        return
+
+    numbered = "\n\n".join(
+        f"[{index}]\n{card['contents']}" for index, (_, card, _) in enumerate(items, start=1)
+    )
+    prompt = (
+        "あなたは分類器です。各 contents について1行ずつ、番号順に出力。\n"
+        "形式：番号|許可単語一覧から1つを完全一致|自信度(0.00〜1.00)\n"
+        "例：1|質問|0.80\n"
+        f"出力は{len(items)}行のみ。他の文章は禁止。\n\n"
+        "許可単語一覧：\n"
+        f"{allowed_terms.text}\n\n"
+        "contents：\n"
+        f"{numbered}"
+    )
+
+    leased = [job for job, _, _ in items]
+    try:
+        response = call_ollama(prompt, answers=len(items))
+    except OllamaError as exc:
+        write(fail_leased_jobs, leased, str(exc))
+        return
+
+    if response.get("error"):
+        write(fail_leased_jobs, leased, str(response["error"]))
+        return
+
+    response_text = str(response.get("response", "")).strip()
+    parsed = parse_card_role_batch(response_text, len(items), allowed_terms)
+    cost = response_cost(response, len(items))
+    retry = [item for index, item in enumerate(items, start=1) if index not in parsed]
+
+    def apply_parsed(write_conn) -> None:
+        for index, (job, card, cache_key) in enumerate(items, start=1):
+            if index in parsed:
+                role_name, confidence = parsed[index]
+                card_role_id = allowed_terms.ids[role_name]
+                apply_card_role(write_conn, job, card["card_id"], card_role_id, confidence, cost, cache_key)
+
+    write(apply_parsed)
+    logger.info(
+        "Card role batch: %s cards, %s parsed, %s retried singly, per card %s",
+        len(items),
+        len(items) - len(retry),
+        len(retry),
+        cost,
+    )
+    for job, card, cache_key in retry:
+        classify_card_role(conn, job, card, allowed_terms, cache_key)
+
+
+def apply_link_suggestion(
+    conn,
+    job: dict[str, Any],
+    suggestion_id: int,
+    link_kind_id: Optional[int],
+    confidence: float,
+    result: dict[str, Any],
+    cache_key: Optional[str] = None,
+) -> None:
+    if not mark_job_success(conn, job, result):
+        return
+    if cache_key:
+        result_cache.put(conn, "link_suggestion", cache_key, link_kind_id, confidence)
+    conn.execute(
+        """
+        UPDATE link_suggestions
+        SET suggested_link_kind_id = :suggested_link_kind_id,
+            suggested_confidence = :suggested_confidence,
+            status = 'success',
+            updated_at = CURRENT_TIMESTAMP
+        WHERE suggestion_id = :suggestion_id;
+        """,
+        {
+            "suggested_link_kind_id": link_kind_id,
+            "suggested_confidence": confidence,
+            "suggestion_id": suggestion_id,
+        },
+    )
+
+
+def apply_cached_link_suggestion(
+    conn, job: dict[str, Any], suggestion: dict[str, Any], allowed_terms: AllowedTerms
+) -> tuple[bool, Optional[str]]:
+    """Complete `job` from the result cache if possible, like apply_cached_card_role."""
+    if not result_cache.enabled:
+        return False, None
+    key = result_cache.key(
+        "link_suggestion",
+        MODEL_NAME,
+        allowed_terms.version,
+        suggestion["from_contents"],
+        suggestion["to_contents"],
+    )
+    cached = result_cache.get(conn, "link_suggestion", key)
+    if cached is None:
+        return False, key
+    link_kind_id, confidence = cached
+    apply_link_suggestion(conn, job, suggestion["suggestion_id"], link_kind_id, confidence, CACHE_HIT_RESULT)
+    return True, key
+
+
+def process_link_suggestion_job(conn, job: dict[str, Any], allowed_terms: AllowedTerms) -> None:
+    suggestion = fetch_one(
+        conn,
+        """
+        SELECT
+          ls.suggestion_id,
+          ls.from_card_id,
+          ls.to_card_id,
+          c_from.contents AS from_contents,
+          c_to.contents AS to_contents
+        FROM link_suggestions ls
+        LEFT JOIN cards c_from ON c_from.card_id = ls.from_card_id
+        LEFT JOIN cards c_to ON c_to.card_id = ls.to_card_id
+        WHERE ls.suggestion_id = :suggestion_id;
+        """,
+        {"suggestion_id": job["target_id"]},
+    )
+    if not suggestion:
+        write(mark_job_failed, job, "Link suggestion not found")
+        return
+
+    hit, cache_key = write(apply_cached_link_suggestion, job, suggestion, allowed_terms)
+    if hit:
+        return
+
+    prompt = (
+        "あなたは分類器です。出力は2行のみ。\n"
+        "1行目：許可単語一覧から1つを完全一致で出力。関係が無ければ「none」。\n"
+        "2行目：自信度を0.00〜1.00で出力。\n"
+        "他の文章は禁止。\n\n"
+        "許可単語一覧：\n"
+        f"{allowed_terms.text}\n\n"
+        "from：\n"
+        f"{suggestion['from_contents']}\n\n"
+        "to：\n"
+        f"{suggestion['to_contents']}"
+    )
+
+    try:
+        response = call_ollama(prompt)
+    except OllamaError as exc:
+        write(mark_job_failed, job, str(exc))
+        return
+
+    if response.get("error"):
+        write(mark_job_failed, job, str(response["error"]))
+        return
+
+    response_text = str(response.get("response", "")).strip()
+    lines = [line.strip() for line in response_text.splitlines() if line.strip()]
+    first_line = lines[0].lower() if lines else ""
+    confidence = extract_min_confidence(response_text)
+    if confidence is None:
+        write(mark_job_failed, job, "Failed to parse confidence: "+response_text)
+        return
+
+    matched_name = None if first_line == "none" else allowed_terms.match(response_text)
+    matched_kind_id = None
+    if matched_name:
+        matched_kind_id = allowed_terms.ids[matched_name]
+    elif first_line != "none":
+        write(mark_job_failed, job, "Failed to parse link kind: "+response_text)
+        return
+
+    write(
+        apply_link_suggestion,
+        job,
+        suggestion["suggestion_id"],
+        matched_kind_id,
+        confidence,
+        response_cost(response),
+        cache_key,
+    )
+
+
+def process_job(conn, job: dict[str, Any], allowed_terms: dict[str, AllowedTerms]) -> None:
+    if job["job_type"] == "card_role":
+        process_card_role_job(conn, job, allowed_terms["card_role"])
+    elif job["job_type"] == "link_suggestion":
+        process_link_suggestion_job(conn, job, allowed_terms["link_suggestion"])
+    else:
+        write(mark_job_failed, job, f"Unknown job_type: {job['job_type']}")
+
+
+def run_job(job: dict[str, Any], card_batch: int = CARD_ROLE_BATCH_SIZE) -> None:
+    jobs = [job]
+    if job["job_type"] == "card_role" and card_batch > 1:
+        jobs += write(claim_card_role_batch, WORKER_ID, job["target_id"], card_batch - 1)
+    with db_session() as conn:
+        allowed_terms = taxonomy_cache.get(conn)
+        try:
+            if len(jobs) > 1:
+                process_card_role_batch(conn, jobs, allowed_terms["card_role"])
+            else:
+                process_job(conn, job, allowed_terms)
+        except Exception as exc:
+            logger.exception("Job %s failed", job["job_id"])
+            # A batch has already committed the cards it classified.
+            write(fail_leased_jobs, jobs, f"Unexpected error: {exc}")
+
+
+def run_worker(
+    concurrency: int = WORKER_CONCURRENCY,
+    seed_limit: int = 10,
+    card_batch: int = CARD_ROLE_BATCH_SIZE,
+) -> None:
+    concurrency = max(1, concurrency)
+    if concurrency >= DB_POOL_SIZE:
+        logger.warning(
+            "Worker concurrency %s should be below CONVERSATION_DB_POOL_SIZE (%s)",
+            concurrency,
+            DB_POOL_SIZE,
+        )
+    write(seed_llm_jobs, seed_limit)
+
+    in_flight: set[Future] = set()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="llm-job") as executor:
+        while True:
+            expired = write(requeue_expired_jobs)
+            if expired:
+                logger.info("Requeued %s jobs with expired leases", expired)
+            claimed = write(claim_jobs, WORKER_ID, concurrency - len(in_flight))
+            for job in claimed:
+                in_flight.add(executor.submit(run_job, job, card_batch))
+            if not in_flight:
+                break
+            _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+    logger.info("Writer %s", db_writer.stats())
+    db_writer.shutdown()
+    if result_cache.enabled:
+        logger.info("Result cache %s", result_cache.stats())
+
+
+class DataVersionWatcher:
+    """Sets `wakeup` whenever another connection commits to the database.
+
+    PRAGMA data_version is a cheap in-memory check on a dedicated connection,
+    so the API enqueueing work (imports, link suggestions, role recomputes)
+    wakes the daemon without any coupling between the two processes.
+    """
+
+    def __init__(self, wakeup: threading.Event, poll_interval: float) -> None:
+        self.wakeup = wakeup
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="data-version-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        conn = get_db()
+        try:
+            last = conn.execute("PRAGMA data_version;").fetchone()[0]
+            while not self._stop.wait(self.poll_interval):
+                current = conn.execute("PRAGMA data_version;").fetchone()[0]
+                if current != last:
+                    last = current
+                    self.wakeup.set()
+        finally:
+            conn.close()
+
+
+def run_daemon(
+    concurrency: int = WORKER_CONCURRENCY,
+    seed_batch: int = SEED_BATCH,
+    idle_timeout: float = DAEMON_IDLE_TIMEOUT,
+    card_batch: int = CARD_ROLE_BATCH_SIZE,
+) -> None:
+    concurrency = max(1, concurrency)
+    stop = threading.Event()
+    wakeup = threading.Event()
+
+    def request_stop(signum, frame) -> None:
+        logger.info("Received signal %s, shutting down", signum)
+        stop.set()
+        wakeup.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    watcher = DataVersionWatcher(wakeup, DAEMON_POLL_INTERVAL)
+    watcher.start()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="llm-job")
+    in_flight: set[Future] = set()
+    logger.info("LLM worker daemon %s started (concurrency=%s)", WORKER_ID, concurrency)
+    try:
+        while not stop.is_set():
+            wakeup.clear()
+            free_slots = concurrency - len(in_flight)
+
+            def refill(conn) -> list[dict[str, Any]]:
+                requeue_expired_jobs(conn)
+                if free_slots > 0:
+                    seed_llm_jobs(conn, limit=seed_batch)
+                return claim_jobs(conn, WORKER_ID, free_slots)
+
+            claimed = write(refill)
+            for job in claimed:
+                future = executor.submit(run_job, job, card_batch)
+                future.add_done_callback(lambda _: wakeup.set())
+                in_flight.add(future)
+            wakeup.wait(idle_timeout)
+            in_flight = {future for future in in_flight if not future.done()}
+    finally:
+        watcher.stop()
+        # Jobs that never started go back to the queue below; running ones keep
+        # their lease and must finish (their writes need the writer) first.
+        running = {future for future in in_flight if not future.cancel()}
+        if running:
+            logger.info("Waiting up to %ss for %s in-flight jobs", SHUTDOWN_GRACE_SECONDS, len(running))
+            _, running = wait(running, timeout=SHUTDOWN_GRACE_SECONDS)
+        if running:
+            logger.warning("%s jobs still running after %ss; waiting for them to finish", len(running), SHUTDOWN_GRACE_SECONDS)
+        executor.shutdown(wait=True, cancel_futures=True)
+        # Every running job has finished, so only leases of cancelled jobs are left.
+        released = write(release_leases, WORKER_ID)
+        logger.info("Writer %s", db_writer.stats())
+        db_writer.shutdown()
+        logger.info("LLM worker daemon stopped, released %s leases", released)
+        if result_cache.enabled:
+            logger.info("Result cache %s", result_cache.stats())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process queued llm_jobs.")
+    parser.add_argument("--daemon", action="store_true", help="keep running and wait for new work")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY)
+    parser.add_argument(
+        "--seed-batch",
+        type=int,
+        default=None,
+        help=f"jobs to seed per pass (default: 10, or {SEED_BATCH} with --daemon)",
+    )
+    parser.add_argument(
+        "--card-batch",
+        type=int,
+        default=CARD_ROLE_BATCH_SIZE,
+        help="cards of one thread classified per prompt",
+    )
+    args = parser.parse_args()
+    if args.daemon:
+        run_daemon(
+            concurrency=args.concurrency,
+            seed_batch=args.seed_batch or SEED_BATCH,
+            card_batch=args.card_batch,
+        )
+    else:
+        run_worker(
+            concurrency=args.concurrency,
+            seed_limit=args.seed_batch or 10,
+            card_batch=args.card_batch,
+        )
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,20 +1,20 @@
-from __future__ import annotations
-
-import logging
-from pathlib import Path
-
-LOG_PATH = Path(__file__).resolve().parent / "log.log"
-
-
-def configure_logging() -> None:
-    root_logger = logging.getLogger()
-    if root_logger.handlers:
-        return
-    root_logger.setLevel(logging.INFO)
-    formatter = logging.Formatter(
-        "%(asctime)s %(levelname)s %(name)s %(message)s"
-    )
-    file_handler = logging.FileHandler(LOG_PATH, encoding="utf-8")
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(formatter)
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+LOG_PATH = Path(__file__).resolve().parent / "log.log"
+
+
+def configure_logging() -> None:
+    root_logger = logging.getLogger()
+    if root_logger.handlers:
+        return
+    root_logger.setLevel(logging.INFO)
+    formatter = logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s %(message)s"
+    )
+    file_handler = logging.FileHandler(LOG_PATH, encoding="utf-8")
+    file_handler.setLevel(logging.INFO)
+    file_handler.setFormatter(formatter)
     root_logger.addHandler(file_handler)
\ No newline at end of file
@@ -1,1390 +1,1785 @@
-from __future__ import annotations
-
-import logging
-import re
-import sqlite3
-import uuid
-from typing import Any, Dict, Iterable, Optional
-
-from fastapi import FastAPI, HTTPException, Query, Response
-from fastapi.middleware.cors import CORSMiddleware
-
-from app.db import db_session, init_db
-from app.logging_config import configure_logging
-from app.schemas import (
-    CardDetail,
-    CardListItem,
-    CardUpdate,
-    ContextSaveRequest,
-    CreateCardRole,
-    CreateLinkKind,
-    CreateMajorItem,
-    CreateMeaninglessPhrase,
-    CreateSpeaker,
-    ImportCommitRequest,
-    ImportPreviewRequest,
-    ImportPreviewResponse,
-    LinkKindUpdate,
-    LinkSuggestionApproveRequest,
-    LinkSuggestionGenerateRequest,
-    LinkSuggestionListItem,
-    LinkSuggestionRunRequest,
-    MergeResponse,
-    MessageCardsResponse,
-    SimpleMessageCard,
-    UpdateCardRole,
-    UpdateLinkKind,
-    UpdateMajorItem,
-    UpdateMeaninglessPhrase,
-    UpdateSpeaker,
-)
-
-app = FastAPI(title="Conversation Cards API")
-configure_logging()
-logger = logging.getLogger(__name__)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"] ,
-    allow_credentials=True,
-    allow_methods=["*"] ,
-    allow_headers=["*"] ,
-)
-
-
-@app.middleware("http")
-async def log_request_start(request, call_next):
-    logger.info("API start %s %s", request.method, request.url.path)
-    try:
-        return await call_next(request)
-    except Exception:
-        logger.exception(
-            "Unhandled error during request %s %s",
-            request.method,
-            request.url.path,
-        )
-        raise
-
-
-@app.on_event("startup")
-async def startup() -> None:
-    init_db()
-
-
-def fetch_one(conn, query: str, params: dict) -> Optional[dict]:
-    cur = conn.execute(query, params)
-    row = cur.fetchone()
-    return dict(row) if row else None
-
-
-def fetch_all(conn, query: str, params: dict) -> list[dict]:
-    cur = conn.execute(query, params)
-    return [dict(row) for row in cur.fetchall()]
-
-
-@app.get("/cards")
-async def list_cards(
-    q: Optional[str] = None,
-    visibility: str = "normal",
-    speaker_id: Optional[int] = None,
-    role_major_id: Optional[int] = None,
-    role_id: Optional[int] = None,
-    role_unset: Optional[bool] = None,
-    thread_id: Optional[str] = None,
-    date_from: Optional[str] = None,
-    date_to: Optional[str] = None,
-    sort_by: str = "conversation_at",
-    sort_dir: str = "asc",
-    limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
-) -> dict:
-    sort_whitelist = {
-        "conversation_at": "c.conversation_at",
-        "created_at": "c.created_at",
-        "card_role_confidence": "c.card_role_confidence",
-        "updated_at": "c.updated_at",
-    }
-    if sort_by not in sort_whitelist:
-        raise HTTPException(status_code=400, detail="Invalid sort_by")
-    if sort_dir.lower() not in {"asc", "desc"}:
-        raise HTTPException(status_code=400, detail="Invalid sort_dir")
-
-    with db_session() as conn:
-        total_query = """
-            SELECT COUNT(1)
-            FROM cards c
-            LEFT JOIN speakers s ON s.speaker_id = c.speaker_id
-            LEFT JOIN card_roles cr ON cr.card_role_id = c.card_role_id
-            LEFT JOIN card_role_major_items m ON m.card_role_major_item_id = cr.card_role_major_item_id
-            WHERE 1=1
-              AND c.visibility = :visibility
-              AND (:speaker_id IS NULL OR c.speaker_id = :speaker_id)
-              AND (:role_major_id IS NULL OR m.card_role_major_item_id = :role_major_id)
-              AND (:role_id IS NULL OR c.card_role_id = :role_id)
-              AND (:role_unset IS NULL OR (:role_unset = 1 AND c.card_role_id IS NULL))
-              AND (:thread_id IS NULL OR c.thread_id = :thread_id)
-              AND (:date_from IS NULL OR c.conversation_at >= :date_from)
-              AND (:date_to IS NULL OR c.conversation_at <= :date_to)
-              AND (:q IS NULL OR c.contents LIKE '%' || :q || '%');
-        """
-        params = {
-            "visibility": visibility,
-            "speaker_id": speaker_id,
-            "role_major_id": role_major_id,
-            "role_id": role_id,
-            "role_unset": 1 if role_unset else None,
-            "thread_id": thread_id,
-            "date_from": date_from,
-            "date_to": date_to,
-            "q": q,
-        }
-        total = conn.execute(total_query, params).fetchone()[0]
-
-        items_query = f"""
-            SELECT
-              c.card_id, c.thread_id, c.message_id, c.text_id, c.split_version,
-              c.speaker_id, s.speaker_name, c.conversation_at,
-              c.visibility, c.card_role_id,
-              m.major_name AS card_role_major_name,
-              cr.minor_name AS card_role_name,
-              c.card_role_confidence,
-              c.contents
-            FROM cards c
-            LEFT JOIN speakers s ON s.speaker_id = c.speaker_id
-            LEFT JOIN card_roles cr ON cr.card_role_id = c.card_role_id
-            LEFT JOIN card_role_major_items m ON m.card_role_major_item_id = cr.card_role_major_item_id
-            WHERE 1=1
-              AND c.visibility = :visibility
-              AND (:speaker_id IS NULL OR c.speaker_id = :speaker_id)
-              AND (:role_major_id IS NULL OR m.card_role_major_item_id = :role_major_id)
-              AND (:role_id IS NULL OR c.card_role_id = :role_id)
-              AND (:role_unset IS NULL OR (:role_unset = 1 AND c.card_role_id IS NULL))
-              AND (:thread_id IS NULL OR c.thread_id = :thread_id)
-              AND (:date_from IS NULL OR c.conversation_at >= :date_from)
-              AND (:date_to IS NULL OR c.conversation_at <= :date_to)
-              AND (:q IS NULL OR c.contents LIKE '%' || :q || '%')
-            ORDER BY {sort_whitelist[sort_by]} {sort_dir.upper()}
-            LIMIT :limit OFFSET :offset;
-        """
-        params.update({"limit": limit, "offset": offset})
-        items = fetch_all(conn, items_query, params)
-
-    return {"total": total, "items": items}
-
-
-@app.get("/cards/{card_id}")
-async def get_card(card_id: int, context_prev_messages: int = 2, context_next_messages: int = 3) -> dict:
-    with db_session() as conn:
-        card_query = """
-            SELECT
-              c.*, s.speaker_name,
-              m.major_name AS card_role_major_name,
-              cr.minor_name AS card_role_name
-            FROM cards c
-            LEFT JOIN speakers s ON s.speaker_id = c.speaker_id
-            LEFT JOIN card_roles cr ON cr.card_role_id = c.card_role_id
-            LEFT JOIN card_role_major_items m ON m.card_role_major_item_id = cr.card_role_major_item_id
-            WHERE c.card_id = :card_id;
-        """
-        card = fetch_one(conn, card_query, {"card_id": card_id})
-        if not card:
-            raise HTTPException(status_code=404, detail="Card not found")
-        key_query = """
-            SELECT thread_id, message_id, split_version, text_id
-            FROM cards
-            WHERE card_id = :card_id;
-        """
-        key = fetch_one(conn, key_query, {"card_id": card_id})
-        message_id = key["message_id"]
-        context_query = """
-            SELECT
-              c.card_id,
-              c.message_id,
-              c.text_id,
-              c.split_key,
-              c.contents,
-              c.speaker_id,
-              s.speaker_name,
-              cr.minor_name AS card_role_name
-            FROM cards c
-            LEFT JOIN speakers s ON s.speaker_id = c.speaker_id
-            LEFT JOIN card_roles cr ON cr.card_role_id = c.card_role_id
-            WHERE c.thread_id = :thread_id
-              AND c.split_version = :split_version
-              AND c.message_id IN (:prev_message_id, :message_id, :next_message_id)
-            ORDER BY c.message_id ASC, c.split_key ASC;
-        """
-        context_items = fetch_all(
-            conn,
-            context_query,
-            {
-                "thread_id": key["thread_id"],
-                "split_version": key["split_version"],
-                "prev_message_id": message_id - 1,
-                "message_id": message_id,
-                "next_message_id": message_id + 1,
-            },
-        )
-
-    return {
-        "card": card,
-        "context_messages": {"items": context_items},
-    }
-
-
-@app.patch("/cards/{card_id}")
-async def update_card(card_id: int, payload: CardUpdate) -> dict:
-    with db_session() as conn:
-        existing = fetch_one(conn, "SELECT card_id FROM cards WHERE card_id = :card_id", {"card_id": card_id})
-        if not existing:
-            raise HTTPException(status_code=404, detail="Card not found")
-        conn.execute(
-            """
-            UPDATE cards
-            SET
-              thread_id = COALESCE(:thread_id, thread_id),
-              message_id = COALESCE(:message_id, message_id),
-              text_id = COALESCE(:text_id, text_id),
-              split_key = COALESCE(:split_key, split_key),
-              split_version = COALESCE(:split_version, split_version),
-              speaker_id = COALESCE(:speaker_id, speaker_id),
-              conversation_at = COALESCE(:conversation_at, conversation_at),
-              contents = COALESCE(:contents, contents),
-              is_edited = CASE
-                WHEN :is_edited IS NOT NULL THEN :is_edited
-                WHEN :contents IS NOT NULL THEN 1
-                ELSE is_edited
-              END,
-              visibility = COALESCE(:visibility, visibility),
-              card_role_id = COALESCE(:card_role_id, card_role_id),
-              card_role_confidence = CASE
-                WHEN :card_role_confidence IS NOT NULL THEN :card_role_confidence
-                WHEN :card_role_id IS NOT NULL THEN NULL
-                ELSE card_role_confidence
-              END,
-              created_at = COALESCE(:created_at, created_at),
-              updated_at = COALESCE(:updated_at, CURRENT_TIMESTAMP)
-            WHERE card_id = :card_id;
-            """,
-            {
-                "thread_id": payload.thread_id,
-                "message_id": payload.message_id,
-                "text_id": payload.text_id,
-                "split_key": payload.split_key,
-                "split_version": payload.split_version,
-                "speaker_id": payload.speaker_id,
-                "conversation_at": payload.conversation_at,
-                "contents": payload.contents,
-                "is_edited": payload.is_edited,
-                "visibility": payload.visibility,
-                "card_role_id": payload.card_role_id,
-                "card_role_confidence": payload.card_role_confidence,
-                "created_at": payload.created_at,
-                "updated_at": payload.updated_at,
-                "card_id": card_id,
-            },
-        )
-
-    return {"card_id": card_id}
-
-
-def _assign_split_keys(
-    conn: sqlite3.Connection,
-    order_items: Iterable[dict[str, Any]],
-    temp_id_map: dict[str, int],
-) -> None:
-    grouped: dict[int, list[int]] = {}
-    for item in order_items:
-        message_id = item["message_id"]
-        card_id = item.get("card_id")
-        if card_id is None and item.get("temp_id"):
-            card_id = temp_id_map.get(item["temp_id"])
-        if card_id is None:
-            continue
-        grouped.setdefault(message_id, []).append(card_id)
-    for message_id, ordered_ids in grouped.items():
-        for index, card_id in enumerate(ordered_ids, start=1):
-            conn.execute(
-                """
-                UPDATE cards
-                SET split_key = :split_key,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE card_id = :card_id
-                  AND message_id = :message_id;
-                """,
-                {"split_key": index, "card_id": card_id, "message_id": message_id},
-            )
-
-
-@app.post("/cards/context:save")
-async def save_context_edits(payload: ContextSaveRequest) -> dict:
-    edited_map = {item.card_id: item.contents for item in payload.items}
-    split_sources = {split.source_card_id for split in payload.splits}
-    temp_id_map: dict[str, int] = {}
-    with db_session() as conn:
-        for card_id, contents in edited_map.items():
-            conn.execute(
-                """
-                UPDATE cards
-                SET contents = :contents,
-                    is_edited = 1,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE card_id = :card_id;
-                """,
-                {"card_id": card_id, "contents": contents},
-            )
-
-        for merge in payload.merges:
-            target_contents = edited_map.get(merge.target_card_id)
-            if target_contents is None:
-                target = fetch_one(
-                    conn,
-                    "SELECT contents FROM cards WHERE card_id = :card_id;",
-                    {"card_id": merge.target_card_id},
-                )
-                source = fetch_one(
-                    conn,
-                    "SELECT contents FROM cards WHERE card_id = :card_id;",
-                    {"card_id": merge.source_card_id},
-                )
-                if not target or not source:
-                    raise HTTPException(status_code=404, detail="Card not found")
-                target_contents = f"{target['contents']}\n{source['contents']}"
-            conn.execute(
-                """
-                UPDATE cards
-                SET contents = :contents,
-                    is_edited = 1,
-                    card_role_id = NULL,
-                    card_role_confidence = NULL,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE card_id = :card_id;
-                """,
-                {"card_id": merge.target_card_id, "contents": target_contents},
-            )
-            conn.execute(
-                "DELETE FROM cards WHERE card_id = :card_id",
-                {"card_id": merge.source_card_id},
-            )
-
-        for source_card_id in split_sources:
-            contents_override = edited_map.get(source_card_id)
-            if contents_override is None:
-                conn.execute(
-                    """
-                    UPDATE cards
-                    SET is_edited = 1,
-                        card_role_id = NULL,
-                        card_role_confidence = NULL,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE card_id = :card_id;
-                    """,
-                    {"card_id": source_card_id},
-                )
-            else:
-                conn.execute(
-                    """
-                    UPDATE cards
-                    SET contents = :contents,
-                        is_edited = 1,
-                        card_role_id = NULL,
-                        card_role_confidence = NULL,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE card_id = :card_id;
-                    """,
-                    {"card_id": source_card_id, "contents": contents_override},
-                )
-
-        for split in payload.splits:
-            source_row = fetch_one(
-                conn,
-                "SELECT * FROM cards WHERE card_id = :card_id;",
-                {"card_id": split.source_card_id},
-            )
-            if not source_row:
-                raise HTTPException(status_code=404, detail="Card not found")
-            new_text_id = (
-                fetch_one(
-                    conn,
-                    """
-                    SELECT COALESCE(MAX(text_id), 0) AS max_text_id
-                    FROM cards
-                    WHERE thread_id = :thread_id
-                      AND message_id = :message_id;
-                    """,
-                    {"thread_id": source_row["thread_id"], "message_id": source_row["message_id"]},
-                )["max_text_id"]
-                + 1
-            )
-            cur = conn.execute(
-                """
-                INSERT INTO cards (
-                  thread_id,
-                  message_id,
-                  text_id,
-                  split_key,
-                  split_version,
-                  speaker_id,
-                  conversation_at,
-                  contents,
-                  is_edited,
-                  card_role_id,
-                  card_role_confidence,
-                  visibility,
-                  created_at,
-                  updated_at
-                )
-                VALUES (
-                  :thread_id,
-                  :message_id,
-                  :text_id,
-                  :split_key,
-                  :split_version,
-                  :speaker_id,
-                  :conversation_at,
-                  :contents,
-                  1,
-                  NULL,
-                  NULL,
-                  :visibility,
-                  CURRENT_TIMESTAMP,
-                  CURRENT_TIMESTAMP
-                );
-                """,
-                {
-                    "thread_id": source_row["thread_id"],
-                    "message_id": source_row["message_id"],
-                    "text_id": new_text_id,
-                    "split_key": new_text_id,
-                    "split_version": source_row["split_version"],
-                    "speaker_id": source_row["speaker_id"],
-                    "conversation_at": source_row["conversation_at"],
-                    "contents": split.contents,
-                    "visibility": source_row["visibility"],
-                },
-            )
-            if split.temp_id:
-                temp_id_map[split.temp_id] = cur.lastrowid
-
-        if (payload.merges or payload.splits) and payload.order:
-            order_items = [item.dict() for item in payload.order]
-            _assign_split_keys(conn, order_items, temp_id_map)
-
-    return {"saved": True}
-
-
-@app.post("/cards/{card_id}/role:recompute", status_code=202)
-async def recompute_role(card_id: int) -> dict:
-    with db_session() as conn:
-        updated = conn.execute(
-            """
-            UPDATE cards
-            SET card_role_id = NULL,
-                card_role_confidence = NULL,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE card_id = :card_id;
-            """,
-            {"card_id": card_id},
-        ).rowcount
-    if updated == 0:
-        raise HTTPException(status_code=404, detail="Card not found")
-    return {"queued": True}
-
-
-@app.post("/cards/roles:backfill", status_code=202)
-async def backfill_roles(body: dict) -> dict:
-    thread_id = body.get("thread_id")
-    visibility = body.get("visibility")
-    limit = body.get("limit", 200)
-    with db_session() as conn:
-        query = """
-            SELECT card_id
-            FROM cards
-            WHERE card_role_id IS NULL
-              AND (:thread_id IS NULL OR thread_id = :thread_id)
-              AND (:visibility IS NULL OR visibility = :visibility)
-            LIMIT :limit;
-        """
-        cards = fetch_all(conn, query, {"thread_id": thread_id, "visibility": visibility, "limit": limit})
-    return {"queued_count": len(cards)}
-
-
-@app.get("/cards/roles:status")
-async def role_status(thread_id: Optional[str] = None, visibility: Optional[str] = None) -> dict:
-    with db_session() as conn:
-        pending = conn.execute(
-            """
-            SELECT COUNT(1) AS pending
-            FROM cards
-            WHERE (:thread_id IS NULL OR thread_id = :thread_id)
-              AND (:visibility IS NULL OR visibility = :visibility)
-              AND card_role_id IS NULL;
-            """,
-            {"thread_id": thread_id, "visibility": visibility},
-        ).fetchone()[0]
-        last = conn.execute("SELECT MAX(updated_at) FROM cards").fetchone()[0]
-    return {"pending": pending, "failed": 0, "last_updated_at": last}
-
-
-@app.get("/threads/{thread_id}/messages/{message_id}")
-async def get_message_cards(thread_id: str, message_id: int, split_version: int = 1) -> dict:
-    with db_session() as conn:
-        rows = fetch_all(
-            conn,
-            """
-            SELECT c.card_id, c.text_id, c.contents, cr.minor_name AS card_role_name
-            FROM cards c
-            LEFT JOIN card_roles cr ON cr.card_role_id = c.card_role_id
-            WHERE c.thread_id = :thread_id
-              AND c.message_id = :message_id
-              AND c.split_version = :split_version
-            ORDER BY c.text_id ASC;
-            """,
-            {"thread_id": thread_id, "message_id": message_id, "split_version": split_version},
-        )
-    return {
-        "thread_id": thread_id,
-        "message_id": message_id,
-        "split_version": split_version,
-        "cards": rows,
-    }
-
-
-@app.post("/cards/{card_id}/merge-into-previous")
-async def merge_into_previous(card_id: int) -> dict:
-    with db_session() as conn:
-        base = fetch_one(
-            conn,
-            """
-            SELECT card_id, thread_id, message_id, split_version, text_id, contents
-            FROM cards
-            WHERE card_id = :card_id;
-            """,
-            {"card_id": card_id},
-        )
-        if not base:
-            raise HTTPException(status_code=404, detail="Card not found")
-        upper = fetch_one(
-            conn,
-            """
-            SELECT card_id, contents
-            FROM cards
-            WHERE thread_id = :thread_id
-              AND message_id = :message_id
-              AND split_version = :split_version
-              AND text_id < :text_id
-            ORDER BY text_id DESC
-            LIMIT 1;
-            """,
-            {
-                "thread_id": base["thread_id"],
-                "message_id": base["message_id"],
-                "split_version": base["split_version"],
-                "text_id": base["text_id"],
-            },
-        )
-        if not upper:
-            raise HTTPException(status_code=400, detail="No previous card to merge into")
-        merged_contents = f"{upper['contents']}\n{base['contents']}"
-        conn.execute(
-            """
-            UPDATE cards
-            SET contents = :contents,
-                is_edited = 1,
-                card_role_id = NULL,
-                card_role_confidence = NULL,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE card_id = :card_id;
-            """,
-            {"contents": merged_contents, "card_id": upper["card_id"]},
-        )
-        conn.execute("DELETE FROM cards WHERE card_id = :card_id", {"card_id": base["card_id"]})
-    return {"merged_into_card_id": upper["card_id"], "deleted_card_id": base["card_id"]}
-
-
-@app.delete("/cards/{card_id}", status_code=204)
-async def delete_card(card_id: int) -> Response:
-    with db_session() as conn:
-        deleted = conn.execute("DELETE FROM cards WHERE card_id = :card_id", {"card_id": card_id}).rowcount
-    if deleted == 0:
-        raise HTTPException(status_code=404, detail="Card not found")
-    return Response(status_code=204)
-
-
-@app.get("/cards/{card_id}/links")
-async def list_card_links(
-    card_id: int,
-    kind: Optional[str] = None,
-    sort_by: str = "confidence",
-    sort_dir: str = "desc",
-    limit: int = Query(20, ge=1, le=200),
-    offset: int = Query(0, ge=0),
-) -> dict:
-    sort_map = {
-        "confidence": "cl.confidence",
-        "conversation_at": "c2.conversation_at",
-    }
-    if sort_by not in sort_map:
-        raise HTTPException(status_code=400, detail="Invalid sort_by")
-    if sort_dir.lower() not in {"asc", "desc"}:
-        raise HTTPException(status_code=400, detail="Invalid sort_dir")
-    with db_session() as conn:
-        counts = fetch_all(
-            conn,
-            """
-            SELECT lk.link_kind_name, COUNT(1) AS cnt
-            FROM card_links cl
-            JOIN link_kinds lk ON lk.link_kind_id = cl.link_kind_id
-            WHERE cl.from_card_id = :card_id
-            GROUP BY lk.link_kind_name;
-            """,
-            {"card_id": card_id},
-        )
-        counts_by_kind = {row["link_kind_name"]: row["cnt"] for row in counts}
-        items = fetch_all(
-            conn,
-            f"""
-            SELECT
-              cl.link_id,
-              lk.link_kind_name,
-              cl.confidence,
-              cl.from_card_id,
-              cl.to_card_id,
-              c2.card_id AS to_card_id,
-              c2.conversation_at AS to_conversation_at,
-              c2.contents AS to_contents,
-              cr2.minor_name AS to_card_role_name
-            FROM card_links cl
-            JOIN link_kinds lk ON lk.link_kind_id = cl.link_kind_id
-            JOIN cards c2 ON c2.card_id = cl.to_card_id
-            LEFT JOIN card_roles cr2 ON cr2.card_role_id = c2.card_role_id
-            WHERE cl.from_card_id = :card_id
-              AND (:kind IS NULL OR lk.link_kind_name = :kind)
-            ORDER BY {sort_map[sort_by]} {sort_dir.upper()}
-            LIMIT :limit OFFSET :offset;
-            """,
-            {"card_id": card_id, "kind": kind, "limit": limit, "offset": offset},
-        )
-    wrapped = []
-    for row in items:
-        wrapped.append(
-            {
-                "link_id": row["link_id"],
-                "link_kind_name": row["link_kind_name"],
-                "confidence": row["confidence"],
-                "from_card_id": row["from_card_id"],
-                "to_card_id": row["to_card_id"],
-                "to_card": {
-                    "card_id": row["to_card_id"],
-                    "card_role_name": row["to_card_role_name"],
-                    "conversation_at": row["to_conversation_at"],
-                    "contents": row["to_contents"],
-                },
-            }
-        )
-    return {"counts_by_kind": counts_by_kind, "items": wrapped}
-
-
-@app.patch("/links/{link_id}")
-async def update_link(link_id: int, payload: LinkKindUpdate) -> dict:
-    with db_session() as conn:
-        updated = conn.execute(
-            """
-            UPDATE card_links
-            SET link_kind_id = :link_kind_id,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE link_id = :link_id;
-            """,
-            {"link_kind_id": payload.link_kind_id, "link_id": link_id},
-        ).rowcount
-    if updated == 0:
-        raise HTTPException(status_code=404, detail="Link not found")
-    return {"link_id": link_id}
-
-
-@app.delete("/links/{link_id}", status_code=204)
-async def delete_link(link_id: int) -> Response:
-    with db_session() as conn:
-        deleted = conn.execute("DELETE FROM card_links WHERE link_id = :link_id", {"link_id": link_id}).rowcount
-    if deleted == 0:
-        raise HTTPException(status_code=404, detail="Link not found")
-    return Response(status_code=204)
-
-
-_IMPORT_DELIM_PATTERN = re.compile(r"(。|！　|？　|♪　|[a-z]\. |\)\. |\.\" |! |\? )")
-
-
-def _normalize_import_text(raw_text: str) -> str:
-    return raw_text.replace("\r\n", "\n").replace("\r", "\n")
-
-
-def _find_first_delim_end(text: str, start: int) -> Optional[int]:
-    match = _IMPORT_DELIM_PATTERN.search(text, pos=start)
-    return match.end() if match else None
-
-
-def _find_first_double_newline(text: str, start: int) -> Optional[int]:
-    idx = text.find("\n\n", start)
-    return idx if idx != -1 else None
-
-
-def _split_speaker_text(text: str, *, allow_overlap: bool) -> list[str]:
-    parts: list[str] = []
-    text_len = len(text)
-    start = 0
-    prev_end = 0
-    while start < text_len:
-        while start < text_len and text[start].isspace():
-            start += 1
-        if start >= text_len:
-            break
-        search_from = max(start, prev_end) if allow_overlap else start
-        min_double_start = start + 300
-        double_search_from = max(search_from, min_double_start)
-        next_double = _find_first_double_newline(text, double_search_from)
-
-        next_delim = None
-        min_delim_start = start + 450
-        if text_len > min_delim_start:
-            delim_search_from = max(search_from, min_delim_start)
-            next_delim = _find_first_delim_end(text, delim_search_from)
-
-        end: Optional[int] = None
-        if next_double is not None:
-            end = next_double
-        elif next_delim is not None:
-            end = next_delim
-
-        if end is None:
-            end = start + 600 if (start + 600) < text_len else text_len
-
-        if end <= start:
-            end = min(start + 1, text_len)
-
-        segment = text[start:end].strip()
-        if segment:
-            parts.append(segment)
-
-        prev_end = end
-        if prev_end >= text_len:
-            break
-
-        if allow_overlap:
-            overlap_start = max(0, prev_end - 80)
-            overlap_delim = _find_first_delim_end(text, overlap_start)
-            if overlap_delim is not None and overlap_delim < prev_end:
-                start = overlap_delim
-                continue
-        start = prev_end
-
-    return parts
-
-
-def _merge_short_segments(segments: list[str], *, min_len: int) -> list[str]:
-    if not segments:
-        return []
-    merged: list[str] = []
-    buffer = ""
-    for segment in segments:
-        if buffer:
-            buffer = f"{buffer}\n{segment}"
-        else:
-            buffer = segment
-        if len(buffer) >= min_len:
-            merged.append(buffer)
-            buffer = ""
-    if buffer:
-        merged.append(buffer)
-    return merged
-
-
-def _split_import_blocks(raw_text: str, speaker_map: dict[str, dict]) -> list[tuple[dict, str]]:
-    normalized = _normalize_import_text(raw_text)
-    lines = normalized.split("\n")
-    blocks: list[tuple[dict, str]] = []
-    current_speaker: Optional[dict] = None
-    current_lines: list[str] = []
-
-    def flush_block() -> None:
-        nonlocal current_lines
-        if current_speaker is None:
-            return
-        text = "\n".join(current_lines).strip()
-        if text:
-            blocks.append((current_speaker, text))
-        current_lines = []
-
-    for line in lines:
-        normalized_line = line.strip().replace("：", ":")
-        if normalized_line:
-            speaker_label, remainder = normalized_line.split(":", 1) if ":" in normalized_line else (None, None)
-            if speaker_label and speaker_label in speaker_map:
-                flush_block()
-                current_speaker = speaker_map[speaker_label]
-                remainder = remainder.strip() if remainder else ""
-                if remainder:
-                    current_lines.append(remainder)
-                continue
-        if current_speaker is None:
-            if not normalized_line:
-                continue
-            raise HTTPException(status_code=400, detail="Speaker definition line is required before content.")
-        current_lines.append(line.rstrip())
-
-    flush_block()
-    return blocks
-
-
-def split_import_text(raw_text: str, speaker_map: dict[str, dict]) -> list[dict]:
-    parts: list[dict] = []
-    message_id = 0
-    text_id = 0
-    for speaker, text in _split_import_blocks(raw_text, speaker_map):
-        message_id += 1
-        text_id = 0
-        segments = _split_speaker_text(text, allow_overlap=True)
-        segments = _merge_short_segments(segments, min_len=300)
-        for segment in segments:
-            text_id += 1
-            parts.append(
-                {
-                    "message_id": message_id,
-                    "text_id": text_id,
-                    "speaker_id": speaker["speaker_id"],
-                    "speaker_name": speaker["speaker_name"],
-                    "contents": segment,
-                }
-            )
-    return parts
-
-
-@app.post("/import/preview")
-async def import_preview(payload: ImportPreviewRequest) -> ImportPreviewResponse:
-    with db_session() as conn:
-        speakers = fetch_all(conn, "SELECT speaker_id, speaker_name, speaker_role FROM speakers ORDER BY speaker_id", {})
-    speaker_map = {speaker["speaker_role"]: speaker for speaker in speakers}
-    parts = split_import_text(payload.raw_text, speaker_map)
-    return ImportPreviewResponse(
-        thread_id=str(uuid.uuid4()),
-        split_version=1,
-        parts=parts,
-    )
-
-
-@app.post("/import/commit", status_code=201)
-async def import_commit(payload: ImportCommitRequest) -> dict:
-    created_ids: list[int] = []
-    with db_session() as conn:
-        meaningless_rows = fetch_all(
-            conn,
-            "SELECT phrase, card_role_id FROM meaningless_phrases ORDER BY meaningless_id",
-            {},
-        )
-        meaningless_map: dict[str, int] = {}
-        for row in meaningless_rows:
-            phrase = row["phrase"]
-            if phrase not in meaningless_map:
-                meaningless_map[phrase] = row["card_role_id"]
-        for part in payload.parts:
-            split_key = part["text_id"]
-            matched_role_id = meaningless_map.get(part["contents"])
-            cur = conn.execute(
-                """
-                INSERT INTO cards (
-                  thread_id, message_id, text_id, split_key, split_version,
-                  speaker_id, conversation_at,
-                  contents, is_edited, visibility,
-                  card_role_id, card_role_confidence,
-                  created_at, updated_at
-                ) VALUES (
-                  :thread_id, :message_id, :text_id, :split_key, :split_version,
-                  :speaker_id, CURRENT_TIMESTAMP,
-                  :contents, 0, 'normal',
-                  :card_role_id, :card_role_confidence,
-                  CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
-                );
-                """,
-                {
-                    "thread_id": payload.thread_id,
-                    "message_id": part["message_id"],
-                    "text_id": part["text_id"],
-                    "split_key": split_key,
-                    "split_version": 1,
-                    "speaker_id": part["speaker_id"],
-                    "contents": part["contents"],
-                    "card_role_id": matched_role_id,
-                    "card_role_confidence": 0.8,
-                },
-            )
-            created_ids.append(cur.lastrowid)
-    return {"created_card_ids": created_ids, "thread_id": payload.thread_id}
-
-
-@app.post("/import/{thread_id}/roles:run", status_code=202)
-async def import_roles_run(thread_id: str, body: dict) -> dict:
-    return {"queued": True}
-
-
-@app.post("/link-suggestions/generate", status_code=201)
-async def generate_link_suggestions(payload: LinkSuggestionGenerateRequest) -> dict:
-    created = 0
-    skipped = 0
-    with db_session() as conn:
-        for from_id in payload.from_card_ids:
-            for to_id in payload.to_card_ids:
-                if from_id == to_id:
-                    continue
-                row = conn.execute(
-                    """
-                    INSERT OR IGNORE INTO link_suggestions (
-                      from_card_id, to_card_id, status, created_at, updated_at
-                    ) VALUES (
-                      :from_card_id, :to_card_id, 'queued', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
-                    );
-                    """,
-                    {"from_card_id": from_id, "to_card_id": to_id},
-                )
-                if row.rowcount == 1:
-                    created += 1
-                else:
-                    skipped += 1
-    return {"created": created, "skipped": skipped}
-
-
-@app.post("/link-suggestions/run", status_code=202)
-async def run_link_suggestions(payload: LinkSuggestionRunRequest) -> dict:
-    return {"queued": True}
-
-
-@app.get("/link-suggestions")
-async def list_link_suggestions(
-    status: Optional[str] = None,
-    from_card_id: Optional[int] = None,
-    to_card_id: Optional[int] = None,
-    sort_by: str = "updated_at",
-    sort_dir: str = "desc",
-    limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
-) -> dict:
-    sort_map = {
-        "updated_at": "ls.updated_at",
-        "created_at": "ls.created_at",
-        "suggested_confidence": "ls.suggested_confidence",
-    }
-    if sort_by not in sort_map:
-        raise HTTPException(status_code=400, detail="Invalid sort_by")
-    if sort_dir.lower() not in {"asc", "desc"}:
-        raise HTTPException(status_code=400, detail="Invalid sort_dir")
-    with db_session() as conn:
-        total = conn.execute(
-            """
-            SELECT COUNT(1)
-            FROM link_suggestions ls
-            WHERE 1=1
-              AND (:status IS NULL OR ls.status = :status)
-              AND (:from_card_id IS NULL OR ls.from_card_id = :from_card_id)
-              AND (:to_card_id IS NULL OR ls.to_card_id = :to_card_id);
-            """,
-            {"status": status, "from_card_id": from_card_id, "to_card_id": to_card_id},
-        ).fetchone()[0]
-        items = fetch_all(
-            conn,
-            f"""
-            SELECT
-              ls.suggestion_id, ls.from_card_id, ls.to_card_id,
-              c_from.contents AS from_card_contents,
-              c_to.contents AS to_card_contents,
-              (
-                SELECT lk2.link_kind_name
-                FROM card_links cl2
-                LEFT JOIN link_kinds lk2 ON lk2.link_kind_id = cl2.link_kind_id
-                WHERE cl2.from_card_id = ls.from_card_id
-                  AND cl2.to_card_id = ls.to_card_id
-                ORDER BY cl2.updated_at DESC
-                LIMIT 1
-              ) AS existing_link_kind_name,
-              (
-                SELECT cl3.confidence
-                FROM card_links cl3
-                WHERE cl3.from_card_id = ls.from_card_id
-                  AND cl3.to_card_id = ls.to_card_id
-                ORDER BY cl3.updated_at DESC
-                LIMIT 1
-              ) AS existing_link_confidence,
-              ls.status, ls.suggested_link_kind_id,
-              lk.link_kind_name AS suggested_link_kind_name,
-              ls.suggested_confidence
-            FROM link_suggestions ls
-            LEFT JOIN cards c_from ON c_from.card_id = ls.from_card_id
-            LEFT JOIN cards c_to ON c_to.card_id = ls.to_card_id
-            LEFT JOIN link_kinds lk ON lk.link_kind_id = ls.suggested_link_kind_id
-            WHERE 1=1
-              AND (:status IS NULL OR ls.status = :status)
-              AND (:from_card_id IS NULL OR ls.from_card_id = :from_card_id)
-              AND (:to_card_id IS NULL OR ls.to_card_id = :to_card_id)
-            ORDER BY {sort_map[sort_by]} {sort_dir.upper()}
-            LIMIT :limit OFFSET :offset;
-            """,
-            {
-                "status": status,
-                "from_card_id": from_card_id,
-                "to_card_id": to_card_id,
-                "limit": limit,
-                "offset": offset,
-            },
-        )
-    return {"total": total, "items": items}
-
-
-@app.post("/link-suggestions/{suggestion_id}/rerun", status_code=202)
-async def rerun_link_suggestion(suggestion_id: int) -> dict:
-    with db_session() as conn:
-        updated = conn.execute(
-            """
-            UPDATE link_suggestions
-            SET status = 'queued', updated_at = CURRENT_TIMESTAMP
-            WHERE suggestion_id = :suggestion_id;
-            """,
-            {"suggestion_id": suggestion_id},
-        ).rowcount
-    if updated == 0:
-        raise HTTPException(status_code=404, detail="Suggestion not found")
-    return {"queued": True}
-
-
-@app.post("/link-suggestions/{suggestion_id}/approve", status_code=201)
-async def approve_link_suggestion(suggestion_id: int, payload: LinkSuggestionApproveRequest) -> dict:
-    with db_session() as conn:
-        suggestion = fetch_one(
-            conn,
-            """
-            SELECT from_card_id, to_card_id, suggested_link_kind_id, suggested_confidence, status
-            FROM link_suggestions
-            WHERE suggestion_id = :suggestion_id;
-            """,
-            {"suggestion_id": suggestion_id},
-        )
-        if not suggestion:
-            raise HTTPException(status_code=404, detail="Suggestion not found")
-        kind_id = payload.link_kind_id or suggestion["suggested_link_kind_id"]
-        link_id = None
-        if kind_id is None:
-            if not (
-                suggestion["status"] == "success"
-                and suggestion["suggested_link_kind_id"] is None
-            ):
-                raise HTTPException(status_code=400, detail="link_kind_id is required")
-        else:
-            existing_link = fetch_one(
-                conn,
-                """
-                SELECT link_id
-                FROM card_links
-                WHERE from_card_id = :from_card_id
-                  AND to_card_id = :to_card_id
-                ORDER BY updated_at DESC
-                LIMIT 1;
-                """,
-                {
-                    "from_card_id": suggestion["from_card_id"],
-                    "to_card_id": suggestion["to_card_id"],
-                },
-            )
-            if existing_link:
-                conn.execute(
-                    """
-                    UPDATE card_links
-                    SET link_kind_id = :link_kind_id,
-                        confidence = :confidence,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE link_id = :link_id;
-                    """,
-                    {
-                        "link_kind_id": kind_id,
-                        "confidence": suggestion["suggested_confidence"],
-                        "link_id": existing_link["link_id"],
-                    },
-                )
-                link_id = existing_link["link_id"]
-            else:
-                cur = conn.execute(
-                    """
-                    INSERT INTO card_links (
-                      link_kind_id, from_card_id, to_card_id, confidence, created_at, updated_at
-                    ) VALUES (
-                      :link_kind_id, :from_card_id, :to_card_id, :confidence, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
-                    );
-                    """,
-                    {
-                        "link_kind_id": kind_id,
-                        "from_card_id": suggestion["from_card_id"],
-                        "to_card_id": suggestion["to_card_id"],
-                        "confidence": suggestion["suggested_confidence"],
-                    },
-                )
-                link_id = cur.lastrowid
-        conn.execute(
-            """
-            UPDATE link_suggestions
-            SET status = 'approved',
-                expires_at = datetime('now', '+7 days'),
-                updated_at = CURRENT_TIMESTAMP
-            WHERE suggestion_id = :suggestion_id;
-            """,
-            {"suggestion_id": suggestion_id},
-        )
-    return {"link_id": link_id}
-
-
-@app.post("/link-suggestions/{suggestion_id}/reject")
-async def reject_link_suggestion(suggestion_id: int) -> dict:
-    with db_session() as conn:
-        updated = conn.execute(
-            """
-            UPDATE link_suggestions
-            SET status = 'rejected',
-                expires_at = datetime('now', '+7 days'),
-                updated_at = CURRENT_TIMESTAMP
-            WHERE suggestion_id = :suggestion_id;
-            """,
-            {"suggestion_id": suggestion_id},
-        ).rowcount
-    if updated == 0:
-        raise HTTPException(status_code=404, detail="Suggestion not found")
-    return {"updated": True}
-
-
-@app.post("/link-suggestions/cleanup")
-async def cleanup_link_suggestions() -> dict:
-    with db_session() as conn:
-        deleted = conn.execute(
-            """
-            DELETE FROM link_suggestions
-            WHERE expires_at IS NOT NULL
-              AND expires_at <= CURRENT_TIMESTAMP;
-            """,
-        ).rowcount
-    return {"deleted": deleted}
-
-
-@app.get("/speakers")
-async def list_speakers() -> list[dict]:
-    with db_session() as conn:
-        return fetch_all(conn, "SELECT * FROM speakers ORDER BY speaker_id", {})
-
-
-@app.post("/speakers", status_code=201)
-async def create_speaker(payload: CreateSpeaker) -> dict:
-    with db_session() as conn:
-        cur = conn.execute(
-            """
-            INSERT INTO speakers (speaker_name, speaker_role, canonical_role, created_at, updated_at)
-            VALUES (:speaker_name, :speaker_role, :canonical_role, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP);
-            """,
-            payload.model_dump(),
-        )
-    return {"speaker_id": cur.lastrowid}
-
-
-@app.patch("/speakers/{speaker_id}")
-async def update_speaker(speaker_id: int, payload: UpdateSpeaker) -> dict:
-    data = payload.model_dump(exclude_unset=True)
-    if not data:
-        raise HTTPException(status_code=400, detail="No fields to update")
-    set_clause = ", ".join(f"{key} = :{key}" for key in data.keys())
-    with db_session() as conn:
-        updated = conn.execute(
-            f"UPDATE speakers SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE speaker_id = :speaker_id",
-            {**data, "speaker_id": speaker_id},
-        ).rowcount
-    if updated == 0:
-        raise HTTPException(status_code=404, detail="Speaker not found")
-    return {"speaker_id": speaker_id}
-
-
-@app.delete("/speakers/{speaker_id}", status_code=204)
-async def delete_speaker(speaker_id: int) -> Response:
-    with db_session() as conn:
-        deleted = conn.execute("DELETE FROM speakers WHERE speaker_id = :speaker_id", {"speaker_id": speaker_id}).rowcount
-    if deleted == 0:
-        raise HTTPException(status_code=404, detail="Speaker not found")
-    return Response(status_code=204)
-
-
-@app.get("/card-role-major-items")
-async def list_major_items() -> list[dict]:
-    with db_session() as conn:
-        return fetch_all(conn, "SELECT * FROM card_role_major_items ORDER BY card_role_major_item_id", {})
-
-
-@app.post("/card-role-major-items", status_code=201)
-async def create_major_item(payload: CreateMajorItem) -> dict:
-    with db_session() as conn:
-        cur = conn.execute(
-            "INSERT INTO card_role_major_items (major_name) VALUES (:major_name);",
-            payload.model_dump(),
-        )
-    return {"card_role_major_item_id": cur.lastrowid}
-
-
-@app.patch("/card-role-major-items/{major_id}")
-async def update_major_item(major_id: int, payload: UpdateMajorItem) -> dict:
-    data = payload.model_dump(exclude_unset=True)
-    if not data:
-        raise HTTPException(status_code=400, detail="No fields to update")
-    set_clause = ", ".join(f"{key} = :{key}" for key in data.keys())
-    with db_session() as conn:
-        updated = conn.execute(
-            f"UPDATE card_role_major_items SET {set_clause} WHERE card_role_major_item_id = :major_id",
-            {**data, "major_id": major_id},
-        ).rowcount
-    if updated == 0:
-        raise HTTPException(status_code=404, detail="Major item not found")
-    return {"card_role_major_item_id": major_id}
-
-
-@app.delete("/card-role-major-items/{major_id}", status_code=204)
-async def delete_major_item(major_id: int) -> Response:
-    with db_session() as conn:
-        deleted = conn.execute(
-            "DELETE FROM card_role_major_items WHERE card_role_major_item_id = :major_id",
-            {"major_id": major_id},
-        ).rowcount
-    if deleted == 0:
-        raise HTTPException(status_code=404, detail="Major item not found")
-    return Response(status_code=204)
-
-
-@app.get("/card-roles")
-async def list_card_roles() -> list[dict]:
-    with db_session() as conn:
-        return fetch_all(conn, "SELECT * FROM card_roles ORDER BY card_role_id", {})
-
-
-@app.post("/card-roles", status_code=201)
-async def create_card_role(payload: CreateCardRole) -> dict:
-    with db_session() as conn:
-        cur = conn.execute(
-            """
-            INSERT INTO card_roles (card_role_major_item_id, minor_name, created_at, updated_at)
-            VALUES (:card_role_major_item_id, :minor_name, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP);
-            """,
-            payload.model_dump(),
-        )
-    return {"card_role_id": cur.lastrowid}
-
-
-@app.patch("/card-roles/{role_id}")
-async def update_card_role(role_id: int, payload: UpdateCardRole) -> dict:
-    data = payload.model_dump(exclude_unset=True)
-    if not data:
-        raise HTTPException(status_code=400, detail="No fields to update")
-    set_clause = ", ".join(f"{key} = :{key}" for key in data.keys())
-    with db_session() as conn:
-        updated = conn.execute(
-            f"UPDATE card_roles SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE card_role_id = :role_id",
-            {**data, "role_id": role_id},
-        ).rowcount
-    if updated == 0:
-        raise HTTPException(status_code=404, detail="Card role not found")
-    return {"card_role_id": role_id}
-
-
-@app.delete("/card-roles/{role_id}", status_code=204)
-async def delete_card_role(role_id: int) -> Response:
-    with db_session() as conn:
-        deleted = conn.execute("DELETE FROM card_roles WHERE card_role_id = :role_id", {"role_id": role_id}).rowcount
-    if deleted == 0:
-        raise HTTPException(status_code=404, detail="Card role not found")
-    return Response(status_code=204)
-
-
-@app.get("/link-kinds")
-async def list_link_kinds() -> list[dict]:
-    with db_session() as conn:
-        return fetch_all(conn, "SELECT * FROM link_kinds ORDER BY link_kind_id", {})
-
-
-@app.post("/link-kinds", status_code=201)
-async def create_link_kind(payload: CreateLinkKind) -> dict:
-    with db_session() as conn:
-        cur = conn.execute(
-            "INSERT INTO link_kinds (link_kind_name) VALUES (:link_kind_name);",
-            payload.model_dump(),
-        )
-    return {"link_kind_id": cur.lastrowid}
-
-
-@app.patch("/link-kinds/{link_kind_id}")
-async def update_link_kind(link_kind_id: int, payload: UpdateLinkKind) -> dict:
-    data = payload.model_dump(exclude_unset=True)
-    if not data:
-        raise HTTPException(status_code=400, detail="No fields to update")
-    set_clause = ", ".join(f"{key} = :{key}" for key in data.keys())
-    with db_session() as conn:
-        updated = conn.execute(
-            f"UPDATE link_kinds SET {set_clause} WHERE link_kind_id = :link_kind_id",
-            {**data, "link_kind_id": link_kind_id},
-        ).rowcount
-    if updated == 0:
-        raise HTTPException(status_code=404, detail="Link kind not found")
-    return {"link_kind_id": link_kind_id}
-
-
-@app.delete("/link-kinds/{link_kind_id}", status_code=204)
-async def delete_link_kind(link_kind_id: int) -> Response:
-    with db_session() as conn:
-        deleted = conn.execute(
-            "DELETE FROM link_kinds WHERE link_kind_id = :link_kind_id",
-            {"link_kind_id": link_kind_id},
-        ).rowcount
-    if deleted == 0:
-        raise HTTPException(status_code=404, detail="Link kind not found")
-    return Response(status_code=204)
-
-
-@app.get("/meaningless_phrases")
-async def list_meaningless_phrases() -> list[dict]:
-    with db_session() as conn:
-        return fetch_all(conn, "SELECT * FROM meaningless_phrases ORDER BY meaningless_id", {})
-
-
-@app.post("/meaningless_phrases", status_code=201)
-async def create_meaningless_phrase(payload: CreateMeaninglessPhrase) -> dict:
-    with db_session() as conn:
-        cur = conn.execute(
-            """
-            INSERT INTO meaningless_phrases (card_role_id, phrase, created_at, updated_at)
-            VALUES (:card_role_id, :phrase, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP);
-            """,
-            payload.model_dump(),
-        )
-    return {"meaningless_id": cur.lastrowid}
-
-
-@app.patch("/meaningless_phrases/{meaningless_id}")
-async def update_meaningless_phrase(meaningless_id: int, payload: UpdateMeaninglessPhrase) -> dict:
-    data = payload.model_dump(exclude_unset=True)
-    if not data:
-        raise HTTPException(status_code=400, detail="No fields to update")
-    set_clause = ", ".join(f"{key} = :{key}" for key in data.keys())
-    with db_session() as conn:
-        updated = conn.execute(
-            f"UPDATE meaningless_phrases SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE meaningless_id = :meaningless_id",
-            {**data, "meaningless_id": meaningless_id},
-        ).rowcount
-    if updated == 0:
-        raise HTTPException(status_code=404, detail="Meaningless phrase not found")
-    return {"meaningless_id": meaningless_id}
-
-
-@app.delete("/meaningless_phrases/{meaningless_id}", status_code=204)
-async def delete_meaningless_phrase(meaningless_id: int) -> Response:
-    with db_session() as conn:
-        deleted = conn.execute(
-            "DELETE FROM meaningless_phrases WHERE meaningless_id = :meaningless_id",
-            {"meaningless_id": meaningless_id},
-        ).rowcount
-    if deleted == 0:
-        raise HTTPException(status_code=404, detail="Meaningless phrase not found")
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import uuid
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.middleware.cors import CORSMiddleware
+
+from app.db import (
+    DB_CHECKPOINT_INTERVAL,
+    WalCheckpointer,
+    close_pool,
+    count_cache,
+    db_lane,
+    db_lanes,
+    db_pool_stats,
+    db_session,
+    db_writer,
+    fetch_table_version,
+    init_db,
+)
+from app.background import BackgroundTasks, TaskProgress
+from app.importer import (
+    IMPORT_INSERT_BATCH,
+    IMPORT_PART_FIELDS,
+    ImportFormatError,
+    insert_import_parts,
+    iter_import_blocks,
+    iter_import_parts,
+    iter_upload_lines,
+    load_speaker_map,
+    normalize_import_text,
+)
+from app.job_queue import enqueue_jobs
+from app.similarity import LINK_CANDIDATE_MIN_SIMILARITY, LINK_CANDIDATE_TOP_K, iter_link_candidates
+from app.logging_config import configure_logging
+from app.schemas import (
+    CardDetail,
+    CardListItem,
+    CardUpdate,
+    ContextSaveRequest,
+    CreateCardRole,
+    CreateLinkKind,
+    CreateMajorItem,
+    CreateMeaninglessPhrase,
+    CreateSpeaker,
+    ImportCommitRequest,
+    ImportPreviewRequest,
+    ImportPreviewResponse,
+    LinkKindUpdate,
+    LinkSuggestionApproveRequest,
+    LinkSuggestionGenerateRequest,
+    LinkSuggestionListItem,
+    LinkSuggestionRunRequest,
+    MergeResponse,
+    MessageCardsResponse,
+    SimpleMessageCard,
+    UpdateCardRole,
+    UpdateLinkKind,
+    UpdateMajorItem,
+    UpdateMeaninglessPhrase,
+    UpdateSpeaker,
+)
+
+app = FastAPI(title="Conversation Cards API")
+configure_logging()
+logger = logging.getLogger(__name__)
+wal_checkpointer = WalCheckpointer(DB_CHECKPOINT_INTERVAL)
+background_tasks = BackgroundTasks(
+    max_workers=int(os.environ.get("CONVERSATION_BACKGROUND_WORKERS", "2")),
+    keep=100,
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"] ,
+    allow_credentials=True,
+    allow_methods=["*"] ,
+    allow_headers=["*"] ,
+)
+
+
+@app.middleware("http")
+async def log_request_start(request, call_next):
+    logger.info("API start %s %s", request.method, request.url.path)
+    try:
+        return await call_next(request)
+    except Exception:
+        logger.exception(
+            "Unhandled error during request %s %s",
+            request.method,
+            request.url.path,
+        )
+        raise
+
+
+@app.on_event("startup")
+async def startup() -> None:
+    init_db()
+    wal_checkpointer.start()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    wal_checkpointer.stop()
+    background_tasks.shutdown()
+    db_lanes.shutdown()
+    close_pool()
+
+
+def fetch_one(conn, query: str, params: dict) -> Optional[dict]:
+    cur = conn.execute(query, params)
+    row = cur.fetchone()
+    return dict(row) if row else None
+
+
+def fetch_all(conn, query: str, params: dict) -> list[dict]:
+    cur = conn.execute(query, params)
+    return [dict(row) for row in cur.fetchall()]
+
+
+@app.get("/metrics/db-pool")
+async def get_db_pool_metrics() -> dict:
+    return {**db_pool_stats(), "lanes": db_lanes.stats()}
+
+
+@app.get("/metrics/llm-cache")
+@db_lane("read")
+def get_llm_cache_metrics() -> dict:
+    """Result cache size and the share of finished jobs answered from it."""
+    with db_session() as conn:
+        entries = fetch_all(
+            conn,
+            """
+            SELECT job_type, COUNT(1) AS entries, COALESCE(SUM(hits), 0) AS entry_hits
+            FROM llm_result_cache
+            GROUP BY job_type;
+            """,
+            {},
+        )
+        jobs = fetch_all(
+            conn,
+            """
+            SELECT
+              job_type,
+              COUNT(1) AS finished,
+              COALESCE(SUM(json_extract(result_json, '$.cache_hit')), 0) AS cache_hits
+            FROM llm_jobs
+            WHERE status = 'success'
+            GROUP BY job_type;
+            """,
+            {},
+        )
+    stats = {
+        row["job_type"]: {"entries": row["entries"], "entry_hits": row["entry_hits"]}
+        for row in entries
+    }
+    for row in jobs:
+        item = stats.setdefault(row["job_type"], {"entries": 0, "entry_hits": 0})
+        item["finished"] = row["finished"]
+        item["cache_hits"] = row["cache_hits"]
+        item["hit_rate"] = round(row["cache_hits"] / row["finished"], 4) if row["finished"] else 0.0
+    return stats
+
+
+# The trigram tokenizer cannot match queries shorter than three characters,
+# so those fall back to a LIKE scan.
+FTS_MIN_QUERY_LEN = 3
+SNIPPET_RADIUS = 32
+
+
+def _fts_phrase(q: str) -> str:
+    return '"' + q.replace('"', '""') + '"'
+
+
+def _highlight_snippet(contents: str, q: str) -> Optional[str]:
+    index = contents.lower().find(q.lower())
+    if index < 0:
+        return None
+    start = max(0, index - SNIPPET_RADIUS)
+    end = min(len(contents), index + len(q) + SNIPPET_RADIUS)
+    return (
+        ("…" if start > 0 else "")
+        + contents[start:index]
+        + "<mark>"
+        + contents[index:index + len(q)]
+        + "</mark>"
+        + contents[index + len(q):end]
+        + ("…" if end < len(contents) else "")
+    )
+
+
+def _encode_cursor(sort_by: str, sort_dir: str, sort_key: Any, row_id: int) -> str:
+    raw = json.dumps([sort_by, sort_dir.lower(), sort_key, row_id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_by: str, sort_dir: str) -> tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_by, cursor_sort_dir, sort_key, row_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii"))
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+    if cursor_sort_by != sort_by or cursor_sort_dir != sort_dir.lower() or not isinstance(row_id, int):
+        raise HTTPException(status_code=400, detail="Cursor does not match sort_by/sort_dir")
+    return sort_key, row_id
+
+
+def _keyset_clause(sort_expr: str, id_column: str, sort_dir: str) -> str:
+    operator = ">" if sort_dir.lower() == "asc" else "<"
+    return f"AND ({sort_expr}, {id_column}) {operator} (:cursor_key, :cursor_id)"
+
+
+def _next_cursor(items: list[dict], limit: int, sort_by: str, sort_dir: str, id_key: str) -> Optional[str]:
+    sort_keys = [item.pop("_sort_key") for item in items]
+    if len(items) < limit:
+        return None
+    return _encode_cursor(sort_by, sort_dir, sort_keys[-1], items[-1][id_key])
+
+
+TOTAL_MODES = {"exact", "cached", "estimated"}
+COUNT_ESTIMATE_CAP = 10000
+
+
+def _resolve_total(
+    conn,
+    *,
+    total_mode: str,
+    table_name: str,
+    version: int,
+    signature: tuple,
+    count_body: str,
+    params: dict,
+    page_size: int,
+    limit: int,
+    offset: Optional[int],
+) -> tuple[int, bool]:
+    """Return (total, is_estimate), skipping the COUNT query whenever the page or cache allows.
+
+    offset is None for cursor pages, whose absolute position is unknown.
+    `version` must be read before the page query: a write committing in
+    between then leaves the cached total under a version already outdated,
+    never a stale total under the newer one.
+    """
+    page_is_last = offset is not None and page_size < limit and (page_size > 0 or offset == 0)
+    if total_mode == "exact":
+        return conn.execute(f"SELECT COUNT(1) {count_body};", params).fetchone()[0], False
+    if total_mode == "estimated":
+        if page_is_last:
+            return offset + page_size, False
+        capped = conn.execute(
+            f"SELECT COUNT(1) FROM (SELECT 1 {count_body} LIMIT :count_cap);",
+            {**params, "count_cap": COUNT_ESTIMATE_CAP},
+        ).fetchone()[0]
+        return capped, capped >= COUNT_ESTIMATE_CAP
+    key = (table_name, signature)
+    total = count_cache.get(key, version)
+    if total is None:
+        if page_is_last:
+            total = offset + page_size
+        else:
+            total = conn.execute(f"SELECT COUNT(1) {count_body};", params).fetchone()[0]
+        count_cache.put(key, version, total)
+    return total, False
+
+
+def _build_card_filters(
+    *,
+    visibility: str,
+    speaker_id: Optional[int],
+    role_major_id: Optional[int],
+    role_id: Optional[int],
+    role_unset: Optional[bool],
+    thread_id: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str],
+    q: Optional[str],
+    use_fts: bool,
+) -> tuple[str, str, dict[str, Any]]:
+    """Build the FROM and WHERE clauses for only the filters that were supplied.
+
+    Avoiding `(:x IS NULL OR col = :x)` lets SQLite pick the matching index.
+    A full-text query drives the join from cards_fts so MATCH runs only once.
+    """
+    from_clause = "cards c"
+    predicates = ["c.visibility = :visibility"]
+    params: dict[str, Any] = {"visibility": visibility}
+    if use_fts:
+        from_clause = "cards_fts CROSS JOIN cards c ON c.card_id = cards_fts.rowid"
+        predicates.append("cards_fts MATCH :fts_query")
+        params["fts_query"] = _fts_phrase(q)
+    elif q is not None:
+        predicates.append("c.contents LIKE '%' || :q || '%'")
+        params["q"] = q
+    if speaker_id is not None:
+        predicates.append("c.speaker_id = :speaker_id")
+        params["speaker_id"] = speaker_id
+    if role_major_id is not None:
+        predicates.append(
+            "c.card_role_id IN (SELECT card_role_id FROM card_roles WHERE card_role_major_item_id = :role_major_id)"
+        )
+        params["role_major_id"] = role_major_id
+    if role_id is not None:
+        predicates.append("c.card_role_id = :role_id")
+        params["role_id"] = role_id
+    if role_unset:
+        predicates.append("c.card_role_id IS NULL")
+    if thread_id is not None:
+        predicates.append("c.thread_id = :thread_id")
+        params["thread_id"] = thread_id
+    if date_from is not None:
+        predicates.append("c.conversation_at >= :date_from")
+        params["date_from"] = date_from
+    if date_to is not None:
+        predicates.append("c.conversation_at <= :date_to")
+        params["date_to"] = date_to
+    return from_clause, " AND ".join(predicates), params
+
+
+@app.get("/cards")
+@db_lane("read")
+def list_cards(
+    q: Optional[str] = None,
+    visibility: str = "normal",
+    speaker_id: Optional[int] = None,
+    role_major_id: Optional[int] = None,
+    role_id: Optional[int] = None,
+    role_unset: Optional[bool] = None,
+    thread_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    sort_by: str = "conversation_at",
+    sort_dir: str = "asc",
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    total_mode: str = "cached",
+) -> dict:
+    use_fts = q is not None and len(q) >= FTS_MIN_QUERY_LEN
+    sort_whitelist = {
+        "conversation_at": "c.conversation_at",
+        "created_at": "c.created_at",
+        "card_role_confidence": "COALESCE(c.card_role_confidence, -1.0)",
+        "updated_at": "c.updated_at",
+        "relevance": "-bm25(cards_fts)" if use_fts else "c.conversation_at",
+    }
+    if sort_by not in sort_whitelist:
+        raise HTTPException(status_code=400, detail="Invalid sort_by")
+    if sort_by == "relevance" and not q:
+        raise HTTPException(status_code=400, detail="sort_by=relevance requires q")
+    if sort_dir.lower() not in {"asc", "desc"}:
+        raise HTTPException(status_code=400, detail="Invalid sort_dir")
+    if total_mode not in TOTAL_MODES:
+        raise HTTPException(status_code=400, detail="Invalid total_mode")
+    snippet_column = (
+        "snippet(cards_fts, 0, '<mark>', '</mark>', '…', 32) AS snippet"
+        if use_fts
+        else "NULL AS snippet"
+    )
+    sort_expr = sort_whitelist[sort_by]
+    keyset_clause = ""
+    cursor_params: dict[str, Any] = {}
+    if cursor:
+        cursor_key, cursor_id = _decode_cursor(cursor, sort_by, sort_dir)
+        keyset_clause = _keyset_clause(sort_expr, "c.card_id", sort_dir)
+        cursor_params = {"cursor_key": cursor_key, "cursor_id": cursor_id}
+        offset = 0
+
+    from_clause, where_clause, params = _build_card_filters(
+        visibility=visibility,
+        speaker_id=speaker_id,
+        role_major_id=role_major_id,
+        role_id=role_id,
+        role_unset=role_unset,
+        thread_id=thread_id,
+        date_from=date_from,
+        date_to=date_to,
+        q=q,
+        use_fts=use_fts,
+    )
+    # Speaker and role names are only displayed, so the count needs no lookup joins.
+    count_body = f"""
+        FROM {from_clause}
+        WHERE {where_clause}
+    """
+    signature = tuple(sorted(params.items()))
+
+    with db_session() as conn:
+        version = fetch_table_version(conn, "cards")
+        items_query = f"""
+            SELECT
+              c.card_id, c.thread_id, c.message_id, c.text_id, c.split_version,
+              c.speaker_id, s.speaker_name, c.conversation_at,
+              c.visibility, c.card_role_id,
+              m.major_name AS card_role_major_name,
+              cr.minor_name AS card_role_name,
+              c.card_role_confidence,
+              c.contents,
+              {snippet_column},
+              {sort_expr} AS _sort_key
+            FROM {from_clause}
+            LEFT JOIN speakers s ON s.speaker_id = c.speaker_id
+            LEFT JOIN card_roles cr ON cr.card_role_id = c.card_role_id
+            LEFT JOIN card_role_major_items m ON m.card_role_major_item_id = cr.card_role_major_item_id
+            WHERE {where_clause}
+              {keyset_clause}
+            ORDER BY {sort_expr} {sort_dir.upper()}, c.card_id {sort_dir.upper()}
+            LIMIT :limit OFFSET :offset;
+        """
+        items = fetch_all(conn, items_query, {**params, "limit": limit, "offset": offset, **cursor_params})
+        total, total_is_estimate = _resolve_total(
+            conn,
+            total_mode=total_mode,
+            table_name="cards",
+            version=version,
+            signature=signature,
+            count_body=count_body,
+            params=params,
+            page_size=len(items),
+            limit=limit,
+            offset=None if cursor else offset,
+        )
+    next_cursor = _next_cursor(items, limit, sort_by, sort_dir, "card_id")
+
+    if q and not use_fts:
+        for item in items:
+            item["snippet"] = _highlight_snippet(item["contents"], q)
+    return {
+        "total": total,
+        "total_is_estimate": total_is_estimate,
+        "items": items,
+        "next_cursor": next_cursor,
+    }
+
+
+@app.get("/cards/{card_id}")
+@db_lane("read")
+def get_card(card_id: int, context_prev_messages: int = 2, context_next_messages: int = 3) -> dict:
+    with db_session() as conn:
+        card_query = """
+            SELECT
+              c.*, s.speaker_name,
+              m.major_name AS card_role_major_name,
+              cr.minor_name AS card_role_name
+            FROM cards c
+            LEFT JOIN speakers s ON s.speaker_id = c.speaker_id
+            LEFT JOIN card_roles cr ON cr.card_role_id = c.card_role_id
+            LEFT JOIN card_role_major_items m ON m.card_role_major_item_id = cr.card_role_major_item_id
+            WHERE c.card_id = :card_id;
+        """
+        card = fetch_one(conn, card_query, {"card_id": card_id})
+        if not card:
+            raise HTTPException(status_code=404, detail="Card not found")
+        key_query = """
+            SELECT thread_id, message_id, split_version, text_id
+            FROM cards
+            WHERE card_id = :card_id;
+        """
+        key = fetch_one(conn, key_query, {"card_id": card_id})
+        message_id = key["message_id"]
+        context_query = """
+            SELECT
+              c.card_id,
+              c.message_id,
+              c.text_id,
+              c.split_key,
+              c.contents,
+              c.speaker_id,
+              s.speaker_name,
+              cr.minor_name AS card_role_name
+            FROM cards c
+            LEFT JOIN speakers s ON s.speaker_id = c.speaker_id
+            LEFT JOIN card_roles cr ON cr.card_role_id = c.card_role_id
+            WHERE c.thread_id = :thread_id
+              AND c.split_version = :split_version
+              AND c.message_id IN (:prev_message_id, :message_id, :next_message_id)
+            ORDER BY c.message_id ASC, c.split_key ASC;
+        """
+        context_items = fetch_all(
+            conn,
+            context_query,
+            {
+                "thread_id": key["thread_id"],
+                "split_version": key["split_version"],
+                "prev_message_id": message_id - 1,
+                "message_id": message_id,
+                "next_message_id": message_id + 1,
+            },
+        )
+
+    return {
+        "card": card,
+        "context_messages": {"items": context_items},
+    }
+
+
+@app.patch("/cards/{card_id}")
+@db_lane("write")
+def update_card(card_id: int, payload: CardUpdate) -> dict:
+    with db_session() as conn:
+        existing = fetch_one(conn, "SELECT card_id FROM cards WHERE card_id = :card_id", {"card_id": card_id})
+        if not existing:
+            raise HTTPException(status_code=404, detail="Card not found")
+        conn.execute(
+            """
+            UPDATE cards
+            SET
+              thread_id = COALESCE(:thread_id, thread_id),
+              message_id = COALESCE(:message_id, message_id),
+              text_id = COALESCE(:text_id, text_id),
+              split_key = COALESCE(:split_key, split_key),
+              split_version = COALESCE(:split_version, split_version),
+              speaker_id = COALESCE(:speaker_id, speaker_id),
+              conversation_at = COALESCE(:conversation_at, conversation_at),
+              contents = COALESCE(:contents, contents),
+              is_edited = CASE
+                WHEN :is_edited IS NOT NULL THEN :is_edited
+                WHEN :contents IS NOT NULL THEN 1
+                ELSE is_edited
+              END,
+              visibility = COALESCE(:visibility, visibility),
+              card_role_id = COALESCE(:card_role_id, card_role_id),
+              card_role_confidence = CASE
+                WHEN :card_role_confidence IS NOT NULL THEN :card_role_confidence
+                WHEN :card_role_id IS NOT NULL THEN NULL
+                ELSE card_role_confidence
+              END,
+              created_at = COALESCE(:created_at, created_at),
+              updated_at = COALESCE(:updated_at, CURRENT_TIMESTAMP)
+            WHERE card_id = :card_id;
+            """,
+            {
+                "thread_id": payload.thread_id,
+                "message_id": payload.message_id,
+                "text_id": payload.text_id,
+                "split_key": payload.split_key,
+                "split_version": payload.split_version,
+                "speaker_id": payload.speaker_id,
+                "conversation_at": payload.conversation_at,
+                "contents": payload.contents,
+                "is_edited": payload.is_edited,
+                "visibility": payload.visibility,
+                "card_role_id": payload.card_role_id,
+                "card_role_confidence": payload.card_role_confidence,
+                "created_at": payload.created_at,
+                "updated_at": payload.updated_at,
+                "card_id": card_id,
+            },
+        )
+
+    return {"card_id": card_id}
+
+
+def _assign_split_keys(
+    conn: sqlite3.Connection,
+    order_items: Iterable[dict[str, Any]],
+    temp_id_map: dict[str, int],
+) -> None:
+    grouped: dict[int, list[int]] = {}
+    for item in order_items:
+        message_id = item["message_id"]
+        card_id = item.get("card_id")
+        if card_id is None and item.get("temp_id"):
+            card_id = temp_id_map.get(item["temp_id"])
+        if card_id is None:
+            continue
+        grouped.setdefault(message_id, []).append(card_id)
+    for message_id, ordered_ids in grouped.items():
+        for index, card_id in enumerate(ordered_ids, start=1):
+            conn.execute(
+                """
+                UPDATE cards
+                SET split_key = :split_key,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE card_id = :card_id
+                  AND message_id = :message_id;
+                """,
+                {"split_key": index, "card_id": card_id, "message_id": message_id},
+            )
+
+
+@app.post("/cards/context:save")
+@db_lane("write")
+def save_context_edits(payload: ContextSaveRequest) -> dict:
+    edited_map = {item.card_id: item.contents for item in payload.items}
+    split_sources = {split.source_card_id for split in payload.splits}
+    temp_id_map: dict[str, int] = {}
+    with db_session() as conn:
+        for card_id, contents in edited_map.items():
+            conn.execute(
+                """
+                UPDATE cards
+                SET contents = :contents,
+                    is_edited = 1,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE card_id = :card_id;
+                """,
+                {"card_id": card_id, "contents": contents},
+            )
+
+        for merge in payload.merges:
+            target_contents = edited_map.get(merge.target_card_id)
+            if target_contents is None:
+                target = fetch_one(
+                    conn,
+                    "SELECT contents FROM cards WHERE card_id = :card_id;",
+                    {"card_id": merge.target_card_id},
+                )
+                source = fetch_one(
+                    conn,
+                    "SELECT contents FROM cards WHERE card_id = :card_id;",
+                    {"card_id": merge.source_card_id},
+                )
+                if not target or not source:
+                    raise HTTPException(status_code=404, detail="Card not found")
+                target_contents = f"{target['contents']}\n{source['contents']}"
+            conn.execute(
+                """
+                UPDATE cards
+                SET contents = :contents,
+                    is_edited = 1,
+                    card_role_id = NULL,
+                    card_role_confidence = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE card_id = :card_id;
+                """,
+                {"card_id": merge.target_card_id, "contents": target_contents},
+            )
+            conn.execute(
+                "DELETE FROM cards WHERE card_id = :card_id",
+                {"card_id": merge.source_card_id},
+            )
+
+        for source_card_id in split_sources:
+            contents_override = edited_map.get(source_card_id)
+            if contents_override is None:
+                conn.execute(
+                    """
+                    UPDATE cards
+                    SET is_edited = 1,
+                        card_role_id = NULL,
+                        card_role_confidence = NULL,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE card_id = :card_id;
+                    """,
+                    {"card_id": source_card_id},
+                )
+            else:
+                conn.execute(
+                    """
+                    UPDATE cards
+                    SET contents = :contents,
+                        is_edited = 1,
+                        card_role_id = NULL,
+                        card_role_confidence = NULL,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE card_id = :card_id;
+                    """,
+                    {"card_id": source_card_id, "contents": contents_override},
+                )
+
+        for split in payload.splits:
+            source_row = fetch_one(
+                conn,
+                "SELECT * FROM cards WHERE card_id = :card_id;",
+                {"card_id": split.source_card_id},
+            )
+            if not source_row:
+                raise HTTPException(status_code=404, detail="Card not found")
+            new_text_id = (
+                fetch_one(
+                    conn,
+                    """
+                    SELECT COALESCE(MAX(text_id), 0) AS max_text_id
+                    FROM cards
+                    WHERE thread_id = :thread_id
+                      AND message_id = :message_id;
+                    """,
+                    {"thread_id": source_row["thread_id"], "message_id": source_row["message_id"]},
+                )["max_text_id"]
+                + 1
+            )
+            cur = conn.execute(
+                """
+                INSERT INTO cards (
+                  thread_id,
+                  message_id,
+                  text_id,
+                  split_key,
+                  split_version,
+                  speaker_id,
+                  conversation_at,
+                  contents,
+                  is_edited,
+                  card_role_id,
+                  card_role_confidence,
+                  visibility,
+                  created_at,
+                  updated_at
+                )
+                VALUES (
+                  :thread_id,
+                  :message_id,
+                  :text_id,
+                  :split_key,
+                  :split_version,
+                  :speaker_id,
+                  :conversation_at,
+                  :contents,
+                  1,
+                  NULL,
+                  NULL,
+                  :visibility,
+                  CURRENT_TIMESTAMP,
+                  CURRENT_TIMESTAMP
+                );
+                """,
+                {
+                    "thread_id": source_row["thread_id"],
+                    "message_id": source_row["message_id"],
+                    "text_id": new_text_id,
+                    "split_key": new_text_id,
+                    "split_version": source_row["split_version"],
+                    "speaker_id": source_row["speaker_id"],
+                    "conversation_at": source_row["conversation_at"],
+                    "contents": split.contents,
+                    "visibility": source_row["visibility"],
+                },
+            )
+            if split.temp_id:
+                temp_id_map[split.temp_id] = cur.lastrowid
+
+        if (payload.merges or payload.splits) and payload.order:
+            order_items = [item.dict() for item in payload.order]
+            _assign_split_keys(conn, order_items, temp_id_map)
+
+    return {"saved": True}
+
+
+@app.post("/cards/{card_id}/role:recompute", status_code=202)
+@db_lane("write")
+def recompute_role(card_id: int) -> dict:
+    with db_session() as conn:
+        updated = conn.execute(
+            """
+            UPDATE cards
+            SET card_role_id = NULL,
+                card_role_confidence = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE card_id = :card_id;
+            """,
+            {"card_id": card_id},
+        ).rowcount
+        if updated == 0:
+            raise HTTPException(status_code=404, detail="Card not found")
+        job_ids = enqueue_jobs(conn, "card_role", "SELECT :card_id AS target_id", {"card_id": card_id})
+    return {"queued": True, "job_ids": job_ids}
+
+
+@app.post("/cards/roles:backfill", status_code=202)
+@db_lane("write")
+def backfill_roles(body: dict) -> dict:
+    thread_id = body.get("thread_id")
+    visibility = body.get("visibility")
+    limit = body.get("limit", 200)
+    with db_session() as conn:
+        job_ids = enqueue_jobs(
+            conn,
+            "card_role",
+            """
+            SELECT card_id AS target_id
+            FROM cards
+            WHERE card_role_id IS NULL
+              AND (:thread_id IS NULL OR thread_id = :thread_id)
+              AND (:visibility IS NULL OR visibility = :visibility)
+            ORDER BY created_at ASC
+            LIMIT :limit
+            """,
+            {"thread_id": thread_id, "visibility": visibility, "limit": -1 if limit is None else limit},
+        )
+    return {"queued_count": len(job_ids), "job_ids": job_ids}
+
+
+@app.get("/cards/roles:status")
+@db_lane("read")
+def role_status(thread_id: Optional[str] = None, visibility: Optional[str] = None) -> dict:
+    with db_session() as conn:
+        pending = conn.execute(
+            """
+            SELECT COUNT(1) AS pending
+            FROM cards
+            WHERE (:thread_id IS NULL OR thread_id = :thread_id)
+              AND (:visibility IS NULL OR visibility = :visibility)
+              AND card_role_id IS NULL;
+            """,
+            {"thread_id": thread_id, "visibility": visibility},
+        ).fetchone()[0]
+        last = conn.execute("SELECT MAX(updated_at) FROM cards").fetchone()[0]
+    return {"pending": pending, "failed": 0, "last_updated_at": last}
+
+
+@app.get("/threads/{thread_id}/messages/{message_id}")
+@db_lane("read")
+def get_message_cards(thread_id: str, message_id: int, split_version: int = 1) -> dict:
+    with db_session() as conn:
+        rows = fetch_all(
+            conn,
+            """
+            SELECT c.card_id, c.text_id, c.contents, cr.minor_name AS card_role_name
+            FROM cards c
+            LEFT JOIN card_roles cr ON cr.card_role_id = c.card_role_id
+            WHERE c.thread_id = :thread_id
+              AND c.message_id = :message_id
+              AND c.split_version = :split_version
+            ORDER BY c.text_id ASC;
+            """,
+            {"thread_id": thread_id, "message_id": message_id, "split_version": split_version},
+        )
+    return {
+        "thread_id": thread_id,
+        "message_id": message_id,
+        "split_version": split_version,
+        "cards": rows,
+    }
+
+
+@app.post("/cards/{card_id}/merge-into-previous")
+@db_lane("write")
+def merge_into_previous(card_id: int) -> dict:
+    with db_session() as conn:
+        base = fetch_one(
+            conn,
+            """
+            SELECT card_id, thread_id, message_id, split_version, text_id, contents
+            FROM cards
+            WHERE card_id = :card_id;
+            """,
+            {"card_id": card_id},
+        )
+        if not base:
+            raise HTTPException(status_code=404, detail="Card not found")
+        upper = fetch_one(
+            conn,
+            """
+            SELECT card_id, contents
+            FROM cards
+            WHERE thread_id = :thread_id
+              AND message_id = :message_id
+              AND split_version = :split_version
+              AND text_id < :text_id
+            ORDER BY text_id DESC
+            LIMIT 1;
+            """,
+            {
+                "thread_id": base["thread_id"],
+                "message_id": base["message_id"],
+                "split_version": base["split_version"],
+                "text_id": base["text_id"],
+            },
+        )
+        if not upper:
+            raise HTTPException(status_code=400, detail="No previous card to merge into")
+        merged_contents = f"{upper['contents']}\n{base['contents']}"
+        conn.execute(
+            """
+            UPDATE cards
+            SET contents = :contents,
+                is_edited = 1,
+                card_role_id = NULL,
+                card_role_confidence = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE card_id = :card_id;
+            """,
+            {"contents": merged_contents, "card_id": upper["card_id"]},
+        )
+        conn.execute("DELETE FROM cards WHERE card_id = :card_id", {"card_id": base["card_id"]})
+    return {"merged_into_card_id": upper["card_id"], "deleted_card_id": base["card_id"]}
+
+
+@app.delete("/cards/{card_id}", status_code=204)
+@db_lane("write")
+def delete_card(card_id: int) -> Response:
+    with db_session() as conn:
+        deleted = conn.execute("DELETE FROM cards WHERE card_id = :card_id", {"card_id": card_id}).rowcount
+    if deleted == 0:
+        raise HTTPException(status_code=404, detail="Card not found")
+    return Response(status_code=204)
+
+
+@app.get("/cards/{card_id}/links")
+@db_lane("read")
+def list_card_links(
+    card_id: int,
+    kind: Optional[str] = None,
+    direction: str = "outgoing",
+    sort_by: str = "confidence",
+    sort_dir: str = "desc",
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+) -> dict:
+    """Links from (outgoing) or to (incoming) a card, with per-kind counts from card_link_counts."""
+    # direction -> (column matching card_id, column of the card on the other end, response key)
+    direction_map = {
+        "outgoing": ("from_card_id", "to_card_id", "to_card"),
+        "incoming": ("to_card_id", "from_card_id", "from_card"),
+    }
+    sort_map = {
+        "confidence": "COALESCE(cl.confidence, -1.0)",
+        "conversation_at": "c2.conversation_at",
+    }
+    if direction not in direction_map:
+        raise HTTPException(status_code=400, detail="Invalid direction")
+    if sort_by not in sort_map:
+        raise HTTPException(status_code=400, detail="Invalid sort_by")
+    if sort_dir.lower() not in {"asc", "desc"}:
+        raise HTTPException(status_code=400, detail="Invalid sort_dir")
+    card_column, other_column, other_key = direction_map[direction]
+    sort_expr = sort_map[sort_by]
+    keyset_clause = ""
+    cursor_params: dict[str, Any] = {}
+    if cursor:
+        cursor_key, cursor_id = _decode_cursor(cursor, sort_by, sort_dir)
+        keyset_clause = _keyset_clause(sort_expr, "cl.link_id", sort_dir)
+        cursor_params = {"cursor_key": cursor_key, "cursor_id": cursor_id}
+        offset = 0
+    with db_session() as conn:
+        counts = fetch_all(
+            conn,
+            """
+            SELECT lk.link_kind_name, clc.link_count
+            FROM card_link_counts clc
+            JOIN link_kinds lk ON lk.link_kind_id = clc.link_kind_id
+            WHERE clc.card_id = :card_id
+              AND clc.direction = :direction;
+            """,
+            {"card_id": card_id, "direction": direction},
+        )
+        counts_by_kind = {row["link_kind_name"]: row["link_count"] for row in counts}
+        items = fetch_all(
+            conn,
+            f"""
+            SELECT
+              cl.link_id,
+              lk.link_kind_name,
+              cl.confidence,
+              cl.from_card_id,
+              cl.to_card_id,
+              c2.card_id AS other_card_id,
+              c2.conversation_at AS other_conversation_at,
+              c2.contents AS other_contents,
+              cr2.minor_name AS other_card_role_name,
+              {sort_expr} AS _sort_key
+            FROM card_links cl
+            JOIN link_kinds lk ON lk.link_kind_id = cl.link_kind_id
+            JOIN cards c2 ON c2.card_id = cl.{other_column}
+            LEFT JOIN card_roles cr2 ON cr2.card_role_id = c2.card_role_id
+            WHERE cl.{card_column} = :card_id
+              AND (:kind IS NULL OR lk.link_kind_name = :kind)
+              {keyset_clause}
+            ORDER BY {sort_expr} {sort_dir.upper()}, cl.link_id {sort_dir.upper()}
+            LIMIT :limit OFFSET :offset;
+            """,
+            {"card_id": card_id, "kind": kind, "limit": limit, "offset": offset, **cursor_params},
+        )
+    next_cursor = _next_cursor(items, limit, sort_by, sort_dir, "link_id")
+    wrapped = []
+    for row in items:
+        wrapped.append(
+            {
+                "link_id": row["link_id"],
+                "link_kind_name": row["link_kind_name"],
+                "confidence": row["confidence"],
+                "from_card_id": row["from_card_id"],
+                "to_card_id": row["to_card_id"],
+                other_key: {
+                    "card_id": row["other_card_id"],
+                    "card_role_name": row["other_card_role_name"],
+                    "conversation_at": row["other_conversation_at"],
+                    "contents": row["other_contents"],
+                },
+            }
+        )
+    return {
+        "direction": direction,
+        "counts_by_kind": counts_by_kind,
+        "items": wrapped,
+        "next_cursor": next_cursor,
+    }
+
+
+@app.patch("/links/{link_id}")
+@db_lane("write")
+def update_link(link_id: int, payload: LinkKindUpdate) -> dict:
+    with db_session() as conn:
+        updated = conn.execute(
+            """
+            UPDATE card_links
+            SET link_kind_id = :link_kind_id,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE link_id = :link_id;
+            """,
+            {"link_kind_id": payload.link_kind_id, "link_id": link_id},
+        ).rowcount
+    if updated == 0:
+        raise HTTPException(status_code=404, detail="Link not found")
+    return {"link_id": link_id}
+
+
+@app.delete("/links/{link_id}", status_code=204)
+@db_lane("write")
+def delete_link(link_id: int) -> Response:
+    with db_session() as conn:
+        deleted = conn.execute("DELETE FROM card_links WHERE link_id = :link_id", {"link_id": link_id}).rowcount
+    if deleted == 0:
+        raise HTTPException(status_code=404, detail="Link not found")
+    return Response(status_code=204)
+
+
+def split_import_text(raw_text: str, speaker_map: dict[str, dict]) -> list[dict]:
+    lines = normalize_import_text(raw_text).split("\n")
+    try:
+        return list(iter_import_parts(iter_import_blocks(lines, speaker_map)))
+    except ImportFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from None
+
+
+def _commit_import_batch(thread_id: str, parts: list[dict]) -> list[int]:
+    with db_session() as conn:
+        return insert_import_parts(conn, thread_id, parts)
+
+
+@app.post("/import/preview")
+@db_lane("read")
+def import_preview(payload: ImportPreviewRequest) -> ImportPreviewResponse:
+    with db_session() as conn:
+        speaker_map = load_speaker_map(conn)
+    parts = split_import_text(payload.raw_text, speaker_map)
+    return ImportPreviewResponse(
+        thread_id=str(uuid.uuid4()),
+        split_version=1,
+        parts=parts,
+    )
+
+
+@app.post("/import/commit", status_code=201)
+@db_lane("write")
+def import_commit(payload: ImportCommitRequest) -> dict:
+    """Insert the previewed parts all-or-nothing, IMPORT_INSERT_BATCH parts per executemany."""
+    if any(field not in part for part in payload.parts for field in IMPORT_PART_FIELDS):
+        raise HTTPException(status_code=400, detail="Invalid import parts")
+    created_ids: list[int] = []
+    with db_session() as conn:
+        for offset in range(0, len(payload.parts), IMPORT_INSERT_BATCH):
+            batch = payload.parts[offset : offset + IMPORT_INSERT_BATCH]
+            created_ids += insert_import_parts(conn, payload.thread_id, batch)
+    return {"created_card_ids": created_ids, "thread_id": payload.thread_id}
+
+
+def _run_stream_import(progress: TaskProgress, path: str, thread_id: str) -> dict:
+    try:
+        with db_session() as conn:
+            speaker_map = load_speaker_map(conn)
+
+        with open(path, "rb") as upload:
+            batch: list[dict] = []
+
+            def flush() -> None:
+                created_ids = db_writer.call(_commit_import_batch, thread_id, batch)
+                progress.increment(cards_created=len(created_ids))
+                progress.update(bytes_read=upload.tell(), messages=batch[-1]["message_id"])
+                batch.clear()
+
+            blocks = iter_import_blocks(iter_upload_lines(upload), speaker_map)
+            for part in iter_import_parts(blocks):
+                batch.append(part)
+                if len(batch) >= IMPORT_INSERT_BATCH:
+                    flush()
+            if batch:
+                flush()
+            progress.update(bytes_read=upload.tell())
+    finally:
+        os.unlink(path)
+    return {}
+
+
+@app.post("/import/stream", status_code=202)
+async def import_stream(request: Request, thread_id: Optional[str] = None) -> dict:
+    """Spool the raw text body to disk and split and insert it in the background."""
+    thread_id = thread_id or str(uuid.uuid4())
+    upload = tempfile.NamedTemporaryFile(prefix="conversation-import-", suffix=".txt", delete=False)
+    size = 0
+    try:
+        with upload:
+            async for chunk in request.stream():
+                upload.write(chunk)
+                size += len(chunk)
+        if not size:
+            raise HTTPException(status_code=400, detail="Import body is empty")
+    except BaseException:
+        os.unlink(upload.name)
+        raise
+
+    def run(progress: TaskProgress) -> dict:
+        return _run_stream_import(progress, upload.name, thread_id)
+
+    progress = background_tasks.submit(
+        "import",
+        run,
+        thread_id=thread_id,
+        bytes_total=size,
+        bytes_read=0,
+        messages=0,
+        cards_created=0,
+    )
+    return {"import_id": progress.task_id, "thread_id": thread_id, "status": "running"}
+
+
+@app.get("/import/stream/{import_id}")
+async def get_import_stream(import_id: str) -> dict:
+    task = background_tasks.get(import_id, kind="import")
+    if task is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    task.pop("kind")
+    task["import_id"] = task.pop("task_id")
+    return task
+
+
+@app.post("/import/{thread_id}/roles:run", status_code=202)
+@db_lane("write")
+def import_roles_run(thread_id: str, body: dict) -> dict:
+    with db_session() as conn:
+        job_ids = enqueue_jobs(
+            conn,
+            "card_role",
+            """
+            SELECT card_id AS target_id
+            FROM cards
+            WHERE thread_id = :thread_id
+              AND card_role_id IS NULL
+              AND (:message_id_from IS NULL OR message_id >= :message_id_from)
+              AND (:message_id_to IS NULL OR message_id <= :message_id_to)
+            ORDER BY message_id ASC, text_id ASC
+            """,
+            {
+                "thread_id": thread_id,
+                "message_id_from": body.get("message_id_from"),
+                "message_id_to": body.get("message_id_to"),
+            },
+        )
+    return {"queued": True, "queued_count": len(job_ids), "job_ids": job_ids}
+
+
+# Candidate pairs (from x to) above which generation runs as a background task.
+LINK_GENERATE_BACKGROUND_PAIRS = int(os.environ.get("CONVERSATION_LINK_BACKGROUND_PAIRS", "50000"))
+LINK_INSERT_CHUNK = 5000
+
+
+def _insert_link_suggestion_chunk(rows: list[tuple[int, int, float]]) -> int:
+    """Insert one chunk of ranked pairs as queued suggestions on the writer; returns how many were new."""
+    with db_session() as conn:
+        return conn.executemany(
+            """
+            INSERT OR IGNORE INTO link_suggestions (
+              from_card_id, to_card_id, similarity, status, created_at, updated_at
+            ) VALUES (?, ?, ?, 'queued', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP);
+            """,
+            rows,
+        ).rowcount
+
+
+def _generate_link_suggestions(
+    payload: LinkSuggestionGenerateRequest,
+    progress: Optional[TaskProgress] = None,
+) -> dict:
+    """Rank the from x to pairs and insert the kept ones as queued suggestions.
+
+    Ranking reads cards on a pooled connection with no transaction open, so
+    writes committed meanwhile never invalidate a snapshot this call later
+    writes from. Kept pairs go to db_writer in LINK_INSERT_CHUNK sized
+    executemany calls; the CPU-bound ranking never holds the write lock.
+    created/skipped come from the rows each INSERT OR IGNORE actually added,
+    filtered from the pairs of cards that exist.
+    """
+    scored_count = 0
+    kept = 0
+    created = 0
+    chunk: list[tuple[int, int, float]] = []
+    with db_session() as conn:
+        for from_id, candidates, scored in iter_link_candidates(
+            conn,
+            list(dict.fromkeys(payload.from_card_ids)),
+            list(dict.fromkeys(payload.to_card_ids)),
+            top_k=LINK_CANDIDATE_TOP_K if payload.top_k is None else payload.top_k,
+            min_similarity=(
+                LINK_CANDIDATE_MIN_SIMILARITY if payload.min_similarity is None else payload.min_similarity
+            ),
+        ):
+            scored_count += scored
+            chunk.extend((from_id, to_id, similarity) for to_id, similarity in candidates)
+            if len(chunk) >= LINK_INSERT_CHUNK:
+                created += db_writer.call(_insert_link_suggestion_chunk, chunk)
+                kept += len(chunk)
+                chunk = []
+            if progress is not None:
+                progress.increment(processed_from_cards=1)
+    if chunk:
+        created += db_writer.call(_insert_link_suggestion_chunk, chunk)
+        kept += len(chunk)
+    return {"created": created, "skipped": kept - created, "filtered": scored_count - kept}
+
+
+@app.post("/link-suggestions/generate", status_code=201)
+@db_lane("read")
+def generate_link_suggestions(payload: LinkSuggestionGenerateRequest):
+    from_count = len(set(payload.from_card_ids))
+    if from_count * len(set(payload.to_card_ids)) > LINK_GENERATE_BACKGROUND_PAIRS:
+
+        def run(progress: TaskProgress) -> dict:
+            return _generate_link_suggestions(payload, progress)
+
+        progress = background_tasks.submit(
+            "link_suggestion_generate",
+            run,
+            from_cards=from_count,
+            processed_from_cards=0,
+        )
+        return JSONResponse(status_code=202, content={"generation_id": progress.task_id, "status": "running"})
+    return _generate_link_suggestions(payload)
+
+
+@app.get("/link-suggestions/generate/{generation_id}")
+async def get_link_suggestion_generation(generation_id: str) -> dict:
+    task = background_tasks.get(generation_id, kind="link_suggestion_generate")
+    if task is None:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    task.pop("kind")
+    task["generation_id"] = task.pop("task_id")
+    return task
+
+
+@app.post("/link-suggestions/run", status_code=202)
+@db_lane("write")
+def run_link_suggestions(payload: LinkSuggestionRunRequest) -> dict:
+    with db_session() as conn:
+        job_ids = enqueue_jobs(
+            conn,
+            "link_suggestion",
+            """
+            SELECT suggestion_id AS target_id
+            FROM link_suggestions
+            WHERE status = 'queued'
+            ORDER BY created_at ASC
+            LIMIT :limit
+            """,
+            {"limit": payload.limit},
+        )
+    return {"queued": True, "queued_count": len(job_ids), "job_ids": job_ids}
+
+
+def _link_suggestion_filters(
+    status: Optional[str], from_card_id: Optional[int], to_card_id: Optional[int]
+) -> str:
+    """WHERE clause for only the supplied filters, so a card filter can use uq_link_suggestions_pair."""
+    conditions = ["1=1"]
+    if status is not None:
+        conditions.append("ls.status = :status")
+    if from_card_id is not None:
+        conditions.append("ls.from_card_id = :from_card_id")
+    if to_card_id is not None:
+        conditions.append("ls.to_card_id = :to_card_id")
+    return " AND ".join(conditions)
+
+
+def _link_suggestion_page_query(where_clause: str, sort_expr: str, sort_dir: str, keyset_clause: str) -> str:
+    """The link-suggestions page, with the latest card_links row for each pair.
+
+    The page is cut first and only its pairs are looked up (CROSS JOIN keeps
+    page as the outer loop): ROW_NUMBER over idx_card_links_from_to_updated
+    picks the most recent link per pair, so kind and confidence come from the
+    same row in one index range per pair instead of two correlated subqueries.
+    """
+    direction = sort_dir.upper()
+    return f"""
+        WITH page AS (
+          SELECT
+            ls.suggestion_id, ls.from_card_id, ls.to_card_id,
+            ls.status, ls.suggested_link_kind_id, ls.suggested_confidence, ls.similarity,
+            {sort_expr} AS _sort_key
+          FROM link_suggestions ls
+          WHERE {where_clause}
+            {keyset_clause}
+          ORDER BY {sort_expr} {direction}, ls.suggestion_id {direction}
+          LIMIT :limit OFFSET :offset
+        ),
+        existing AS (
+          SELECT
+            cl.from_card_id, cl.to_card_id, cl.link_kind_id, cl.confidence,
+            ROW_NUMBER() OVER (
+              PARTITION BY cl.from_card_id, cl.to_card_id
+              ORDER BY cl.updated_at DESC
+            ) AS link_rank
+          FROM page
+          CROSS JOIN card_links cl
+            ON cl.from_card_id = page.from_card_id
+           AND cl.to_card_id = page.to_card_id
+        )
+        SELECT
+          page.suggestion_id, page.from_card_id, page.to_card_id,
+          c_from.contents AS from_card_contents,
+          c_to.contents AS to_card_contents,
+          existing_lk.link_kind_name AS existing_link_kind_name,
+          existing.confidence AS existing_link_confidence,
+          page.status, page.suggested_link_kind_id,
+          lk.link_kind_name AS suggested_link_kind_name,
+          page.suggested_confidence,
+          page.similarity,
+          page._sort_key
+        FROM page
+        LEFT JOIN existing
+          ON existing.from_card_id = page.from_card_id
+         AND existing.to_card_id = page.to_card_id
+         AND existing.link_rank = 1
+        LEFT JOIN link_kinds existing_lk ON existing_lk.link_kind_id = existing.link_kind_id
+        LEFT JOIN cards c_from ON c_from.card_id = page.from_card_id
+        LEFT JOIN cards c_to ON c_to.card_id = page.to_card_id
+        LEFT JOIN link_kinds lk ON lk.link_kind_id = page.suggested_link_kind_id
+        ORDER BY page._sort_key {direction}, page.suggestion_id {direction};
+    """
+
+
+@app.get("/link-suggestions")
+@db_lane("read")
+def list_link_suggestions(
+    status: Optional[str] = None,
+    from_card_id: Optional[int] = None,
+    to_card_id: Optional[int] = None,
+    sort_by: str = "updated_at",
+    sort_dir: str = "desc",
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    total_mode: str = "cached",
+) -> dict:
+    sort_map = {
+        "updated_at": "ls.updated_at",
+        "created_at": "ls.created_at",
+        "suggested_confidence": "COALESCE(ls.suggested_confidence, -1.0)",
+    }
+    if sort_by not in sort_map:
+        raise HTTPException(status_code=400, detail="Invalid sort_by")
+    if sort_dir.lower() not in {"asc", "desc"}:
+        raise HTTPException(status_code=400, detail="Invalid sort_dir")
+    if total_mode not in TOTAL_MODES:
+        raise HTTPException(status_code=400, detail="Invalid total_mode")
+    sort_expr = sort_map[sort_by]
+    keyset_clause = ""
+    cursor_params: dict[str, Any] = {}
+    if cursor:
+        cursor_key, cursor_id = _decode_cursor(cursor, sort_by, sort_dir)
+        keyset_clause = _keyset_clause(sort_expr, "ls.suggestion_id", sort_dir)
+        cursor_params = {"cursor_key": cursor_key, "cursor_id": cursor_id}
+        offset = 0
+    where_clause = _link_suggestion_filters(status, from_card_id, to_card_id)
+    count_body = f"FROM link_suggestions ls WHERE {where_clause}"
+    params = {"status": status, "from_card_id": from_card_id, "to_card_id": to_card_id}
+    with db_session() as conn:
+        version = fetch_table_version(conn, "link_suggestions")
+        items = fetch_all(
+            conn,
+            _link_suggestion_page_query(where_clause, sort_expr, sort_dir, keyset_clause),
+            {**params, "limit": limit, "offset": offset, **cursor_params},
+        )
+        total, total_is_estimate = _resolve_total(
+            conn,
+            total_mode=total_mode,
+            table_name="link_suggestions",
+            version=version,
+            signature=tuple(sorted(params.items())),
+            count_body=count_body,
+            params=params,
+            page_size=len(items),
+            limit=limit,
+            offset=None if cursor else offset,
+        )
+    next_cursor = _next_cursor(items, limit, sort_by, sort_dir, "suggestion_id")
+    return {
+        "total": total,
+        "total_is_estimate": total_is_estimate,
+        "items": items,
+        "next_cursor": next_cursor,
+    }
+
+
+@app.post("/link-suggestions/{suggestion_id}/rerun", status_code=202)
+@db_lane("write")
+def rerun_link_suggestion(suggestion_id: int) -> dict:
+    with db_session() as conn:
+        updated = conn.execute(
+            """
+            UPDATE link_suggestions
+            SET status = 'queued', updated_at = CURRENT_TIMESTAMP
+            WHERE suggestion_id = :suggestion_id;
+            """,
+            {"suggestion_id": suggestion_id},
+        ).rowcount
+        if updated == 0:
+            raise HTTPException(status_code=404, detail="Suggestion not found")
+        job_ids = enqueue_jobs(
+            conn,
+            "link_suggestion",
+            "SELECT :suggestion_id AS target_id",
+            {"suggestion_id": suggestion_id},
+        )
+    return {"queued": True, "job_ids": job_ids}
+
+
+@app.post("/link-suggestions/{suggestion_id}/approve", status_code=201)
+@db_lane("write")
+def approve_link_suggestion(suggestion_id: int, payload: LinkSuggestionApproveRequest) -> dict:
+    with db_session() as conn:
+        suggestion = fetch_one(
+            conn,
+            """
+            SELECT from_card_id, to_card_id, suggested_link_kind_id, suggested_confidence, status
+            FROM link_suggestions
+            WHERE suggestion_id = :suggestion_id;
+            """,
+            {"suggestion_id": suggestion_id},
+        )
+        if not suggestion:
+            raise HTTPException(status_code=404, detail="Suggestion not found")
+        kind_id = payload.link_kind_id or suggestion["suggested_link_kind_id"]
+        link_id = None
+        if kind_id is None:
+            if not (
+                suggestion["status"] == "success"
+                and suggestion["suggested_link_kind_id"] is None
+            ):
+                raise HTTPException(status_code=400, detail="link_kind_id is required")
+        else:
+            existing_link = fetch_one(
+                conn,
+                """
+                SELECT link_id
+                FROM card_links
+                WHERE from_card_id = :from_card_id
+                  AND to_card_id = :to_card_id
+                ORDER BY updated_at DESC
+                LIMIT 1;
+                """,
+                {
+                    "from_card_id": suggestion["from_card_id"],
+                    "to_card_id": suggestion["to_card_id"],
+                },
+            )
+            if existing_link:
+                conn.execute(
+                    """
+                    UPDATE card_links
+                    SET link_kind_id = :link_kind_id,
+                        confidence = :confidence,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE link_id = :link_id;
+                    """,
+                    {
+                        "link_kind_id": kind_id,
+                        "confidence": suggestion["suggested_confidence"],
+                        "link_id": existing_link["link_id"],
+                    },
+                )
+                link_id = existing_link["link_id"]
+            else:
+                cur = conn.execute(
+                    """
+                    INSERT INTO card_links (
+                      link_kind_id, from_card_id, to_card_id, confidence, created_at, updated_at
+                    ) VALUES (
+                      :link_kind_id, :from_card_id, :to_card_id, :confidence, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+                    );
+                    """,
+                    {
+                        "link_kind_id": kind_id,
+                        "from_card_id": suggestion["from_card_id"],
+                        "to_card_id": suggestion["to_card_id"],
+                        "confidence": suggestion["suggested_confidence"],
+                    },
+                )
+                link_id = cur.lastrowid
+        conn.execute(
+            """
+            UPDATE link_suggestions
+            SET status = 'approved',
+                expires_at = datetime('now', '+7 days'),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE suggestion_id = :suggestion_id;
+            """,
+            {"suggestion_id": suggestion_id},
+        )
+    return {"link_id": link_id}
+
+
+@app.post("/link-suggestions/{suggestion_id}/reject")
+@db_lane("write")
+def reject_link_suggestion(suggestion_id: int) -> dict:
+    with db_session() as conn:
+        updated = conn.execute(
+            """
+            UPDATE link_suggestions
+            SET status = 'rejected',
+                expires_at = datetime('now', '+7 days'),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE suggestion_id = :suggestion_id;
+            """,
+            {"suggestion_id": suggestion_id},
+        ).rowcount
+    if updated == 0:
+        raise HTTPException(status_code=404, detail="Suggestion not found")
+    return {"updated": True}
+
+
+@app.post("/link-suggestions/cleanup")
+@db_lane("write")
+def cleanup_link_suggestions() -> dict:
+    with db_session() as conn:
+        deleted = conn.execute(
+            """
+            DELETE FROM link_suggestions
+            WHERE expires_at IS NOT NULL
+              AND expires_at <= CURRENT_TIMESTAMP;
+            """,
+        ).rowcount
+    return {"deleted": deleted}
+
+
+@app.get("/speakers")
+@db_lane("read")
+def list_speakers() -> list[dict]:
+    with db_session() as conn:
+        return fetch_all(conn, "SELECT * FROM speakers ORDER BY speaker_id", {})
+
+
+@app.post("/speakers", status_code=201)
+@db_lane("write")
+def create_speaker(payload: CreateSpeaker) -> dict:
+    with db_session() as conn:
+        cur = conn.execute(
+            """
+            INSERT INTO speakers (speaker_name, speaker_role, canonical_role, created_at, updated_at)
+            VALUES (:speaker_name, :speaker_role, :canonical_role, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP);
+            """,
+            payload.model_dump(),
+        )
+    return {"speaker_id": cur.lastrowid}
+
+
+@app.patch("/speakers/{speaker_id}")
+@db_lane("write")
+def update_speaker(speaker_id: int, payload: UpdateSpeaker) -> dict:
+    data = payload.model_dump(exclude_unset=True)
+    if not data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    set_clause = ", ".join(f"{key} = :{key}" for key in data.keys())
+    with db_session() as conn:
+        updated = conn.execute(
+            f"UPDATE speakers SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE speaker_id = :speaker_id",
+            {**data, "speaker_id": speaker_id},
+        ).rowcount
+    if updated == 0:
+        raise HTTPException(status_code=404, detail="Speaker not found")
+    return {"speaker_id": speaker_id}
+
+
+@app.delete("/speakers/{speaker_id}", status_code=204)
+@db_lane("write")
+def delete_speaker(speaker_id: int) -> Response:
+    with db_session() as conn:
+        deleted = conn.execute("DELETE FROM speakers WHERE speaker_id = :speaker_id", {"speaker_id": speaker_id}).rowcount
+    if deleted == 0:
+        raise HTTPException(status_code=404, detail="Speaker not found")
+    return Response(status_code=204)
+
+
+@app.get("/card-role-major-items")
+@db_lane("read")
+def list_major_items() -> list[dict]:
+    with db_session() as conn:
+        return fetch_all(conn, "SELECT * FROM card_role_major_items ORDER BY card_role_major_item_id", {})
+
+
+@app.post("/card-role-major-items", status_code=201)
+@db_lane("write")
+def create_major_item(payload: CreateMajorItem) -> dict:
+    with db_session() as conn:
+        cur = conn.execute(
+            "INSERT INTO card_role_major_items (major_name) VALUES (:major_name);",
+            payload.model_dump(),
+        )
+    return {"card_role_major_item_id": cur.lastrowid}
+
+
+@app.patch("/card-role-major-items/{major_id}")
+@db_lane("write")
+def update_major_item(major_id: int, payload: UpdateMajorItem) -> dict:
+    data = payload.model_dump(exclude_unset=True)
+    if not data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    set_clause = ", ".join(f"{key} = :{key}" for key in data.keys())
+    with db_session() as conn:
+        updated = conn.execute(
+            f"UPDATE card_role_major_items SET {set_clause} WHERE card_role_major_item_id = :major_id",
+            {**data, "major_id": major_id},
+        ).rowcount
+    if updated == 0:
+        raise HTTPException(status_code=404, detail="Major item not found")
+    return {"card_role_major_item_id": major_id}
+
+
+@app.delete("/card-role-major-items/{major_id}", status_code=204)
+@db_lane("write")
+def delete_major_item(major_id: int) -> Response:
+    with db_session() as conn:
+        deleted = conn.execute(
+            "DELETE FROM card_role_major_items WHERE card_role_major_item_id = :major_id",
+            {"major_id": major_id},
+        ).rowcount
+    if deleted == 0:
+        raise HTTPException(status_code=404, detail="Major item not found")
+    return Response(status_code=204)
+
+
+@app.get("/card-roles")
+@db_lane("read")
+def list_card_roles() -> list[dict]:
+    with db_session() as conn:
+        return fetch_all(conn, "SELECT * FROM card_roles ORDER BY card_role_id", {})
+
+
+@app.post("/card-roles", status_code=201)
+@db_lane("write")
+def create_card_role(payload: CreateCardRole) -> dict:
+    with db_session() as conn:
+        cur = conn.execute(
+            """
+            INSERT INTO card_roles (card_role_major_item_id, minor_name, created_at, updated_at)
+            VALUES (:card_role_major_item_id, :minor_name, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP);
+            """,
+            payload.model_dump(),
+        )
+    return {"card_role_id": cur.lastrowid}
+
+
+@app.patch("/card-roles/{role_id}")
+@db_lane("write")
+def update_card_role(role_id: int, payload: UpdateCardRole) -> dict:
+    data = payload.model_dump(exclude_unset=True)
+    if not data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    set_clause = ", ".join(f"{key} = :{key}" for key in data.keys())
+    with db_session() as conn:
+        updated = conn.execute(
+            f"UPDATE card_roles SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE card_role_id = :role_id",
+            {**data, "role_id": role_id},
+        ).rowcount
+    if updated == 0:
+        raise HTTPException(status_code=404, detail="Card role not found")
+    return {"card_role_id": role_id}
+
+
+@app.delete("/card-roles/{role_id}", status_code=204)
+@db_lane("write")
+def delete_card_role(role_id: int) -> Response:
+    with db_session() as conn:
+        deleted = conn.execute("DELETE FROM card_roles WHERE card_role_id = :role_id", {"role_id": role_id}).rowcount
+    if deleted == 0:
+        raise HTTPException(status_code=404, detail="Card role not found")
+    return Response(status_code=204)
+
+
+@app.get("/link-kinds")
+@db_lane("read")
+def list_link_kinds() -> list[dict]:
+    with db_session() as conn:
+        return fetch_all(conn, "SELECT * FROM link_kinds ORDER BY link_kind_id", {})
+
+
+@app.post("/link-kinds", status_code=201)
+@db_lane("write")
+def create_link_kind(payload: CreateLinkKind) -> dict:
+    with db_session() as conn:
+        cur = conn.execute(
+            "INSERT INTO link_kinds (link_kind_name) VALUES (:link_kind_name);",
+            payload.model_dump(),
+        )
+    return {"link_kind_id": cur.lastrowid}
+
+
+@app.patch("/link-kinds/{link_kind_id}")
+@db_lane("write")
+def update_link_kind(link_kind_id: int, payload: UpdateLinkKind) -> dict:
+    data = payload.model_dump(exclude_unset=True)
+    if not data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    set_clause = ", ".join(f"{key} = :{key}" for key in data.keys())
+    with db_session() as conn:
+        updated = conn.execute(
+            f"UPDATE link_kinds SET {set_clause} WHERE link_kind_id = :link_kind_id",
+            {**data, "link_kind_id": link_kind_id},
+        ).rowcount
+    if updated == 0:
+        raise HTTPException(status_code=404, detail="Link kind not found")
+    return {"link_kind_id": link_kind_id}
+
+
+@app.delete("/link-kinds/{link_kind_id}", status_code=204)
+@db_lane("write")
+def delete_link_kind(link_kind_id: int) -> Response:
+    with db_session() as conn:
+        deleted = conn.execute(
+            "DELETE FROM link_kinds WHERE link_kind_id = :link_kind_id",
+            {"link_kind_id": link_kind_id},
+        ).rowcount
+    if deleted == 0:
+        raise HTTPException(status_code=404, detail="Link kind not found")
+    return Response(status_code=204)
+
+
+@app.get("/meaningless_phrases")
+@db_lane("read")
+def list_meaningless_phrases() -> list[dict]:
+    with db_session() as conn:
+        return fetch_all(conn, "SELECT * FROM meaningless_phrases ORDER BY meaningless_id", {})
+
+
+@app.post("/meaningless_phrases", status_code=201)
+@db_lane("write")
+def create_meaningless_phrase(payload: CreateMeaninglessPhrase) -> dict:
+    with db_session() as conn:
+        cur = conn.execute(
+            """
+            INSERT INTO meaningless_phrases (card_role_id, phrase, created_at, updated_at)
+            VALUES (:card_role_id, :phrase, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP);
+            """,
+            payload.model_dump(),
+        )
+    return {"meaningless_id": cur.lastrowid}
+
+
+@app.patch("/meaningless_phrases/{meaningless_id}")
+@db_lane("write")
+def update_meaningless_phrase(meaningless_id: int, payload: UpdateMeaninglessPhrase) -> dict:
+    data = payload.model_dump(exclude_unset=True)
+    if not data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    set_clause = ", ".join(f"{key} = :{key}" for key in data.keys())
+    with db_session() as conn:
+        updated = conn.execute(
+            f"UPDATE meaningless_phrases SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE meaningless_id = :meaningless_id",
+            {**data, "meaningless_id": meaningless_id},
+        ).rowcount
+    if updated == 0:
+        raise HTTPException(status_code=404, detail="Meaningless phrase not found")
+    return {"meaningless_id": meaningless_id}
+
+
+@app.delete("/meaningless_phrases/{meaningless_id}", status_code=204)
+@db_lane("write")
+def delete_meaningless_phrase(meaningless_id: int) -> Response:
+    with db_session() as conn:
+        deleted = conn.execute(
+            "DELETE FROM meaningless_phrases WHERE meaningless_id = :meaningless_id",
+            {"meaningless_id": meaningless_id},
+        ).rowcount
+    if deleted == 0:
+        raise HTTPException(status_code=404, detail="Meaningless phrase not found")
     return Response(status_code=204)
\ No newline at end of file
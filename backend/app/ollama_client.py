@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import http.client
+import json
+import queue
+import threading
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+
+class OllamaError(RuntimeError):
+    pass
+
+
+class _ReadTimeoutConnection:
+    """Connects within `timeout`, then reads with `read_timeout`.
+
+    Set in connect() so the reconnect http.client does on its own after the
+    server closed a keep-alive connection gets the read timeout too.
+    """
+
+    def __init__(self, *args: Any, read_timeout: float, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.read_timeout = read_timeout
+
+    def connect(self) -> None:
+        super().connect()
+        self.sock.settimeout(self.read_timeout)
+
+
+class _HTTPConnection(_ReadTimeoutConnection, http.client.HTTPConnection):
+    pass
+
+
+class _HTTPSConnection(_ReadTimeoutConnection, http.client.HTTPSConnection):
+    pass
+
+
+class OllamaClient:
+    """Streaming /api/generate client over a pool of keep-alive connections.
+
+    The NDJSON stream is read chunk by chunk and abandoned as soon as
+    `expected_lines` complete non-empty lines have arrived. An abandoned
+    connection is closed so Ollama stops generating; connections whose
+    stream ran to `done` go back to the pool.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int,
+        connect_timeout: float,
+        read_timeout: float,
+    ) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported Ollama URL: {url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path or "/api/generate"
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._idle: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue(maxsize=max(1, pool_size))
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.reused = 0
+        self.early_stops = 0
+
+    def _connect(self) -> http.client.HTTPConnection:
+        connection_class = _HTTPSConnection if self.scheme == "https" else _HTTPConnection
+        conn = connection_class(self.host, self.port, timeout=self.connect_timeout, read_timeout=self.read_timeout)
+        conn.connect()
+        return conn
+
+    def _checkout(self) -> tuple[http.client.HTTPConnection, bool]:
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _checkin(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _send(self, payload: bytes) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        conn, reused = self._checkout()
+        try:
+            conn.request("POST", self.path, body=payload, headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            if reused:
+                with self._lock:
+                    self.reused += 1
+            return conn, resp
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            if not reused:
+                raise
+        # The server dropped an idle keep-alive connection; retry once on a fresh one.
+        conn = self._connect()
+        conn.request("POST", self.path, body=payload, headers={"Content-Type": "application/json"})
+        return conn, conn.getresponse()
+
+    def generate(self, payload: dict[str, Any], expected_lines: Optional[int] = None) -> dict[str, Any]:
+        """POST `payload` with streaming on and return a non-streaming style result.
+
+        The result carries the concatenated `response` text plus the timing and
+        token counters of the final chunk when the stream finished on its own.
+        """
+        body = json.dumps({**payload, "stream": True}).encode("utf-8")
+        try:
+            conn, resp = self._send(body)
+        except (OSError, http.client.HTTPException) as exc:
+            raise OllamaError(f"Ollama request failed: {exc}") from exc
+        with self._lock:
+            self.requests += 1
+        if resp.status != 200:
+            detail = resp.read().decode("utf-8", errors="replace")
+            conn.close()
+            try:
+                body = json.loads(detail)
+            except ValueError:
+                body = None
+            # Proxies answer with plain text or other JSON; only Ollama's own object carries "error".
+            if isinstance(body, dict):
+                return {"error": body.get("error", detail)}
+            raise OllamaError(f"Ollama returned HTTP {resp.status}: {detail}")
+
+        text: list[str] = []
+        result: dict[str, Any] = {}
+        finished = False
+        try:
+            for raw in resp:
+                if not raw.strip():
+                    continue
+                chunk = json.loads(raw)
+                if not isinstance(chunk, dict):
+                    raise ValueError(f"unexpected chunk {raw[:200]!r}")
+                if chunk.get("error"):
+                    result["error"] = chunk["error"]
+                    finished = True
+                    break
+                text.append(chunk.get("response", ""))
+                if chunk.get("done"):
+                    result.update(
+                        {key: value for key, value in chunk.items() if key not in ("response", "context")}
+                    )
+                    finished = True
+                    break
+                if expected_lines and _complete_lines("".join(text)) >= expected_lines:
+                    break
+        except (OSError, http.client.HTTPException, ValueError) as exc:
+            conn.close()
+            raise OllamaError(f"Ollama stream failed: {exc}") from exc
+
+        if finished and not resp.read():
+            self._checkin(conn)
+        else:
+            conn.close()
+            with self._lock:
+                self.early_stops += 1
+        result["response"] = "".join(text)
+        result.setdefault("model", payload.get("model"))
+        return result
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "reused": self.reused,
+                "early_stops": self.early_stops,
+                "idle": self._idle.qsize(),
+            }
+
+
+def _complete_lines(text: str) -> int:
+    """Count newline-terminated, non-blank lines in `text`."""
+    return sum(1 for line in text.split("\n")[:-1] if line.strip())
\ No newline at end of file
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Any, Optional
+
+RESULT_CACHE_SIZE = int(os.environ.get("CONVERSATION_LLM_CACHE_SIZE", "50000"))
+# Rows allowed past the size (as a share of it) before one batch eviction trims back to it.
+RESULT_CACHE_EVICT_SLACK = 0.1
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_contents(text: Optional[str]) -> str:
+    """Fold width variants and whitespace so trivially different cards share a key."""
+    return WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+class ResultCache:
+    """LLM answers persisted in llm_result_cache, evicted least recently used first.
+
+    Keys hash (job_type, model, allowed-terms version, normalized contents), and
+    the card_roles / link_kinds triggers also delete the affected entries, so a
+    taxonomy change never serves an answer chosen from an older term list.
+
+    Eviction runs in batches: once the rowid of a new entry passes the one
+    recorded at the previous check by `slack`, the least recently used rows
+    beyond `size` are deleted together, ties on last_used_at (one-second
+    resolution) going to the older rowid.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.slack = max(1, int(size * RESULT_CACHE_EVICT_SLACK))
+        self._next_evict_rowid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def key(self, job_type: str, model: str, terms_version: int, *contents: Optional[str]) -> str:
+        parts = [job_type, model, str(terms_version), *(normalize_contents(text) for text in contents)]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, conn: sqlite3.Connection, job_type: str, key: str) -> Optional[tuple[Optional[int], float]]:
+        """Return (result_id, confidence) for `key`; result_id is None for a 'none' link."""
+        row = conn.execute(
+            "SELECT result_id, confidence FROM llm_result_cache WHERE cache_key = :cache_key;",
+            {"cache_key": key},
+        ).fetchone()
+        with self._lock:
+            counter = self._hits if row else self._misses
+            counter[job_type] = counter.get(job_type, 0) + 1
+        if row is None:
+            return None
+        conn.execute(
+            """
+            UPDATE llm_result_cache
+            SET hits = hits + 1,
+                last_used_at = CURRENT_TIMESTAMP
+            WHERE cache_key = :cache_key;
+            """,
+            {"cache_key": key},
+        )
+        return row[0], row[1]
+
+    def put(
+        self,
+        conn: sqlite3.Connection,
+        job_type: str,
+        key: str,
+        result_id: Optional[int],
+        confidence: float,
+    ) -> None:
+        rowid = conn.execute(
+            """
+            INSERT INTO llm_result_cache (cache_key, job_type, result_id, confidence)
+            VALUES (:cache_key, :job_type, :result_id, :confidence)
+            ON CONFLICT (cache_key) DO UPDATE
+            SET result_id = excluded.result_id,
+                confidence = excluded.confidence,
+                last_used_at = CURRENT_TIMESTAMP
+            RETURNING rowid;
+            """,
+            {"cache_key": key, "job_type": job_type, "result_id": result_id, "confidence": confidence},
+        ).fetchone()[0]
+        with self._lock:
+            if self._next_evict_rowid is not None and rowid < self._next_evict_rowid:
+                return
+            self._next_evict_rowid = rowid + self.slack
+        self.evict(conn)
+
+    def evict(self, conn: sqlite3.Connection) -> int:
+        """Delete the least recently used entries beyond `size`; returns how many went."""
+        return conn.execute(
+            """
+            DELETE FROM llm_result_cache
+            WHERE rowid IN (
+              SELECT rowid
+              FROM llm_result_cache
+              ORDER BY last_used_at ASC, rowid ASC
+              LIMIT max(0, (SELECT COUNT(1) FROM llm_result_cache) - :size)
+            );
+            """,
+            {"size": self.size},
+        ).rowcount
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            stats = {}
+            for job_type in sorted(set(self._hits) | set(self._misses)):
+                hits = self._hits.get(job_type, 0)
+                lookups = hits + self._misses.get(job_type, 0)
+                stats[job_type] = {
+                    "hits": hits,
+                    "lookups": lookups,
+                    "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                }
+            return stats
+
+
+result_cache = ResultCache(RESULT_CACHE_SIZE)
\ No newline at end of file
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import sqlite3
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from typing import Iterator, Optional
+
+from app.result_cache import normalize_contents
+
+LINK_CANDIDATE_TOP_K = int(os.environ.get("CONVERSATION_LINK_TOP_K", "20"))
+# Unset keeps only pairs with a positive score; "0" also keeps pairs sharing no n-gram.
+LINK_CANDIDATE_MIN_SIMILARITY: Optional[float] = (
+    float(os.environ["CONVERSATION_LINK_MIN_SIMILARITY"]) if os.environ.get("CONVERSATION_LINK_MIN_SIMILARITY") else None
+)
+CARD_VECTOR_CACHE_SIZE = int(os.environ.get("CONVERSATION_CARD_VECTOR_CACHE_SIZE", "20000"))
+
+NGRAM_SIZES = (2, 3)
+# n-grams found in more than this share of the compared cards carry no signal.
+MAX_DOCUMENT_RATIO = 0.5
+MIN_DOCUMENTS_FOR_PRUNING = 10
+
+
+def card_ngrams(text: Optional[str]) -> Counter[str]:
+    normalized = normalize_contents(text).lower()
+    grams: Counter[str] = Counter()
+    for size in NGRAM_SIZES:
+        grams.update(normalized[i : i + size] for i in range(len(normalized) - size + 1))
+    if not grams and normalized:
+        grams[normalized] = 1
+    return grams
+
+
+class CardVectorCache:
+    """LRU of per-card n-gram counts, re-tokenized only when a card's contents change."""
+
+    def __init__(self, size: int) -> None:
+        self.size = max(1, size)
+        self._entries: OrderedDict[int, tuple[str, Counter[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, conn: sqlite3.Connection, card_ids: list[int]) -> dict[int, Counter[str]]:
+        """Return n-gram counts for the given ids that exist in cards."""
+        rows = conn.execute(
+            "SELECT card_id, contents FROM cards WHERE card_id IN (SELECT value FROM json_each(:ids));",
+            {"ids": json.dumps(card_ids)},
+        ).fetchall()
+        vectors: dict[int, Counter[str]] = {}
+        with self._lock:
+            for card_id, contents in rows:
+                contents = contents or ""
+                entry = self._entries.get(card_id)
+                if entry is None or entry[0] != contents:
+                    entry = (contents, card_ngrams(contents))
+                    self._entries[card_id] = entry
+                self._entries.move_to_end(card_id)
+                vectors[card_id] = entry[1]
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return vectors
+
+
+card_vectors = CardVectorCache(CARD_VECTOR_CACHE_SIZE)
+
+
+def _tfidf(vectors: dict[int, Counter[str]]) -> dict[int, dict[str, float]]:
+    document_count = len(vectors)
+    df: Counter[str] = Counter()
+    for grams in vectors.values():
+        df.update(grams.keys())
+    max_df = document_count * MAX_DOCUMENT_RATIO if document_count >= MIN_DOCUMENTS_FOR_PRUNING else None
+    weighted = {}
+    for card_id, grams in vectors.items():
+        weights = {
+            gram: (1 + math.log(count)) * (math.log((1 + document_count) / (1 + df[gram])) + 1)
+            for gram, count in grams.items()
+            if max_df is None or df[gram] <= max_df
+        }
+        norm = math.sqrt(sum(value * value for value in weights.values()))
+        weighted[card_id] = {gram: value / norm for gram, value in weights.items()} if norm else {}
+    return weighted
+
+
+def iter_link_candidates(
+    conn: sqlite3.Connection,
+    from_card_ids: list[int],
+    to_card_ids: list[int],
+    top_k: int = LINK_CANDIDATE_TOP_K,
+    min_similarity: Optional[float] = LINK_CANDIDATE_MIN_SIMILARITY,
+) -> Iterator[tuple[int, list[tuple[int, float]], int]]:
+    """Yield (from_card_id, [(to_card_id, similarity), ...], scored) for each from-card.
+
+    Pairs are scored by cosine similarity of character n-gram TF-IDF vectors.
+    IDF is taken over the cards in the request, so an n-gram shared by most of
+    the candidates does not make every pair look related. For each from-card
+    the pairs at or above `min_similarity` are kept, best first, up to `top_k`
+    (0 keeps all of them). With `min_similarity` None only pairs scoring above
+    zero are kept; pass 0 to keep pairs that share no n-gram at all. Ids
+    missing from cards are skipped; `scored` counts the pairs actually
+    compared before filtering.
+    """
+    vectors = card_vectors.get_many(conn, list(dict.fromkeys(from_card_ids + to_card_ids)))
+    weighted = _tfidf(vectors)
+    to_ids = [card_id for card_id in dict.fromkeys(to_card_ids) if card_id in weighted]
+    postings: dict[str, list[tuple[int, float]]] = defaultdict(list)
+    for to_id in to_ids:
+        for gram, weight in weighted[to_id].items():
+            postings[gram].append((to_id, weight))
+
+    for from_id in dict.fromkeys(from_card_ids):
+        if from_id not in weighted:
+            continue
+        scores: dict[int, float] = defaultdict(float)
+        for gram, weight in weighted[from_id].items():
+            for to_id, to_weight in postings.get(gram, ()):
+                scores[to_id] += weight * to_weight
+        candidates = [
+            (to_id, round(min(scores.get(to_id, 0.0), 1.0), 6))
+            for to_id in to_ids
+            if to_id != from_id
+        ]
+        scored = len(candidates)
+        if min_similarity is None:
+            candidates = [item for item in candidates if item[1] > 0]
+        else:
+            candidates = [item for item in candidates if item[1] >= min_similarity]
+        candidates.sort(key=lambda item: (-item[1], item[0]))
+        if top_k > 0:
+            candidates = candidates[:top_k]
+        yield from_id, candidates, scored
\ No newline at end of file
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from typing import Optional
+
+from app.result_cache import normalize_contents
+
+# job_type -> (table whose table_versions counter tracks it, id/name query in prompt order)
+TERM_SOURCES = {
+    "card_role": (
+        "card_roles",
+        "SELECT card_role_id, minor_name FROM card_roles ORDER BY card_role_id ASC;",
+    ),
+    "link_suggestion": (
+        "link_kinds",
+        "SELECT link_kind_id, link_kind_name FROM link_kinds ORDER BY link_kind_id ASC;",
+    ),
+}
+
+
+class AllowedTerms:
+    """The term list one job type is prompted with, plus lookups for parsing replies."""
+
+    def __init__(self, version: int, rows: list[tuple[int, str]]) -> None:
+        self.version = version
+        self.text = "/".join(name for _, name in rows)
+        self.ids: dict[str, int] = {}
+        for term_id, name in rows:
+            if name:
+                self.ids.setdefault(name, term_id)
+        # Alternatives are tried in list order at the leftmost position, so the
+        # earliest occurrence wins and ties go to the lower id.
+        self._matcher = re.compile("|".join(re.escape(name) for name in self.ids)) if self.ids else None
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.ids)
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the term that occurs first in `text`."""
+        if self._matcher is None:
+            return None
+        found = self._matcher.search(text)
+        return found.group(0) if found else None
+
+
+class TaxonomyCache:
+    """Allowed terms per job type, reloaded only when table_versions moves.
+
+    The card_roles / link_kinds triggers bump the counters on every change
+    made through the settings endpoints, so a worker process notices edits
+    with one primary-key lookup per job instead of re-reading both tables.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._terms: dict[str, AllowedTerms] = {}
+        self.loads = 0
+
+    def get(self, conn: sqlite3.Connection) -> dict[str, AllowedTerms]:
+        versions = dict(
+            conn.execute(
+                "SELECT table_name, version FROM table_versions WHERE table_name IN ('card_roles', 'link_kinds');"
+            ).fetchall()
+        )
+        with self._lock:
+            for job_type, (table_name, query) in TERM_SOURCES.items():
+                version = versions.get(table_name, 0)
+                cached = self._terms.get(job_type)
+                if cached is None or cached.version != version:
+                    rows = [(row[0], row[1]) for row in conn.execute(query).fetchall()]
+                    self._terms[job_type] = AllowedTerms(version, rows)
+                    self.loads += 1
+            return dict(self._terms)
+
+
+taxonomy_cache = TaxonomyCache()
+
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+
+
+def normalize_phrase(text: Optional[str]) -> str:
+    """Width-fold and casefold, then drop whitespace, punctuation and symbols."""
+    return NON_WORD_PATTERN.sub("", normalize_contents(text).casefold())
+
+
+class MeaninglessPhrases:
+    """meaningless_phrases as lookups from card contents to card_role_id.
+
+    Exact contents win; otherwise contents are compared by normalize_phrase, so
+    "はい。", "はい！ " and "はい…" all hit a "はい" entry. For both lookups the
+    phrase with the lowest meaningless_id wins. Phrases that normalize to
+    nothing (only punctuation or emoji) match exactly only.
+    """
+
+    def __init__(self, version: int, rows: list[tuple[str, int]]) -> None:
+        self.version = version
+        self.exact: dict[str, int] = {}
+        self.normalized: dict[str, int] = {}
+        for phrase, card_role_id in rows:
+            self.exact.setdefault(phrase, card_role_id)
+            key = normalize_phrase(phrase)
+            if key:
+                self.normalized.setdefault(key, card_role_id)
+
+    def match(self, contents: str) -> Optional[int]:
+        card_role_id = self.exact.get(contents)
+        if card_role_id is None and self.normalized:
+            card_role_id = self.normalized.get(normalize_phrase(contents))
+        return card_role_id
+
+
+class MeaninglessPhraseCache:
+    """MeaninglessPhrases rebuilt only when the meaningless_phrases version moves."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._phrases: Optional[MeaninglessPhrases] = None
+        self.loads = 0
+
+    def get(self, conn: sqlite3.Connection) -> MeaninglessPhrases:
+        row = conn.execute(
+            "SELECT version FROM table_versions WHERE table_name = 'meaningless_phrases';"
+        ).fetchone()
+        version = row[0] if row else 0
+        with self._lock:
+            if self._phrases is None or self._phrases.version != version:
+                rows = conn.execute(
+                    "SELECT phrase, card_role_id FROM meaningless_phrases ORDER BY meaningless_id;"
+                ).fetchall()
+                self._phrases = MeaninglessPhrases(version, [(row[0], row[1]) for row in rows])
+                self.loads += 1
+            return self._phrases
+
+
+meaningless_phrase_cache = MeaninglessPhraseCache()
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""Latency of cheap endpoints while heavy list queries run concurrently.
+
+Drives the ASGI app in-process, so every request shares one event loop just as
+under uvicorn. Runs once with handlers inline on the loop (the old behaviour)
+and once on the reader/writer lanes.
+
+Usage: python benchmarks/bench_event_loop.py [--rows 100000] [--seconds 5] [--heavy 4]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+TMP_DIR = tempfile.TemporaryDirectory()
+os.environ["CONVERSATION_DB_PATH"] = os.path.join(TMP_DIR.name, "bench.db")
+
+import httpx
+
+from app.db import db_lanes, db_session, init_db
+from app.main import app
+
+HEAVY_PATH = "/cards?q=7 &total_mode=exact&sort_by=updated_at&offset=2000"
+CHEAP_PATHS = ["/speakers", "/link-kinds", "/card-roles"]
+
+
+def prepare(rows: int) -> None:
+    init_db()
+    with db_session() as conn:
+        conn.execute(
+            "INSERT INTO speakers (speaker_name, speaker_role, canonical_role) VALUES ('a', 'a', 'human');"
+        )
+        conn.executemany(
+            """
+            INSERT INTO cards (thread_id, message_id, text_id, split_key, speaker_id, conversation_at, contents)
+            VALUES ('bench', ?, 1, 1, 1, CURRENT_TIMESTAMP, ?);
+            """,
+            ((i, f"contents {i} of the benchmark thread {i * 7 % 1000}") for i in range(1, rows + 1)),
+        )
+
+
+def percentile(values: list[float], ratio: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+async def run(seconds: float, heavy: int) -> dict[str, float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.perf_counter() + seconds
+        heavy_done = 0
+        latencies: list[float] = []
+
+        async def heavy_loop() -> None:
+            nonlocal heavy_done
+            while time.perf_counter() < deadline:
+                response = await client.get(HEAVY_PATH)
+                response.raise_for_status()
+                heavy_done += 1
+
+        async def cheap_loop() -> None:
+            index = 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get(CHEAP_PATHS[index % len(CHEAP_PATHS)])
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+                index += 1
+                await asyncio.sleep(0.005)
+
+        await asyncio.gather(cheap_loop(), *(heavy_loop() for _ in range(heavy)))
+    return {
+        "cheap": len(latencies),
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": max(latencies),
+        "heavy": heavy_done,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--heavy", type=int, default=4)
+    args = parser.parse_args()
+
+    prepare(args.rows)
+    print(f"{'mode':7s} {'cheap':>6s} {'p50 ms':>8s} {'p99 ms':>8s} {'max ms':>8s} {'heavy':>6s}")
+    for label, enabled in (("inline", False), ("lanes", True)):
+        db_lanes.enabled = enabled
+        result = asyncio.run(run(args.seconds, args.heavy))
+        print(
+            f"{label:7s} {result['cheap']:6d} {result['p50_ms']:8.2f} {result['p99_ms']:8.2f} "
+            f"{result['max_ms']:8.2f} {result['heavy']:6d}"
+        )
+    db_lanes.shutdown()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
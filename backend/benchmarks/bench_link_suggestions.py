@@ -0,0 +1,221 @@
+"""GET /link-suggestions: correlated existing-link subqueries vs. the windowed page join.
+
+Seeds link_suggestions and card_links (links concentrated on a few hub cards,
+several kinds per pair for some pairs), then drives the endpoint in-process
+with the previous page query, with and without idx_card_links_from_to_updated,
+and with the current one (only supplied filters, existing links joined once
+per page). Every variant must return the same items.
+
+Usage: python benchmarks/bench_link_suggestions.py [--suggestions 1000000] [--links 100000] [--cards 20000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+TMP_DIR = tempfile.TemporaryDirectory()
+os.environ["CONVERSATION_DB_PATH"] = os.path.join(TMP_DIR.name, "bench.db")
+
+import httpx
+
+from app import main as api
+from app.db import db_lanes, db_session, init_db
+
+HUB_CARDS = 20
+KINDS = ["supports", "contradicts", "refines", "derived_from", "example_of", "depends_on"]
+
+
+def legacy_page_query(where_clause: str, sort_expr: str, sort_dir: str, keyset_clause: str) -> str:
+    """The previous page query: optional-filter ORs and two correlated subqueries per row."""
+    return f"""
+        SELECT
+          ls.suggestion_id, ls.from_card_id, ls.to_card_id,
+          c_from.contents AS from_card_contents,
+          c_to.contents AS to_card_contents,
+          (
+            SELECT lk2.link_kind_name
+            FROM card_links cl2
+            LEFT JOIN link_kinds lk2 ON lk2.link_kind_id = cl2.link_kind_id
+            WHERE cl2.from_card_id = ls.from_card_id
+              AND cl2.to_card_id = ls.to_card_id
+            ORDER BY cl2.updated_at DESC
+            LIMIT 1
+          ) AS existing_link_kind_name,
+          (
+            SELECT cl3.confidence
+            FROM card_links cl3
+            WHERE cl3.from_card_id = ls.from_card_id
+              AND cl3.to_card_id = ls.to_card_id
+            ORDER BY cl3.updated_at DESC
+            LIMIT 1
+          ) AS existing_link_confidence,
+          ls.status, ls.suggested_link_kind_id,
+          lk.link_kind_name AS suggested_link_kind_name,
+          ls.suggested_confidence,
+          ls.similarity,
+          {sort_expr} AS _sort_key
+        FROM link_suggestions ls
+        LEFT JOIN cards c_from ON c_from.card_id = ls.from_card_id
+        LEFT JOIN cards c_to ON c_to.card_id = ls.to_card_id
+        LEFT JOIN link_kinds lk ON lk.link_kind_id = ls.suggested_link_kind_id
+        WHERE 1=1
+          AND (:status IS NULL OR ls.status = :status)
+          AND (:from_card_id IS NULL OR ls.from_card_id = :from_card_id)
+          AND (:to_card_id IS NULL OR ls.to_card_id = :to_card_id)
+          {keyset_clause}
+        ORDER BY {sort_expr} {sort_dir.upper()}, ls.suggestion_id {sort_dir.upper()}
+        LIMIT :limit OFFSET :offset;
+    """
+
+
+def timestamp(rng: random.Random) -> str:
+    return f"2026-{rng.randint(1, 9):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+
+
+def random_card(rng: random.Random, cards: int, hub_share: float) -> int:
+    return rng.randint(1, HUB_CARDS) if rng.random() < hub_share else rng.randint(1, cards)
+
+
+def prepare(suggestions: int, links: int, cards: int) -> None:
+    init_db()
+    rng = random.Random(0)
+    with db_session() as conn:
+        conn.execute("INSERT INTO speakers (speaker_name, speaker_role, canonical_role) VALUES ('a', 'a', 'human');")
+        conn.executemany("INSERT INTO link_kinds (link_kind_name) VALUES (?);", ((name,) for name in KINDS))
+        conn.executemany(
+            """
+            INSERT INTO cards (thread_id, message_id, text_id, split_key, speaker_id, conversation_at, contents)
+            VALUES ('bench', ?, 1, 1, 1, CURRENT_TIMESTAMP, ?);
+            """,
+            ((i, f"card {i}") for i in range(1, cards + 1)),
+        )
+        pairs: set[tuple[int, int]] = set()
+        link_rows = []
+        while len(link_rows) < links:
+            from_id = random_card(rng, cards, 0.3)
+            to_id = rng.randint(1, cards)
+            if from_id == to_id or (from_id, to_id) in pairs:
+                continue
+            pairs.add((from_id, to_id))
+            # Some pairs carry several kinds; updated_at never ties within a pair.
+            for kind_id in rng.sample(range(1, len(KINDS) + 1), rng.choice([1, 1, 1, 2, 3])):
+                link_rows.append((kind_id, from_id, to_id, round(rng.random(), 3), timestamp(rng)))
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO card_links (link_kind_id, from_card_id, to_card_id, confidence, updated_at)
+            VALUES (?, ?, ?, ?, ?);
+            """,
+            link_rows[:links],
+        )
+        suggestion_pairs = list(pairs)
+        seen = set(pairs)
+        while len(suggestion_pairs) < suggestions:
+            pair = (random_card(rng, cards, 0.1), rng.randint(1, cards))
+            if pair[0] != pair[1] and pair not in seen:
+                seen.add(pair)
+                suggestion_pairs.append(pair)
+        conn.executemany(
+            """
+            INSERT INTO link_suggestions (
+              from_card_id, to_card_id, suggested_link_kind_id, suggested_confidence, status, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?);
+            """,
+            (
+                (
+                    from_id,
+                    to_id,
+                    rng.randint(1, len(KINDS)),
+                    round(rng.random(), 3),
+                    "approved" if (from_id, to_id) in pairs else rng.choice(["queued", "success", "rejected"]),
+                    timestamp(rng),
+                )
+                for from_id, to_id in suggestion_pairs
+            ),
+        )
+        conn.execute("ANALYZE;")
+
+
+CASES = [
+    ("default page", "/link-suggestions?total_mode=estimated"),
+    ("limit 200", "/link-suggestions?limit=200&total_mode=estimated"),
+    ("status approved", "/link-suggestions?status=approved&limit=200&total_mode=estimated"),
+    ("hub from_card", "/link-suggestions?from_card_id=1&limit=200&total_mode=estimated"),
+    ("by confidence", "/link-suggestions?sort_by=suggested_confidence&limit=200&total_mode=estimated"),
+]
+
+
+async def measure(path: str, repeat: int) -> tuple[float, list[dict]]:
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        timings = []
+        items: list[dict] = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            timings.append((time.perf_counter() - started) * 1000)
+            items = response.json()["items"]
+    return statistics.median(timings), items
+
+
+def set_index(enabled: bool) -> None:
+    with db_session() as conn:
+        if enabled:
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_card_links_from_to_updated
+                  ON card_links(from_card_id, to_card_id, updated_at, link_kind_id, confidence);
+                """
+            )
+        else:
+            conn.execute("DROP INDEX IF EXISTS idx_card_links_from_to_updated;")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--suggestions", type=int, default=1_000_000)
+    parser.add_argument("--links", type=int, default=100_000)
+    parser.add_argument("--cards", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    prepare(args.suggestions, args.links, args.cards)
+    print(f"seeded {args.suggestions} suggestions / {args.links} links in {time.perf_counter() - started:.1f}s")
+
+    window_query = api._link_suggestion_page_query
+    variants = [
+        ("legacy", legacy_page_query, False),
+        ("legacy+index", legacy_page_query, True),
+        ("window+index", window_query, True),
+    ]
+    print(f"{'case':16s} " + " ".join(f"{label + ' ms':>16s}" for label, _, _ in variants))
+    results: dict[str, list[float]] = {}
+    expected: dict[str, list[dict]] = {}
+    for label, query, index in variants:
+        api._link_suggestion_page_query = query
+        set_index(index)
+        for case, path in CASES:
+            median, items = asyncio.run(measure(path, args.repeat))
+            if case in expected and items != expected[case]:
+                raise SystemExit(f"{label} returned different items for {case}")
+            expected.setdefault(case, items)
+            results.setdefault(case, []).append(median)
+    api._link_suggestion_page_query = window_query
+    for case, _ in CASES:
+        print(f"{case:16s} " + " ".join(f"{value:16.2f}" for value in results[case]))
+    db_lanes.shutdown()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
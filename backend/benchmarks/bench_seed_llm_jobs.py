@@ -0,0 +1,116 @@
+"""Seeding llm_jobs for many targets: per-row loop vs. set-based seed_llm_jobs.
+
+Usage: python benchmarks/bench_seed_llm_jobs.py [--targets 100000]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from app.db import SCHEMA_PATH
+from app.llm_worker import seed_llm_jobs
+
+LEGACY_INSERT = """
+    INSERT OR IGNORE INTO llm_jobs (
+      job_type, target_table, target_id, status, locked_at, lock_owner, started_at,
+      finished_at, error, result_json, created_at, updated_at, expires_at
+    ) VALUES (
+      :job_type, :target_table, :target_id, 'queued', NULL, NULL, NULL,
+      NULL, NULL, NULL, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+    );
+"""
+
+
+def legacy_seed(conn: sqlite3.Connection, limit: int) -> int:
+    """The previous implementation: fetch ids, then one INSERT per row."""
+    cards = conn.execute(
+        "SELECT card_id FROM cards WHERE card_role_id IS NULL ORDER BY created_at ASC LIMIT ?;", (limit,)
+    ).fetchall()
+    links = conn.execute(
+        "SELECT suggestion_id FROM link_suggestions WHERE status = 'queued' ORDER BY created_at ASC LIMIT ?;",
+        (limit,),
+    ).fetchall()
+    inserted = 0
+    card_index = 0
+    link_index = 0
+    while inserted < limit and (card_index < len(cards) or link_index < len(links)):
+        if card_index < len(cards):
+            row = conn.execute(
+                LEGACY_INSERT,
+                {"job_type": "card_role", "target_table": "cards", "target_id": cards[card_index][0]},
+            )
+            card_index += 1
+            inserted += row.rowcount
+            if inserted >= limit:
+                break
+        if link_index < len(links) and inserted < limit:
+            row = conn.execute(
+                LEGACY_INSERT,
+                {
+                    "job_type": "link_suggestion",
+                    "target_table": "link_suggestions",
+                    "target_id": links[link_index][0],
+                },
+            )
+            link_index += 1
+            inserted += row.rowcount
+    return inserted
+
+
+def prepare(path: str, targets: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+    conn.execute(
+        "INSERT INTO speakers (speaker_name, speaker_role, canonical_role) VALUES ('a', 'a', 'human');"
+    )
+    card_count = targets // 2
+    conn.executemany(
+        """
+        INSERT INTO cards (thread_id, message_id, text_id, split_key, speaker_id, conversation_at, contents)
+        VALUES ('bench', ?, 1, 1, 1, CURRENT_TIMESTAMP, 'x');
+        """,
+        ((i,) for i in range(1, card_count + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO link_suggestions (from_card_id, to_card_id) VALUES (?, ?);",
+        ((i, i % card_count + 1) for i in range(1, targets - card_count + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(path: str, seed, limit: int) -> tuple[int, float]:
+    conn = sqlite3.connect(path)
+    started = time.perf_counter()
+    inserted = seed(conn, limit)
+    conn.commit()
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return inserted, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--targets", type=int, default=100000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, seed in (
+            ("per-row loop", legacy_seed),
+            ("set-based", lambda conn, limit: seed_llm_jobs(conn, limit=limit)),
+        ):
+            path = os.path.join(tmp, f"{name.replace(' ', '_')}.db")
+            prepare(path, args.targets)
+            inserted, elapsed = measure(path, seed, args.targets)
+            print(f"{name:13s} inserted={inserted:7d} {elapsed:7.2f}s {inserted / elapsed:10.0f} jobs/s")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
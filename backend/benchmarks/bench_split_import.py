@@ -0,0 +1,144 @@
+"""Splitting long speaker blocks: per-segment rescans vs. the delimiter index.
+
+Checks first that both splitters return identical segments on a generated
+golden corpus (plus any *.txt transcripts under --corpus), then times them on
+blocks of growing length.
+
+Usage: python benchmarks/bench_split_import.py [--sizes 100000,200000,400000] [--corpus DIR]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from typing import Optional
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("CONVERSATION_DB_PATH", os.path.join(tempfile.gettempdir(), "bench_split_import.db"))
+
+from app.importer import IMPORT_DELIM_PATTERN, normalize_import_text, split_speaker_text
+
+
+def _legacy_find_first_delim_end(text: str, start: int) -> Optional[int]:
+    match = IMPORT_DELIM_PATTERN.search(text, pos=start)
+    return match.end() if match else None
+
+
+def _legacy_find_first_double_newline(text: str, start: int) -> Optional[int]:
+    idx = text.find("\n\n", start)
+    return idx if idx != -1 else None
+
+
+def legacy_split_speaker_text(text: str, *, allow_overlap: bool) -> list[str]:
+    """The previous implementation: a fresh search to the next boundary for every segment."""
+    parts: list[str] = []
+    text_len = len(text)
+    start = 0
+    prev_end = 0
+    while start < text_len:
+        while start < text_len and text[start].isspace():
+            start += 1
+        if start >= text_len:
+            break
+        search_from = max(start, prev_end) if allow_overlap else start
+        double_search_from = max(search_from, start + 300)
+        next_double = _legacy_find_first_double_newline(text, double_search_from)
+
+        next_delim = None
+        min_delim_start = start + 450
+        if text_len > min_delim_start:
+            next_delim = _legacy_find_first_delim_end(text, max(search_from, min_delim_start))
+
+        end: Optional[int] = None
+        if next_double is not None:
+            end = next_double
+        elif next_delim is not None:
+            end = next_delim
+        if end is None:
+            end = start + 600 if (start + 600) < text_len else text_len
+        if end <= start:
+            end = min(start + 1, text_len)
+
+        segment = text[start:end].strip()
+        if segment:
+            parts.append(segment)
+
+        prev_end = end
+        if prev_end >= text_len:
+            break
+        if allow_overlap:
+            overlap_delim = _legacy_find_first_delim_end(text, max(0, prev_end - 80))
+            if overlap_delim is not None and overlap_delim < prev_end:
+                start = overlap_delim
+                continue
+        start = prev_end
+    return parts
+
+
+SYMBOLS = ["。", "！", "　", "？", "♪", "a", "z", ".", ")", '"', "!", "?", " ", "\n", "\n", "x", "あ", "い"]
+
+
+def golden_corpus(seed: int, count: int) -> list[str]:
+    rng = random.Random(seed)
+    texts = ["", " ", "\n\n\n", "あ" * 5000, ("a. " * 400) + "\n\n" + ("x" * 700)]
+    for _ in range(count):
+        texts.append("".join(rng.choice(SYMBOLS) for _ in range(rng.randint(0, 3000))))
+    return texts
+
+
+def check(corpus_dir: Optional[str]) -> int:
+    texts = golden_corpus(0, 5000)
+    if corpus_dir:
+        for root, _, files in os.walk(corpus_dir):
+            for name in sorted(files):
+                if name.endswith(".txt"):
+                    with open(os.path.join(root, name), encoding="utf-8") as handle:
+                        texts.append(normalize_import_text(handle.read()))
+    for text in texts:
+        for allow_overlap in (True, False):
+            expected = legacy_split_speaker_text(text, allow_overlap=allow_overlap)
+            actual = split_speaker_text(text, allow_overlap=allow_overlap)
+            if actual != expected:
+                raise SystemExit(f"Mismatch on a {len(text)}-char text (allow_overlap={allow_overlap})")
+    return len(texts)
+
+
+def block(size: int, kind: str) -> str:
+    """A single-speaker block: 'chat' has sentence ends, 'dense' has no boundary at all."""
+    if kind == "dense":
+        return "あ" * size
+    sentence = "これは長い独白の一文で、区切りまでの距離を測るための文章です。"
+    text = sentence * (size // len(sentence) + 1)
+    return re.sub("(。)", lambda m: m.group(1) + ("\n\n" if random.random() < 0.01 else ""), text)[:size]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100000,200000,400000")
+    parser.add_argument("--corpus", default=None, help="directory of *.txt transcripts added to the golden check")
+    args = parser.parse_args()
+
+    print(f"golden corpus: {check(args.corpus)} texts identical")
+    print(f"{'kind':6s} {'chars':>9s} {'segments':>9s} {'legacy s':>9s} {'indexed s':>10s} {'speedup':>8s}")
+    for kind in ("chat", "dense"):
+        for size in (int(value) for value in args.sizes.split(",")):
+            text = block(size, kind)
+            started = time.perf_counter()
+            expected = legacy_split_speaker_text(text, allow_overlap=True)
+            legacy = time.perf_counter() - started
+            started = time.perf_counter()
+            actual = split_speaker_text(text, allow_overlap=True)
+            indexed = time.perf_counter() - started
+            assert actual == expected
+            print(f"{kind:6s} {size:9d} {len(actual):9d} {legacy:9.3f} {indexed:10.3f} {legacy / indexed:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""Reader latency while a worker-style writer keeps committing.
+
+Usage: python benchmarks/bench_storage_profile.py [--seconds 5] [--rows 20000]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from app.db import SCHEMA_PATH, STORAGE_PROFILES
+
+
+def open_conn(path: str, profile: dict[str, str]) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=0, check_same_thread=False)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    for pragma, value in profile.items():
+        if pragma != "journal_mode":
+            conn.execute(f"PRAGMA {pragma} = {value};")
+    return conn
+
+
+def prepare(path: str, profile: dict[str, str], rows: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']};")
+    conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+    conn.execute(
+        "INSERT INTO speakers (speaker_name, speaker_role, canonical_role) VALUES ('a', 'a', 'human');"
+    )
+    conn.executemany(
+        """
+        INSERT INTO cards (thread_id, message_id, text_id, split_key, speaker_id, conversation_at, contents)
+        VALUES ('bench', ?, 1, 1, 1, CURRENT_TIMESTAMP, ?);
+        """,
+        ((i, f"contents {i}") for i in range(1, rows + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_profile(name: str, seconds: float, rows: int) -> dict[str, float]:
+    profile = STORAGE_PROFILES[name]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        prepare(path, profile, rows)
+        stop = threading.Event()
+        writes = 0
+
+        def writer() -> None:
+            nonlocal writes
+            conn = open_conn(path, profile)
+            while not stop.is_set():
+                conn.execute("BEGIN IMMEDIATE;")
+                conn.execute(
+                    "UPDATE cards SET updated_at = CURRENT_TIMESTAMP WHERE card_id = ?;",
+                    (writes % rows + 1,),
+                )
+                # Emulates the worker holding its transaction across a few statements.
+                time.sleep(0.002)
+                conn.commit()
+                writes += 1
+
+        thread = threading.Thread(target=writer, daemon=True)
+        thread.start()
+        reader = open_conn(path, {**profile, "busy_timeout": "5000"})
+        latencies: list[float] = []
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            reader.execute("SELECT COUNT(1) FROM cards WHERE contents LIKE '%9%';").fetchone()
+            latencies.append((time.perf_counter() - started) * 1000)
+        stop.set()
+        thread.join()
+        reader.close()
+    latencies.sort()
+    return {
+        "reads": len(latencies),
+        "writes": writes,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "max_ms": latencies[-1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+    for name in STORAGE_PROFILES:
+        result = run_profile(name, args.seconds, args.rows)
+        print(
+            f"{name:8s} reads={result['reads']:6d} writes={result['writes']:6d} "
+            f"p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms max={result['max_ms']:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
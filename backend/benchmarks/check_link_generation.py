@@ -0,0 +1,99 @@
+"""Link-suggestion generation while other writes commit during ranking.
+
+Commits a card through db_writer in the middle of ranking (right after the
+card vectors are read) for both the synchronous and the background path of
+POST /link-suggestions/generate, and fails unless both finish with every
+kept pair stored. Ranking used to share a transaction with the final insert,
+so a write landing in between ended the generation with "database is locked".
+
+Usage: python benchmarks/check_link_generation.py
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+TMP_DIR = tempfile.TemporaryDirectory()
+os.environ["CONVERSATION_DB_PATH"] = os.path.join(TMP_DIR.name, "check.db")
+os.environ.setdefault("CONVERSATION_DB_PROFILE", "wal")
+
+from fastapi.testclient import TestClient
+
+from app import main as api
+from app.db import db_session, db_writer
+from app.similarity import card_vectors
+
+WORDS = ["天気", "散歩", "会議", "資料", "旅行", "料理", "音楽", "映画"]
+
+
+def insert_card(message_id: int) -> None:
+    with db_session() as conn:
+        conn.execute(
+            """
+            INSERT INTO cards (thread_id, message_id, text_id, split_key, speaker_id, conversation_at, contents)
+            VALUES ('concurrent', :message_id, 1, 1, 1, CURRENT_TIMESTAMP, 'ranking 中に届いた書き込み');
+            """,
+            {"message_id": message_id},
+        )
+
+
+def main() -> int:
+    original_get_many = card_vectors.get_many
+    concurrent_writes = 0
+
+    def get_many_then_write(conn, card_ids):
+        nonlocal concurrent_writes
+        vectors = original_get_many(conn, card_ids)
+        concurrent_writes += 1
+        db_writer.call(insert_card, concurrent_writes)
+        return vectors
+
+    failures = 0
+    with TestClient(api.app) as client:
+        client.post("/speakers", json={"speaker_name": "U", "speaker_role": "U", "canonical_role": "human"})
+        raw = "\n".join(f"U:\n{WORDS[i % len(WORDS)]}の話{i}。{WORDS[(i * 3) % len(WORDS)]}も。" for i in range(40))
+        preview = client.post("/import/preview", json={"raw_text": raw}).json()
+        ids = client.post(
+            "/import/commit", json={"thread_id": preview["thread_id"], "parts": preview["parts"]}
+        ).json()["created_card_ids"]
+        card_vectors.get_many = get_many_then_write
+        try:
+            for label, threshold, from_ids in (
+                ("sync", 10**9, ids[:5]),
+                ("background", 1, ids[5:10]),
+            ):
+                api.LINK_GENERATE_BACKGROUND_PAIRS = threshold
+                response = client.post(
+                    "/link-suggestions/generate", json={"from_card_ids": from_ids, "to_card_ids": ids}
+                )
+                if response.status_code == 202:
+                    generation_id = response.json()["generation_id"]
+                    deadline = time.monotonic() + 30
+                    result = {"status": "running"}
+                    while result["status"] == "running" and time.monotonic() < deadline:
+                        time.sleep(0.05)
+                        result = client.get(f"/link-suggestions/generate/{generation_id}").json()
+                else:
+                    result = {"status": "success" if response.status_code == 201 else "failed", **response.json()}
+                with db_session() as conn:
+                    stored = conn.execute(
+                        f"SELECT COUNT(1) FROM link_suggestions WHERE from_card_id IN ({','.join('?' * len(from_ids))});",
+                        from_ids,
+                    ).fetchone()[0]
+                ok = result["status"] == "success" and result.get("created") == stored > 0
+                print(f"{'ok  ' if ok else 'FAIL'} {label}: {result} stored={stored}")
+                failures += not ok
+        finally:
+            card_vectors.get_many = original_get_many
+    print(f"concurrent writes committed during ranking: {concurrent_writes}")
+    return 1 if failures or concurrent_writes < 2 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
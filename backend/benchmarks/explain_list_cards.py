@@ -0,0 +1,92 @@
+"""EXPLAIN QUERY PLAN check for the GET /cards filter combinations.
+
+Builds the same WHERE clause as list_cards for each combination against an
+empty schema and fails if a filtered query falls back to a full scan of cards
+or to a temp B-tree for the default conversation_at ordering.
+
+Usage: python benchmarks/explain_list_cards.py
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from app.db import SCHEMA_PATH
+from app.main import _build_card_filters
+
+BASE_FILTERS = {
+    "visibility": "normal",
+    "speaker_id": None,
+    "role_major_id": None,
+    "role_id": None,
+    "role_unset": None,
+    "thread_id": None,
+    "date_from": None,
+    "date_to": None,
+    "q": None,
+    "use_fts": False,
+}
+
+# (filters, index the page query is expected to use)
+CASES: list[tuple[dict, str]] = [
+    ({}, "idx_cards_visibility_conversation_at"),
+    ({"thread_id": "t"}, "idx_cards_visibility_thread"),
+    ({"speaker_id": 1}, "idx_cards_visibility_speaker_conversation_at"),
+    ({"role_id": 1}, "idx_cards_role_visibility_conversation_at"),
+    ({"role_unset": True}, "idx_cards_role_visibility_conversation_at"),
+    ({"role_major_id": 1}, "idx_cards_"),
+    ({"date_from": "2026-01-01", "date_to": "2026-02-01"}, "idx_cards_visibility_conversation_at"),
+    ({"speaker_id": 1, "date_from": "2026-01-01"}, "idx_cards_visibility_speaker_conversation_at"),
+    ({"role_id": 1, "date_to": "2026-02-01"}, "idx_cards_role_visibility_conversation_at"),
+    ({"thread_id": "t", "speaker_id": 1}, "idx_cards_visibility_"),
+    ({"q": "天気がいい", "use_fts": True}, "SCAN cards_fts VIRTUAL TABLE"),
+]
+
+
+def explain(conn: sqlite3.Connection, query: str, params: dict) -> list[str]:
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+def main() -> int:
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+    failures = 0
+    for overrides, expected_index in CASES:
+        from_clause, where_clause, params = _build_card_filters(**{**BASE_FILTERS, **overrides})
+        page_plan = explain(
+            conn,
+            f"""
+            SELECT c.card_id FROM {from_clause}
+            WHERE {where_clause}
+            ORDER BY c.conversation_at ASC, c.card_id ASC
+            LIMIT 50;
+            """,
+            params,
+        )
+        count_plan = explain(conn, f"SELECT COUNT(1) FROM {from_clause} WHERE {where_clause};", params)
+        problems = []
+        if not any(expected_index in step for step in page_plan):
+            problems.append(f"expected {expected_index}")
+        if any(step.split(" ")[:2] == ["SCAN", "c"] and "INDEX" not in step for step in page_plan + count_plan):
+            problems.append("full scan of cards")
+        if not overrides.get("use_fts") and any("TEMP B-TREE" in step for step in page_plan):
+            problems.append("temp B-tree for ORDER BY")
+        label = ", ".join(sorted(overrides)) or "(no filters)"
+        print(f"{'FAIL' if problems else 'ok  '} {label}")
+        for step in page_plan:
+            print(f"       page : {step}")
+        for step in count_plan:
+            print(f"       count: {step}")
+        for problem in problems:
+            print(f"       !! {problem}")
+        failures += bool(problems)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""Local stand-in for Ollama's streaming /api/generate endpoint.
+
+Streams a canned reply as NDJSON chunks over HTTP/1.1 keep-alive, one token
+every --token-delay seconds, then keeps emitting filler tokens until
+num_predict is reached so early termination in the client is observable.
+
+Usage:
+  python benchmarks/fake_ollama.py [--port 11435] [--reply "断定\\n0.85\\n"]
+  CONVERSATION_OLLAMA_URL=http://127.0.0.1:11435/api/generate python -m app.llm_worker
+
+Run with --check to start the server in-process, drive app.ollama_client
+against it, and print the client counters.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def make_server(port: int, reply: str, token_delay: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+        def _chunk(self, data: dict) -> None:
+            line = (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+            self.wfile.flush()
+
+        def do_POST(self) -> None:
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            num_predict = payload.get("options", {}).get("num_predict") or 64
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            started = time.perf_counter()
+            tokens = list(reply) + ["…"] * max(0, num_predict - len(reply))
+            try:
+                for token in tokens[:num_predict]:
+                    time.sleep(token_delay)
+                    self._chunk({"model": payload.get("model"), "response": token, "done": False})
+                self._chunk(
+                    {
+                        "model": payload.get("model"),
+                        "response": "",
+                        "done": True,
+                        "prompt_eval_count": len(payload.get("prompt", "")),
+                        "eval_count": min(num_predict, len(tokens)),
+                        "total_duration": int((time.perf_counter() - started) * 1e9),
+                    }
+                )
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+
+    return ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+
+def check(reply: str, token_delay: float, requests: int) -> None:
+    from app.ollama_client import OllamaClient
+
+    server = make_server(0, reply, token_delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = OllamaClient(
+        f"http://127.0.0.1:{server.server_address[1]}/api/generate",
+        pool_size=2,
+        connect_timeout=5,
+        read_timeout=10,
+    )
+    payload = {"model": "fake", "prompt": "p", "options": {"num_predict": 12, "stop": ["\n\n"]}}
+    for label, expected_lines in (("early stop", 2), ("full stream", None)):
+        started = time.perf_counter()
+        for _ in range(requests):
+            result = client.generate(payload, expected_lines=expected_lines)
+        elapsed = (time.perf_counter() - started) * 1000 / requests
+        print(f"{label:11s} {elapsed:7.1f}ms/request response={result['response']!r}")
+    print(client.stats())
+    client.close()
+    server.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--reply", default="断定\n0.85\n")
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+    reply = args.reply.replace("\\n", "\n")
+    if args.check:
+        check(reply, args.token_delay, args.requests)
+        return
+    server = make_server(args.port, reply, args.token_delay)
+    print(f"fake Ollama listening on http://127.0.0.1:{args.port}/api/generate")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file